@@ -1,29 +1,47 @@
-"""FastAPI inference service for the Head Start MVP."""
+"""FastAPI inference service for the Head Start MVP.
+
+Importing this module is kept cheap (no pandas, scikit-learn or LightGBM) so
+workers start accepting connections quickly; the model is loaded by a
+background startup task and ``/health`` reports readiness until it is.
+"""
 
 from __future__ import annotations
 
 import asyncio
 import contextlib
+import hashlib
 import json
-from collections import defaultdict, deque
+import logging
+import os
+import resource
+import secrets
+import sys
+import threading
+import time
+from collections import defaultdict
 from datetime import datetime, timezone
+from operator import itemgetter
 from pathlib import Path
-from typing import Any, Deque, Dict, List
+from typing import TYPE_CHECKING, Any, Dict, List, Mapping
 
-import joblib
 import numpy as np
-import pandas as pd
-from fastapi import Depends, FastAPI, Header, HTTPException, status
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel, Field, field_validator
 from pydantic_settings import BaseSettings
 
-from scripts.build_features import (  # type: ignore
-    add_circadian_deltas,
-    add_context_flags,
-    add_rolling_features,
-    add_time_features,
-)
+from backend.circadian import CircadianBaseline, seed_baselines
+from backend.executor import ExecutorSaturated, InferenceExecutor, LoopLagMonitor
+from backend.metrics import MetricsRegistry
+from backend.persistence import EventPersistence
+from backend.profiler import StackSampler
+from backend.store import UserEventBuffer
+from backend.streaming import StreamingFeatureEngine
+from scripts.feature_spec import FeaturePlan, compile_plan  # type: ignore
+
+if TYPE_CHECKING:
+    from backend.booster import RawBooster
 
 # ---------------------------------------------------------------------------
 # Settings & configuration
@@ -34,20 +52,42 @@ class Settings(BaseSettings):
     api_token: str = Field("dev-token", alias="API_TOKEN")
     model_path: Path = Path("models/model.pkl")
     scaler_path: Path = Path("models/scaler.pkl")
+    booster_path: Path = Path("models/model.txt")
     feature_metadata_path: Path = Path("models/feature_metadata.json")
     refresh_interval_seconds: int = 120
     event_window_minutes: int = 12 * 60
     max_events_per_user: int = 12 * 60
     max_insights: int = 3
+    lock_stripes: int = 64
+    executor_mode: str = "thread"
+    executor_workers: int = 2
+    executor_max_pending: int = 256
+    score_on_ingest: bool = True
+    refresh_batch_size: int = 1024
+    persistence_dir: Path | None = None
+    wal_fsync: str = "interval"
+    wal_group_commit_ms: float = 2.0
+    wal_fsync_interval_seconds: float = 1.0
+    snapshot_interval_seconds: int = 300
+    # 5-minute slots keep the baseline at ~15 KB per user (~75 KB at 1, which matches the offline shift exactly).
+    circadian_resolution_minutes: int = 5
+    circadian_seed_path: Path | None = None
+    admin_token: str | None = None
+    model_watch_interval_seconds: float = 0.0
+    loop_lag_interval_seconds: float = 0.25
+    metrics_enabled: bool = True
+    engine_rebuild_concurrency: int = 2
 
     model_config = {
         "env_file": ".env",
         "env_file_encoding": "utf-8",
         "extra": "ignore",
+        "protected_namespaces": ("settings_",),
     }
 
 
 settings = Settings()
+logger = logging.getLogger(__name__)
 
 
 # ---------------------------------------------------------------------------
@@ -72,32 +112,48 @@ class IngestPayload(BaseModel):
     migraine_probability: float
     weather_condition: str = Field("clear")
 
-    @field_validator("timestamp", mode="before")
+    @field_validator("timestamp")
     @classmethod
-    def ensure_timezone(cls, value: Any) -> datetime:
-        ts = pd.to_datetime(value, utc=True)
-        return ts.to_pydatetime()
+    def ensure_timezone(cls, value: datetime) -> datetime:
+        # Naive timestamps are taken as UTC, aware ones converted to it.
+        if value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value.astimezone(timezone.utc)
 
 
 class IngestResponse(BaseModel):
+    model_config = {"protected_namespaces": ()}
+
     user_id: str
     stored_events: int
     last_prediction: float | None
+    model_version: str | None = None
+
+
+class BatchIngestResponse(BaseModel):
+    accepted: int
+    users: List[IngestResponse]
 
 
 class PredictionResponse(BaseModel):
+    model_config = {"protected_namespaces": ()}
+
     user_id: str
     probability: float
     risk_level: str
     updated_at: datetime
+    model_version: str | None = None
 
 
 class InsightResponse(BaseModel):
+    model_config = {"protected_namespaces": ()}
+
     user_id: str
     risk_level: str
     probability: float
     insights: List[str]
     generated_at: datetime
+    model_version: str | None = None
 
 
 class CoachRequest(BaseModel):
@@ -105,10 +161,19 @@ class CoachRequest(BaseModel):
 
 
 class CoachResponse(BaseModel):
+    model_config = {"protected_namespaces": ()}
+
     user_id: str
     risk_level: str
     probability: float
     recommendations: List[str]
+    model_version: str | None = None
+
+
+class ModelReloadRequest(BaseModel):
+    directory: Path | None = Field(
+        None, description="Directory holding model.txt/model.pkl/scaler.pkl/feature_metadata.json; defaults to the configured paths"
+    )
 
 
 # ---------------------------------------------------------------------------
@@ -126,11 +191,35 @@ app.add_middleware(
 )
 
 
-EventStore = Dict[str, Deque[dict[str, Any]]]
+EventStore = Dict[str, UserEventBuffer]
 FEATURE_CACHE: dict[str, dict[str, Any]] = {}
-EVENT_STORE: EventStore = defaultdict(lambda: deque(maxlen=settings.max_events_per_user))
-store_lock = asyncio.Lock()
+EVENT_STORE: EventStore = defaultdict(lambda: UserEventBuffer(settings.max_events_per_user))
+FEATURE_ENGINES: dict[str, StreamingFeatureEngine] = {}
+# Users whose engine is being replayed from the retained window in a worker thread.
+ENGINE_REBUILDS: dict[str, asyncio.Task] = {}
+REPLAY_YIELD_EVERY = 32
+# Kept outside the engines so rebuilds from the retained window keep the previous day.
+CIRCADIAN_BASELINES: dict[str, CircadianBaseline] = {}
+# Bumped on every append; FEATURE_CACHE entries record the version they scored.
+EVENT_VERSIONS: dict[str, int] = defaultdict(int)
+DIRTY_USERS: set[str] = set()
+store_locks = [asyncio.Lock() for _ in range(max(1, settings.lock_stripes))]
 refresh_task: asyncio.Task | None = None
+PERSISTENCE: EventPersistence | None = None
+persistence_tasks: list[asyncio.Task] = []
+model_watch_task: asyncio.Task | None = None
+startup_task: asyncio.Task | None = None
+loop_lag_task: asyncio.Task | None = None
+MODEL_RELOAD_LOCK = asyncio.Lock()
+PROFILE_LOCK = asyncio.Lock()
+# "starting" until the startup task has loaded the model and restored state, then "ready" (or "failed").
+SERVICE_STATE: dict[str, Any] = {
+    "status": "starting",
+    "error": None,
+    "model_load_seconds": None,
+    "startup_seconds": None,
+    "rss_bytes_at_ready": None,
+}
 
 
 # ---------------------------------------------------------------------------
@@ -138,31 +227,131 @@ refresh_task: asyncio.Task | None = None
 # ---------------------------------------------------------------------------
 
 
+def artifact_settings(directory: Path | None = None) -> Settings:
+    """``settings`` with the model artifact paths pointed into ``directory``, if given."""
+    if directory is None:
+        return settings
+    return settings.model_copy(
+        update={
+            "model_path": directory / "model.pkl",
+            "scaler_path": directory / "scaler.pkl",
+            "booster_path": directory / "model.txt",
+            "feature_metadata_path": directory / "feature_metadata.json",
+        }
+    )
+
+
+def _artifact_signature(config: Settings) -> tuple:
+    """Cheap change detector for the file watch: (path, mtime, size) of each artifact present."""
+    paths = (config.feature_metadata_path, config.booster_path, config.model_path, config.scaler_path)
+    return tuple((str(path), path.stat().st_mtime_ns, path.stat().st_size) for path in paths if path.exists())
+
+
 class ModelBundle:
+    """Trained model plus feature order.
+
+    Prefers the scaler-free booster exported by ``models/train.py`` and falls
+    back to the pickled scaler + ``LGBMClassifier`` pair when it is absent.
+    ``version`` is a digest of the loaded artifacts, so identical files give
+    the same version on every worker.
+    """
+
     def __init__(self, settings: Settings) -> None:
-        if not settings.model_path.exists():
-            raise FileNotFoundError(f"Model not found at {settings.model_path}")
-        if not settings.scaler_path.exists():
-            raise FileNotFoundError(f"Scaler not found at {settings.scaler_path}")
         if not settings.feature_metadata_path.exists():
             raise FileNotFoundError(f"Feature metadata missing at {settings.feature_metadata_path}")
-
-        self.model = joblib.load(settings.model_path)
-        self.scaler = joblib.load(settings.scaler_path)
         meta = json.loads(settings.feature_metadata_path.read_text())
         self.features: list[str] = meta.get("features", [])
         if not self.features:
             raise ValueError("Feature metadata did not contain feature list")
 
-    def predict_probability(self, feature_vector: pd.Series) -> float:
-        arr = feature_vector[self.features].to_numpy(dtype=float)
-        arr = arr.reshape(1, -1)
-        scaled = self.scaler.transform(arr)
-        proba = self.model.predict_proba(scaled)[0, 1]
-        return float(proba)
+        self.booster: RawBooster | None = None
+        if settings.booster_path.exists():
+            # Imported here so importing the app does not pull in LightGBM (and scikit-learn with it).
+            from backend.booster import RawBooster
+
+            self.booster = RawBooster(settings.booster_path, self.features)
+            artifacts = [settings.feature_metadata_path, settings.booster_path]
+        else:
+            if not settings.model_path.exists():
+                raise FileNotFoundError(f"Model not found at {settings.model_path}")
+            if not settings.scaler_path.exists():
+                raise FileNotFoundError(f"Scaler not found at {settings.scaler_path}")
+            import joblib
+
+            self.model = joblib.load(settings.model_path)
+            self.scaler = joblib.load(settings.scaler_path)
+            artifacts = [settings.feature_metadata_path, settings.model_path, settings.scaler_path]
+
+        digest = hashlib.sha256()
+        for path in artifacts:
+            digest.update(path.read_bytes())
+        self.version = digest.hexdigest()[:12]
+        self.loaded_at = datetime.now(timezone.utc)
+
+    def warm_up(self) -> None:
+        """Score a probe row and batch so a broken model fails before it is swapped in."""
+        probe = np.zeros((2, len(self.features)), dtype=float)
+        probabilities = [self.predict_probability(probe[0]), *self.predict_probabilities(probe)]
+        if not all(0.0 <= value <= 1.0 for value in probabilities):
+            raise ValueError(f"Warm-up prediction out of range: {probabilities}")
+
+    def predict_probability(self, feature_vector: np.ndarray) -> float:
+        if self.booster is not None:
+            return self.booster.predict_row(feature_vector)
+        return float(self.predict_probabilities(feature_vector.reshape(1, -1))[0])
+
+    def predict_probabilities(self, feature_matrix: np.ndarray) -> np.ndarray:
+        """Score a ``(n_users, n_features)`` matrix in ``self.features`` order."""
+        if self.booster is not None:
+            return self.booster.predict_matrix(feature_matrix)
+        scaled = self.scaler.transform(feature_matrix)
+        return self.model.predict_proba(scaled)[:, 1]
+
+
+# Set by the startup task (or ``load_model``); ``None`` until then.
+MODEL_BUNDLE: ModelBundle | None = None
+# Engines only maintain the features the loaded model reads.
+FEATURE_PLAN: FeaturePlan | None = None
+EXECUTOR = InferenceExecutor(settings.executor_mode, settings.executor_workers, settings.executor_max_pending)
+LOOP_LAG = LoopLagMonitor(settings.loop_lag_interval_seconds)
+
 
+# ---------------------------------------------------------------------------
+# Metrics
+# ---------------------------------------------------------------------------
 
-MODEL_BUNDLE = ModelBundle(settings)
+# With METRICS_ENABLED=false every metric below is a shared no-op and /metrics is 404.
+METRICS = MetricsRegistry(enabled=settings.metrics_enabled, prefix="headstart_")
+STAGE_SECONDS = {
+    stage: METRICS.histogram("stage_seconds", "Time per hot-path stage call", stage=stage)
+    for stage in ("lock_wait", "feature_update", "feature_vector", "executor_wait", "predict", "insights")
+}
+INGEST_SECONDS = METRICS.histogram("ingest_seconds", "End-to-end handling time of ingest requests")
+INGEST_REQUESTS = METRICS.counter("ingest_requests_total", "Ingest requests (single and batch)")
+INGESTED_EVENTS = METRICS.counter("ingested_events_total", "Samples accepted by ingest")
+SCORED_ON_INGEST = METRICS.counter("scored_users_total", "Users scored", path="ingest")
+SCORED_ON_REFRESH = METRICS.counter("scored_users_total", "Users scored", path="refresh")
+REFRESH_SWEEPS = METRICS.counter("refresh_sweeps_total", "Refresh sweeps over dirty users")
+REFRESH_SWEEP_SECONDS = METRICS.gauge("refresh_sweep_seconds", "Duration of the last refresh sweep")
+CACHE_HITS = METRICS.counter("prediction_cache_lookups_total", "Prediction cache lookups by reads", result="hit")
+CACHE_MISSES = METRICS.counter("prediction_cache_lookups_total", "Prediction cache lookups by reads", result="miss")
+METRICS.gauge("users_tracked", "Users with samples in the event store", fn=lambda: len(EVENT_STORE))
+METRICS.gauge(
+    "event_store_bytes", "Bytes held by the event buffers", fn=lambda: sum(e.nbytes for e in EVENT_STORE.values())
+)
+METRICS.gauge(
+    "circadian_baseline_bytes",
+    "Bytes held by the circadian baselines",
+    fn=lambda: sum(b.nbytes for b in CIRCADIAN_BASELINES.values()),
+)
+METRICS.gauge("dirty_users", "Users with samples not yet scored", fn=lambda: len(DIRTY_USERS))
+METRICS.gauge("executor_pending", "Scoring jobs queued or running", fn=lambda: EXECUTOR.pending)
+METRICS.gauge(
+    "executor_rejected", "Scoring jobs rejected because the executor was saturated", fn=lambda: EXECUTOR.rejected
+)
+METRICS.gauge(
+    "event_loop_lag_seconds", "Recent p99 event-loop lag", fn=lambda: LOOP_LAG.stats()["recent_p99_ms"] / 1000
+)
 
 
 # ---------------------------------------------------------------------------
@@ -175,53 +364,177 @@ def require_api_key(x_api_key: str = Header(..., alias="X-API-Key")) -> None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid API key")
 
 
+def require_admin_token(x_admin_token: str | None = Header(default=None, alias="X-Admin-Token")) -> None:
+    # Admin routes stay closed unless ADMIN_TOKEN is set; a missing header is forbidden, not a 422.
+    if (
+        settings.admin_token is None
+        or x_admin_token is None
+        or not secrets.compare_digest(x_admin_token.encode(), settings.admin_token.encode())
+    ):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin token")
+
+
+def require_ready() -> None:
+    if SERVICE_STATE["status"] != "ready":
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Service is {SERVICE_STATE['status']}",
+            headers={"Retry-After": "1"},
+        )
+
+
 # ---------------------------------------------------------------------------
 # Helper functions
 # ---------------------------------------------------------------------------
 
 
-def _as_dataframe(user_id: str, events: Deque[dict[str, Any]]) -> pd.DataFrame:
-    if not events:
-        raise ValueError("No events to build features from")
-    df = pd.DataFrame(list(events))
-    df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True)
-    df["user_id"] = user_id
-    df = df.sort_values("timestamp")
-    return df
-
-
-def _apply_feature_pipeline(df: pd.DataFrame) -> pd.DataFrame:
-    df = add_time_features(df)
-    df = add_context_flags(df)
-    df = add_rolling_features(df, "heart_rate", [15, 60, 180], "mean")
-    df = add_rolling_features(df, "heart_rate", [60, 240], "std")
-    df = add_rolling_features(df, "hrv", [15, 60, 180], "mean")
-    df = add_rolling_features(df, "hrv", [60, 240], "std")
-    df = add_rolling_features(df, "sleep_debt_hours", [60, 360], "max")
-    df = add_rolling_features(df, "screen_time_minutes", [30, 120], "sum")
-    df = add_rolling_features(df, "ambient_noise_db", [30, 120], "mean")
-    df = add_rolling_features(df, "barometric_pressure_hpa", [180, 360], "mean")
-    df = add_circadian_deltas(
-        df,
-        [
-            "heart_rate",
-            "hrv",
-            "screen_time_minutes",
-            "barometric_pressure_hpa",
-            "ambient_noise_db",
-            "temperature_c",
-        ],
-    )
-    return df
+def _rss_bytes() -> int:
+    """Current resident set size; the peak where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
 
 
-def _compute_feature_vector(user_id: str, events: Deque[dict[str, Any]]) -> pd.Series:
-    df = _as_dataframe(user_id, events)
-    df = _apply_feature_pipeline(df)
-    latest = df.iloc[-1]
-    series = latest.reindex(MODEL_BUNDLE.features)
-    series = series.fillna(0.0)
-    return series.astype(float)
+def _mark_ready(**state: Any) -> None:
+    # RSS once the model is loaded is the baseline for the per-user figure on /health.
+    SERVICE_STATE.update(status="ready", rss_bytes_at_ready=_rss_bytes(), **state)
+
+
+def _user_lock(user_id: str) -> asyncio.Lock:
+    """Striped lock guarding one user's EVENT_STORE/FEATURE_CACHE entries."""
+    return store_locks[hash(user_id) % len(store_locks)]
+
+
+def _append_events(user_id: str, records: List[dict[str, Any]]) -> None:
+    records = sorted(records, key=itemgetter("timestamp"))
+    events = EVENT_STORE[user_id]
+    for record in records:
+        events.append(record)
+    EVENT_VERSIONS[user_id] += 1
+    DIRTY_USERS.add(user_id)
+    if PERSISTENCE is not None:
+        PERSISTENCE.log(user_id, records, events.appended - len(records) + 1)
+    with STAGE_SECONDS["feature_update"].time():
+        engine = FEATURE_ENGINES.get(user_id)
+        if engine is None and events.appended == len(records):
+            # A new user's first samples: pushing them costs no more than storing them.
+            engine = FEATURE_ENGINES[user_id] = StreamingFeatureEngine(FEATURE_PLAN, _circadian_baseline(user_id))
+        # Push the samples as stored (float32 signals, whole minutes), not as sent: a
+        # replay reads them back from the store, and both paths must give the same features.
+        stored = events.records_since(events.appended - len(records)) if engine is not None else None
+        if stored is not None and (engine.last_timestamp is None or stored[0]["timestamp"] >= engine.last_timestamp):
+            for record in stored:
+                engine.push(record)
+            return
+        # Restored user or late samples: the window is replayed off the loop before the user is scored again.
+        FEATURE_ENGINES.pop(user_id, None)
+
+
+@contextlib.asynccontextmanager
+async def _locked(user_id: str):
+    """Hold the user's lock stripe, recording how long it took to get it."""
+    started = time.perf_counter()
+    async with _user_lock(user_id):
+        STAGE_SECONDS["lock_wait"].observe(time.perf_counter() - started)
+        yield
+
+
+def _circadian_baseline(user_id: str) -> CircadianBaseline:
+    baseline = CIRCADIAN_BASELINES.get(user_id)
+    # A baseline restored for an older model may not track every signal this one needs.
+    if baseline is None or not set(FEATURE_PLAN.circadian_signals) <= set(baseline.columns):
+        baseline = CIRCADIAN_BASELINES[user_id] = CircadianBaseline(
+            FEATURE_PLAN.circadian_signals, settings.circadian_resolution_minutes
+        )
+    return baseline
+
+
+def _replay_engine(
+    events: UserEventBuffer, baseline: CircadianBaseline, plan: FeaturePlan
+) -> StreamingFeatureEngine:
+    engine = StreamingFeatureEngine(plan, baseline)
+    for count, record in enumerate(events.records(), 1):
+        engine.push(record)
+        if count % REPLAY_YIELD_EVERY == 0:
+            # Pure-Python work holds the GIL for a whole switch interval; hand it back to the loop sooner.
+            time.sleep(0)
+    return engine
+
+
+async def _build_engine(user_id: str, plan: FeaturePlan) -> tuple[StreamingFeatureEngine, int]:
+    """Replay the user's retained window into a new engine in a worker thread.
+
+    The replay works on copies of the buffer and baseline, so ingest keeps
+    running meanwhile; returns the engine and the ``appended`` count it
+    covers, for :func:`_catch_up`.
+    """
+    events = EVENT_STORE[user_id]
+    baseline = CIRCADIAN_BASELINES.get(user_id)
+    # A baseline restored for an older model may not track every signal this plan needs.
+    if baseline is None or not set(plan.circadian_signals) <= set(baseline.columns):
+        baseline = CircadianBaseline(plan.circadian_signals, settings.circadian_resolution_minutes)
+    else:
+        baseline = baseline.copy()
+    appended = events.appended
+    engine = await asyncio.to_thread(_replay_engine, events.copy(), baseline, plan)
+    return engine, appended
+
+
+def _catch_up(user_id: str, engine: StreamingFeatureEngine, appended: int) -> bool:
+    """Push samples stored since the replay into ``engine``; False if one arrived out of order."""
+    events = EVENT_STORE.get(user_id)
+    missed = events.records_since(appended) if events is not None else None
+    if missed is None:
+        return False
+    for record in missed:
+        if engine.last_timestamp is not None and record["timestamp"] < engine.last_timestamp:
+            return False
+        engine.push(record)
+    return True
+
+
+def _install_engine(user_id: str, engine: StreamingFeatureEngine) -> None:
+    FEATURE_ENGINES[user_id] = engine
+    if engine.circadian is not None:
+        CIRCADIAN_BASELINES[user_id] = engine.circadian
+
+
+async def _rebuild_engine(user_id: str, rescore: bool) -> None:
+    try:
+        while user_id in EVENT_STORE and user_id not in FEATURE_ENGINES:
+            plan = FEATURE_PLAN
+            engine, appended = await _build_engine(user_id, plan)
+            # Retry if a reload changed the plan or a late sample arrived during the replay.
+            if plan is FEATURE_PLAN and user_id not in FEATURE_ENGINES and _catch_up(user_id, engine, appended):
+                _install_engine(user_id, engine)
+    finally:
+        ENGINE_REBUILDS.pop(user_id, None)
+    if rescore:
+        await _update_prediction(user_id)
+
+
+def _schedule_rebuild(user_id: str, rescore: bool = False) -> asyncio.Task:
+    """The user's pending engine rebuild, started if there is none.
+
+    With ``rescore`` a new rebuild also scores the user when it is done;
+    sweeps await the task and score in batches themselves.
+    """
+    task = ENGINE_REBUILDS.get(user_id)
+    if task is None:
+        task = ENGINE_REBUILDS[user_id] = asyncio.create_task(_rebuild_engine(user_id, rescore))
+    return task
+
+
+def _compute_feature_vector(user_id: str, bundle: ModelBundle) -> np.ndarray:
+    """Latest features in ``bundle`` order, with missing history filled as 0."""
+    with STAGE_SECONDS["feature_vector"].time():
+        latest = FEATURE_ENGINES[user_id].features()
+        vector = np.array([latest.get(name, np.nan) for name in bundle.features], dtype=float)
+        vector[np.isnan(vector)] = 0.0
+    return vector
 
 
 def _risk_level(probability: float) -> str:
@@ -232,7 +545,7 @@ def _risk_level(probability: float) -> str:
     return "low"
 
 
-def _generate_insights(series: pd.Series) -> List[str]:
+def _generate_insights(series: Mapping[str, float]) -> List[str]:
     insights: list[tuple[str, float]] = []
     if series.get("screen_time_minutes_sum_120m", 0) > 90:
         insights.append(("Screen time spike", float(series["screen_time_minutes_sum_120m"])))
@@ -251,29 +564,290 @@ def _generate_insights(series: pd.Series) -> List[str]:
     return [text for text, _ in insights[: settings.max_insights]]
 
 
-def _update_prediction(user_id: str) -> None:
-    events = EVENT_STORE[user_id]
-    if not events:
+def _score_features(
+    features: np.ndarray, bundle: ModelBundle | None = None
+) -> tuple[float, List[str], tuple[float, float]]:
+    """CPU-bound half of a prediction update; runs on ``EXECUTOR``.
+
+    ``bundle`` is the model the features were built for; process workers
+    are passed none and use their own ``MODEL_BUNDLE``, which the pool
+    recycle on reload keeps in step. Also returns the (predict, insights)
+    seconds, which the loop records since workers may be other processes.
+    """
+    bundle = bundle or MODEL_BUNDLE
+    started = time.perf_counter()
+    probability = bundle.predict_probability(features)
+    predicted = time.perf_counter()
+    insights = _generate_insights(dict(zip(bundle.features, features.tolist())))
+    return probability, insights, (predicted - started, time.perf_counter() - predicted)
+
+
+def _score_feature_matrix(
+    matrix: np.ndarray, bundle: ModelBundle | None = None
+) -> tuple[list[float], list[List[str]], tuple[float, float]]:
+    """Batched ``_score_features``: one scaler/predict_proba call for all rows."""
+    bundle = bundle or MODEL_BUNDLE
+    started = time.perf_counter()
+    probabilities = bundle.predict_probabilities(matrix).tolist()
+    predicted = time.perf_counter()
+    insights = [_generate_insights(dict(zip(bundle.features, row))) for row in matrix.tolist()]
+    return probabilities, insights, (predicted - started, time.perf_counter() - predicted)
+
+
+def _observe_scoring(elapsed: float, timings: tuple[float, float]) -> None:
+    predict_seconds, insights_seconds = timings
+    STAGE_SECONDS["predict"].observe(predict_seconds)
+    STAGE_SECONDS["insights"].observe(insights_seconds)
+    # Queueing plus the hand-off to the pool (and pickling in process mode).
+    STAGE_SECONDS["executor_wait"].observe(max(0.0, elapsed - predict_seconds - insights_seconds))
+
+
+def _scoring_args(payload: np.ndarray, bundle: ModelBundle) -> tuple:
+    # Bundles hold native LightGBM handles and are not picklable.
+    return (payload,) if EXECUTOR.mode == "process" else (payload, bundle)
+
+
+def _store_prediction(
+    user_id: str,
+    version: int,
+    features: np.ndarray,
+    probability: float,
+    insights: List[str],
+    model_version: str,
+) -> None:
+    current = model_version == MODEL_BUNDLE.version
+    cached = FEATURE_CACHE.get(user_id)
+    if cached is not None and (cached["version"], cached.get("model_version") == MODEL_BUNDLE.version) > (
+        version,
+        current,
+    ):
+        # A newer ingest, or the newly loaded model, scored this user while this result was in flight.
         return
-    features = _compute_feature_vector(user_id, events)
-    probability = MODEL_BUNDLE.predict_probability(features)
-    risk = _risk_level(probability)
-    insights = _generate_insights(features)
     FEATURE_CACHE[user_id] = {
         "features": features,
         "probability": probability,
-        "risk_level": risk,
+        "risk_level": _risk_level(probability),
         "insights": insights,
         "updated_at": datetime.now(timezone.utc),
+        "version": version,
+        "model_version": model_version,
     }
+    if EVENT_VERSIONS[user_id] == version and current:
+        DIRTY_USERS.discard(user_id)
+
+
+async def _update_prediction(user_id: str) -> None:
+    if user_id not in EVENT_STORE:
+        return
+    if user_id not in FEATURE_ENGINES:
+        # Scored by the rebuild once it is done; meanwhile reads serve the cached prediction.
+        _schedule_rebuild(user_id, rescore=True)
+        return
+    version = EVENT_VERSIONS[user_id]
+    bundle = MODEL_BUNDLE
+    features = _compute_feature_vector(user_id, bundle)
+    submitted = time.perf_counter()
+    try:
+        probability, insights, timings = await EXECUTOR.run(_score_features, *_scoring_args(features, bundle))
+    except ExecutorSaturated:
+        # Samples are already stored and the user stays dirty for the sweep.
+        return
+    _observe_scoring(time.perf_counter() - submitted, timings)
+    SCORED_ON_INGEST.inc()
+    _store_prediction(user_id, version, features, probability, insights, bundle.version)
+
+
+async def _refresh_all() -> None:
+    """Rescore users with unscored samples, one predict call per batch."""
+    started = time.perf_counter()
+    REFRESH_SWEEPS.inc()
+    dirty = [user_id for user_id in DIRTY_USERS if user_id in EVENT_STORE]
+    batch_size = max(1, settings.refresh_batch_size)
+    for start in range(0, len(dirty), batch_size):
+        batch = dirty[start : start + batch_size]
+        await _rebuild_engines([user_id for user_id in batch if user_id not in FEATURE_ENGINES])
+        # Users scored, or left without an engine, while the rebuilds ran are skipped.
+        user_ids = [user_id for user_id in batch if user_id in DIRTY_USERS and user_id in FEATURE_ENGINES]
+        if not user_ids:
+            continue
+        versions = [EVENT_VERSIONS[user_id] for user_id in user_ids]
+        bundle = MODEL_BUNDLE
+        matrix = np.vstack([_compute_feature_vector(user_id, bundle) for user_id in user_ids])
+        submitted = time.perf_counter()
+        try:
+            probabilities, insights, timings = await EXECUTOR.run(
+                _score_feature_matrix, *_scoring_args(matrix, bundle)
+            )
+        except ExecutorSaturated:
+            break
+        _observe_scoring(time.perf_counter() - submitted, timings)
+        SCORED_ON_REFRESH.inc(len(user_ids))
+        for row, user_id in enumerate(user_ids):
+            _store_prediction(user_id, versions[row], matrix[row], probabilities[row], insights[row], bundle.version)
+    REFRESH_SWEEP_SECONDS.set(time.perf_counter() - started)
+
+
+async def _rebuild_engines(user_ids: List[str]) -> None:
+    """Await engine rebuilds a few users at a time; each replay yields the loop while it runs."""
+    step = max(1, settings.engine_rebuild_concurrency)
+    for start in range(0, len(user_ids), step):
+        chunk = user_ids[start : start + step]
+        results = await asyncio.gather(*(_schedule_rebuild(user_id) for user_id in chunk), return_exceptions=True)
+        for user_id, result in zip(chunk, results):
+            if isinstance(result, Exception):
+                logger.warning("Rebuilding the feature engine of %s failed: %r", user_id, result)
 
 
 async def _refresh_loop() -> None:
     while True:
+        # Sweeping first scores users restored from disk without waiting a full interval.
+        await _refresh_all()
         await asyncio.sleep(settings.refresh_interval_seconds)
-        async with store_lock:
-            for user_id in list(EVENT_STORE.keys()):
-                _update_prediction(user_id)
+
+
+async def _restore_persisted_state(persistence: EventPersistence) -> None:
+    state = await asyncio.to_thread(persistence.recover)
+    EVENT_STORE.update(state.buffers)
+    CIRCADIAN_BASELINES.update(state.baselines)
+    for user_id, cached in state.cache.items():
+        FEATURE_CACHE[user_id] = {**cached, "version": 0}
+    for user_id in state.buffers:
+        cached = FEATURE_CACHE.get(user_id)
+        # Predictions snapshotted under another model are rescored with this one.
+        if user_id in state.replayed_users or cached is None or cached.get("model_version") != MODEL_BUNDLE.version:
+            EVENT_VERSIONS[user_id] += 1
+            DIRTY_USERS.add(user_id)
+    logger.info(
+        "Restored %d users (%d WAL samples replayed) from %s in %.2fs",
+        len(state.buffers),
+        state.wal_samples,
+        persistence.directory,
+        state.seconds,
+    )
+    # Engines are rebuilt and users rescored by the first sweep, after the service is ready;
+    # until then reads serve the snapshotted predictions.
+
+
+# ---------------------------------------------------------------------------
+# Model reload
+# ---------------------------------------------------------------------------
+
+
+def _load_candidate(directory: Path | None) -> ModelBundle:
+    """Load and validate a bundle off the event loop; raises if it cannot serve."""
+    bundle = ModelBundle(artifact_settings(directory))
+    compile_plan(bundle.features)  # every feature must be computable by the streaming engines
+    bundle.warm_up()
+    return bundle
+
+
+def _install_worker_bundle(directory: Path | None, version: str) -> None:
+    """Process-pool initializer: load the bundle the parent just swapped in."""
+    global MODEL_BUNDLE
+    if MODEL_BUNDLE is not None and MODEL_BUNDLE.version == version:
+        return  # forked from a parent that already holds it
+    MODEL_BUNDLE = ModelBundle(artifact_settings(directory))
+
+
+async def _prebuild_engines(plan: FeaturePlan) -> dict[str, tuple[StreamingFeatureEngine, int]]:
+    """Replay every tracked user into an engine for ``plan``, a few users at a time, off the loop."""
+    engines: dict[str, tuple[StreamingFeatureEngine, int]] = {}
+    user_ids = list(EVENT_STORE)
+    step = max(1, settings.engine_rebuild_concurrency)
+    for start in range(0, len(user_ids), step):
+        chunk = [user_id for user_id in user_ids[start : start + step] if user_id in EVENT_STORE]
+        built = await asyncio.gather(*(_build_engine(user_id, plan) for user_id in chunk))
+        engines.update(zip(chunk, built))
+    return engines
+
+
+def _install_bundle(
+    bundle: ModelBundle,
+    directory: Path | None,
+    plan: FeaturePlan | None = None,
+    engines: Mapping[str, tuple[StreamingFeatureEngine, int]] | None = None,
+) -> None:
+    """Swap in ``bundle``; synchronous, so no request sees a half-installed model.
+
+    Scoring calls already submitted captured the previous bundle (or run on
+    the previous process pool) and finish on it; their results do not
+    overwrite predictions from the new model. When the feature list changes,
+    ``engines`` prebuilt for ``plan`` replace the old ones; users without
+    one are rebuilt off the loop before they are scored again.
+    """
+    global MODEL_BUNDLE, FEATURE_PLAN
+    previous = MODEL_BUNDLE
+    MODEL_BUNDLE = bundle
+    if previous is None or bundle.features != previous.features:
+        FEATURE_PLAN = plan or compile_plan(bundle.features)
+        FEATURE_ENGINES.clear()
+        for user_id, (engine, appended) in (engines or {}).items():
+            if _catch_up(user_id, engine, appended):
+                _install_engine(user_id, engine)
+    if EXECUTOR.mode == "process":
+        EXECUTOR.recycle(_install_worker_bundle, (directory, bundle.version))
+    DIRTY_USERS.update(user_id for user_id in FEATURE_CACHE if user_id in EVENT_STORE)
+
+
+def _model_version() -> str | None:
+    return MODEL_BUNDLE.version if MODEL_BUNDLE is not None else None
+
+
+def load_model(directory: Path | None = None) -> ModelBundle:
+    """Load and install the model synchronously and mark the service ready.
+
+    For scripts and tests that drive the app without its startup event.
+    """
+    _install_bundle(_load_candidate(directory), directory)
+    _mark_ready()
+    return MODEL_BUNDLE
+
+
+async def reload_model(directory: Path | None = None) -> dict[str, Any]:
+    """Load, validate and warm up new artifacts in the background, swap them in, then rescore."""
+    async with MODEL_RELOAD_LOCK:
+        candidate = await asyncio.to_thread(_load_candidate, directory)
+        previous_version = _model_version()
+        if candidate.version == previous_version:
+            return {"status": "unchanged", "model_version": previous_version}
+        plan = engines = None
+        if MODEL_BUNDLE is not None and candidate.features != MODEL_BUNDLE.features:
+            # The old engines keep serving until the new ones, replayed off the loop, are swapped in with the model.
+            plan = compile_plan(candidate.features)
+            engines = await _prebuild_engines(plan)
+        _install_bundle(candidate, directory, plan, engines)
+        logger.info("Swapped model %s -> %s", previous_version, candidate.version)
+        rescored = len(DIRTY_USERS)
+        # Batched like the periodic sweep; users left dirty on saturation are picked up by it.
+        await _refresh_all()
+        return {
+            "status": "reloaded",
+            "model_version": candidate.version,
+            "previous_version": previous_version,
+            "rescored_users": rescored - len(DIRTY_USERS),
+        }
+
+
+async def _model_watch_loop() -> None:
+    """Reload when the configured artifact files change and then stay unchanged for an interval."""
+    loaded = previous = _artifact_signature(settings)
+    while True:
+        await asyncio.sleep(settings.model_watch_interval_seconds)
+        current = _artifact_signature(settings)
+        # Waiting one quiet interval lets a deploy that copies files one by one land whole.
+        if current != loaded and current == previous:
+            loaded = current
+            try:
+                await reload_model()
+            except Exception:  # noqa: BLE001 - a bad deploy must not stop the watch
+                logger.exception("Model reload rejected; still serving %s", _model_version())
+        previous = current
+
+
+async def _snapshot_loop(persistence: EventPersistence) -> None:
+    while True:
+        await asyncio.sleep(settings.snapshot_interval_seconds)
+        await persistence.snapshot(EVENT_STORE, FEATURE_CACHE, CIRCADIAN_BASELINES)
 
 
 # ---------------------------------------------------------------------------
@@ -281,18 +855,79 @@ async def _refresh_loop() -> None:
 # ---------------------------------------------------------------------------
 
 
+async def _prepare_service() -> None:
+    """Load the model, seed baselines and restore persisted state, then mark the service ready."""
+    global refresh_task, model_watch_task
+    started = time.perf_counter()
+    try:
+        if MODEL_BUNDLE is None:
+            bundle = await asyncio.to_thread(_load_candidate, None)
+            if MODEL_BUNDLE is None:  # an admin reload may have won the race
+                _install_bundle(bundle, None)
+        SERVICE_STATE["model_load_seconds"] = round(time.perf_counter() - started, 3)
+        await _restore_service_state()
+    except Exception as exc:  # noqa: BLE001 - reported on /health; ingest stays unavailable
+        SERVICE_STATE.update(status="failed", error=f"{type(exc).__name__}: {exc}")
+        logger.exception("Startup failed")
+        return
+    refresh_task = asyncio.create_task(_refresh_loop())
+    if settings.model_watch_interval_seconds > 0:
+        model_watch_task = asyncio.create_task(_model_watch_loop())
+    _mark_ready(startup_seconds=round(time.perf_counter() - started, 3))
+    logger.info("Ready in %.2fs with model %s", SERVICE_STATE["startup_seconds"], _model_version())
+
+
+async def _restore_service_state() -> None:
+    global PERSISTENCE
+    if settings.circadian_seed_path is not None:
+        # Persisted baselines, restored below, are newer than the seed file.
+        seeded = await asyncio.to_thread(
+            seed_baselines,
+            settings.circadian_seed_path,
+            settings.circadian_resolution_minutes,
+            FEATURE_PLAN.circadian_signals,
+        )
+        CIRCADIAN_BASELINES.update(seeded)
+        logger.info("Seeded circadian baselines for %d users from %s", len(seeded), settings.circadian_seed_path)
+    if settings.persistence_dir is not None:
+        persistence = EventPersistence(
+            settings.persistence_dir,
+            settings.max_events_per_user,
+            fsync=settings.wal_fsync,
+            group_commit_ms=settings.wal_group_commit_ms,
+            fsync_interval_seconds=settings.wal_fsync_interval_seconds,
+        )
+        await _restore_persisted_state(persistence)
+        PERSISTENCE = persistence
+        persistence_tasks.append(asyncio.create_task(persistence.run_flusher()))
+        persistence_tasks.append(asyncio.create_task(_snapshot_loop(persistence)))
+
+
 @app.on_event("startup")
 async def startup_event() -> None:
-    global refresh_task
-    refresh_task = asyncio.create_task(_refresh_loop())
+    global startup_task, loop_lag_task
+    # Not awaited: uvicorn only starts listening once startup handlers return.
+    SERVICE_STATE.update(status="starting", error=None)
+    startup_task = asyncio.create_task(_prepare_service())
+    if LOOP_LAG.interval > 0:
+        loop_lag_task = asyncio.create_task(LOOP_LAG.run())
 
 
 @app.on_event("shutdown")
 async def shutdown_event() -> None:
-    if refresh_task:
-        refresh_task.cancel()
-        with contextlib.suppress(asyncio.CancelledError):
-            await refresh_task
+    global PERSISTENCE
+    for task in [startup_task, loop_lag_task, refresh_task, model_watch_task, *persistence_tasks]:
+        if task:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+    persistence_tasks.clear()
+    if PERSISTENCE is not None:
+        # A final snapshot makes the next startup a snapshot load with no replay.
+        await PERSISTENCE.snapshot(EVENT_STORE, FEATURE_CACHE, CIRCADIAN_BASELINES)
+        await PERSISTENCE.close()
+        PERSISTENCE = None
+    EXECUTOR.shutdown()
 
 
 # ---------------------------------------------------------------------------
@@ -301,23 +936,71 @@ async def shutdown_event() -> None:
 
 
 @app.post("/ingest", response_model=IngestResponse)
-async def ingest(payload: IngestPayload, _: None = Depends(require_api_key)) -> IngestResponse:
+async def ingest(
+    payload: IngestPayload, _: None = Depends(require_api_key), __: None = Depends(require_ready)
+) -> IngestResponse:
+    started = time.perf_counter()
     record = payload.model_dump()
-    async with store_lock:
+    async with _locked(payload.user_id):
+        _append_events(payload.user_id, [record])
         events = EVENT_STORE[payload.user_id]
-        events.append(record)
-        _update_prediction(payload.user_id)
+        if settings.score_on_ingest:
+            await _update_prediction(payload.user_id)
         cached = FEATURE_CACHE.get(payload.user_id)
+    if PERSISTENCE is not None:
+        await PERSISTENCE.commit()
+    INGEST_REQUESTS.inc()
+    INGESTED_EVENTS.inc()
+    INGEST_SECONDS.observe(time.perf_counter() - started)
     return IngestResponse(
         user_id=payload.user_id,
         stored_events=len(events),
         last_prediction=cached["probability"] if cached else None,
+        model_version=cached.get("model_version") if cached else None,
     )
 
 
+@app.post("/ingest/batch", response_model=BatchIngestResponse)
+async def ingest_batch(
+    payloads: List[IngestPayload], _: None = Depends(require_api_key), __: None = Depends(require_ready)
+) -> BatchIngestResponse:
+    started = time.perf_counter()
+    grouped: dict[str, list[dict[str, Any]]] = defaultdict(list)
+    for payload in payloads:
+        grouped[payload.user_id].append(payload.model_dump())
+
+    results: list[IngestResponse] = []
+    for user_id, records in grouped.items():
+        async with _locked(user_id):
+            _append_events(user_id, records)
+            if settings.score_on_ingest:
+                await _update_prediction(user_id)
+            cached = FEATURE_CACHE.get(user_id)
+        results.append(
+            IngestResponse(
+                user_id=user_id,
+                stored_events=len(EVENT_STORE[user_id]),
+                last_prediction=cached["probability"] if cached else None,
+                model_version=cached.get("model_version") if cached else None,
+            )
+        )
+    if PERSISTENCE is not None:
+        await PERSISTENCE.commit()
+    INGEST_REQUESTS.inc()
+    INGESTED_EVENTS.inc(len(payloads))
+    INGEST_SECONDS.observe(time.perf_counter() - started)
+    return BatchIngestResponse(accepted=len(payloads), users=results)
+
+
+def _cache_lookup(user_id: str) -> dict[str, Any] | None:
+    cached = FEATURE_CACHE.get(user_id)
+    (CACHE_HITS if cached else CACHE_MISSES).inc()
+    return cached
+
+
 @app.get("/predict/{user_id}", response_model=PredictionResponse)
 async def predict(user_id: str, _: None = Depends(require_api_key)) -> PredictionResponse:
-    cached = FEATURE_CACHE.get(user_id)
+    cached = _cache_lookup(user_id)
     if not cached:
         raise HTTPException(status_code=404, detail="No predictions available for user")
     return PredictionResponse(
@@ -325,12 +1008,13 @@ async def predict(user_id: str, _: None = Depends(require_api_key)) -> Predictio
         probability=cached["probability"],
         risk_level=cached["risk_level"],
         updated_at=cached["updated_at"],
+        model_version=cached.get("model_version"),
     )
 
 
 @app.get("/insights/{user_id}", response_model=InsightResponse)
 async def insights(user_id: str, _: None = Depends(require_api_key)) -> InsightResponse:
-    cached = FEATURE_CACHE.get(user_id)
+    cached = _cache_lookup(user_id)
     if not cached:
         raise HTTPException(status_code=404, detail="No insights available for user")
     return InsightResponse(
@@ -339,6 +1023,7 @@ async def insights(user_id: str, _: None = Depends(require_api_key)) -> InsightR
         probability=cached["probability"],
         insights=cached["insights"],
         generated_at=cached["updated_at"],
+        model_version=cached.get("model_version"),
     )
 
 
@@ -364,7 +1049,7 @@ def _coach_messages(risk_level: str) -> List[str]:
 
 @app.post("/coach/{user_id}", response_model=CoachResponse)
 async def coach(user_id: str, request: CoachRequest, _: None = Depends(require_api_key)) -> CoachResponse:
-    cached = FEATURE_CACHE.get(user_id)
+    cached = _cache_lookup(user_id)
     if not cached:
         raise HTTPException(status_code=404, detail="No predictions available for user")
     return CoachResponse(
@@ -372,18 +1057,86 @@ async def coach(user_id: str, request: CoachRequest, _: None = Depends(require_a
         risk_level=cached["risk_level"],
         probability=cached["probability"],
         recommendations=_coach_messages(cached["risk_level"]),
+        model_version=cached.get("model_version"),
     )
 
 
 @app.get("/health")
 async def healthcheck() -> dict[str, Any]:
+    store_bytes = sum(events.nbytes for events in EVENT_STORE.values())
+    baseline_bytes = sum(baseline.nbytes for baseline in CIRCADIAN_BASELINES.values())
+    bundle = MODEL_BUNDLE
+    rss = _rss_bytes()
+    baseline = SERVICE_STATE["rss_bytes_at_ready"]
     return {
         "status": "ok",
+        "ready": SERVICE_STATE["status"] == "ready",
+        "startup": dict(SERVICE_STATE),
         "users_tracked": len(EVENT_STORE),
-        "model_features": len(MODEL_BUNDLE.features),
+        "model_features": len(bundle.features) if bundle else 0,
+        "model_version": bundle.version if bundle else None,
+        "model_loaded_at": bundle.loaded_at.isoformat() if bundle else None,
+        "event_store_bytes": store_bytes,
+        "event_store_bytes_per_user": store_bytes // len(EVENT_STORE) if EVENT_STORE else 0,
+        "circadian_baseline_bytes": baseline_bytes,
+        # Seeded baselines can exist for users without samples yet, so this is an upper bound.
+        "state_bytes_per_user": (store_bytes + baseline_bytes) // len(EVENT_STORE) if EVENT_STORE else 0,
+        "dirty_users": len(DIRTY_USERS),
+        "rss_bytes": rss,
+        # Growth since the model finished loading, spread over tracked users.
+        "rss_bytes_per_user": max(0, rss - baseline) // len(EVENT_STORE) if EVENT_STORE and baseline else 0,
+        "event_loop_lag": LOOP_LAG.stats(),
+        "executor": EXECUTOR.stats(),
     }
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    """Prometheus text exposition of the hot-path metrics."""
+    if not METRICS.enabled:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Metrics are disabled")
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/ready")
+async def readiness(_: None = Depends(require_ready)) -> dict[str, Any]:
+    """Readiness probe: 503 until the model is loaded and persisted state restored."""
+    return {"status": "ready", "model_version": _model_version()}
+
+
+@app.post("/admin/model/reload")
+async def admin_reload_model(
+    request: ModelReloadRequest | None = None, _: None = Depends(require_admin_token)
+) -> dict[str, Any]:
+    try:
+        return await reload_model(request.directory if request else None)
+    except Exception as exc:  # noqa: BLE001 - any load or validation failure rejects the candidate
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Model rejected; still serving {_model_version()}: {exc}",
+        ) from exc
+
+
+@app.post("/admin/profile", response_class=PlainTextResponse)
+async def admin_profile(
+    seconds: float = Query(10.0, gt=0, le=120, description="How long to sample"),
+    interval_ms: float = Query(10.0, ge=1, le=1000, description="Sampling period"),
+    _: None = Depends(require_admin_token),
+) -> PlainTextResponse:
+    """Sample every thread of this worker and return collapsed stacks for a flamegraph."""
+    if PROFILE_LOCK.locked():
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A profile is already running")
+    async with PROFILE_LOCK:
+        sampler = StackSampler(seconds, interval_ms / 1000, {threading.get_ident(): "event-loop"})
+        if sampler.signals_available():
+            # Timer ticks interrupt the loop mid-request; it keeps serving while this waits.
+            with sampler.timer_signal():
+                await asyncio.sleep(seconds)
+        else:
+            await asyncio.to_thread(sampler.run)
+    return PlainTextResponse(sampler.collapsed(), headers={"X-Profile-Samples": str(sampler.samples)})
+
+
 # ---------------------------------------------------------------------------
 # Entry point
 # ---------------------------------------------------------------------------
@@ -0,0 +1,93 @@
+"""Scaler-free LightGBM scoring for the inference service.
+
+Loads the booster exported by ``models/train.py`` (thresholds already in raw
+feature units) and scores single rows through LightGBM's single-row C API
+with per-thread preallocated buffers, skipping the pandas/sklearn wrappers.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import threading
+import weakref
+from pathlib import Path
+
+import lightgbm as lgb
+import numpy as np
+
+# Private but stable since LightGBM 3.x; if they move we fall back to
+# Booster.predict, which is slower but equivalent.
+try:
+    from lightgbm.basic import _LIB, _c_str, _safe_call
+except ImportError:  # pragma: no cover - depends on the installed LightGBM
+    _LIB = None
+
+_C_API_DTYPE_FLOAT64 = 1
+_C_API_PREDICT_NORMAL = 0
+
+
+class _RowScorer:
+    """One thread's fast-predict handle plus its input/output buffers."""
+
+    __slots__ = ("row", "out", "out_len", "_handle", "__weakref__")
+
+    def __init__(self, booster: lgb.Booster, n_features: int) -> None:
+        self.row = np.zeros(n_features, dtype=np.float64)
+        self.out = np.zeros(1, dtype=np.float64)
+        self.out_len = ctypes.c_int64(0)
+        self._handle = ctypes.c_void_p()
+        _safe_call(
+            _LIB.LGBM_BoosterPredictForMatSingleRowFastInit(
+                booster._handle,
+                ctypes.c_int(_C_API_PREDICT_NORMAL),
+                ctypes.c_int(0),
+                ctypes.c_int(-1),
+                ctypes.c_int(_C_API_DTYPE_FLOAT64),
+                ctypes.c_int32(n_features),
+                _c_str("num_threads=1"),
+                ctypes.byref(self._handle),
+            )
+        )
+        weakref.finalize(self, _LIB.LGBM_FastConfigFree, self._handle)
+
+    def score(self) -> float:
+        _safe_call(
+            _LIB.LGBM_BoosterPredictForMatSingleRowFast(
+                self._handle,
+                self.row.ctypes.data_as(ctypes.c_void_p),
+                ctypes.byref(self.out_len),
+                self.out.ctypes.data_as(ctypes.POINTER(ctypes.c_double)),
+            )
+        )
+        return float(self.out[0])
+
+
+class RawBooster:
+    """Probability scorer over contiguous float64 rows in training feature order."""
+
+    def __init__(self, path: Path, features: list[str]) -> None:
+        self.booster = lgb.Booster(model_file=str(path))
+        if self.booster.num_feature() != len(features):
+            raise ValueError(
+                f"Booster at {path} expects {self.booster.num_feature()} features, metadata lists {len(features)}"
+            )
+        self.n_features = len(features)
+        self._local = threading.local()
+
+    def _scorer(self) -> _RowScorer | None:
+        if _LIB is None:
+            return None
+        scorer = getattr(self._local, "scorer", None)
+        if scorer is None:
+            scorer = self._local.scorer = _RowScorer(self.booster, self.n_features)
+        return scorer
+
+    def predict_row(self, vector: np.ndarray) -> float:
+        scorer = self._scorer()
+        if scorer is None:
+            return float(self.booster.predict(vector.reshape(1, -1))[0])
+        scorer.row[:] = vector
+        return scorer.score()
+
+    def predict_matrix(self, matrix: np.ndarray) -> np.ndarray:
+        return self.booster.predict(np.ascontiguousarray(matrix, dtype=np.float64))
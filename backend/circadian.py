@@ -0,0 +1,123 @@
+"""Compact 24-hour baselines for the ``*_circadian_delta`` features.
+
+Offline, ``add_circadian_deltas`` subtracts the value 1440 rows earlier. The
+service only retains ``max_events_per_user`` raw samples (720 by default), so
+it keeps a separate per-user array indexed by minute of day instead: one slot
+per ``resolution`` minutes holding the latest value seen in that slot today
+and the one from the day before.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Mapping, Sequence
+
+import numpy as np
+
+from scripts.feature_spec import CIRCADIAN_COLUMNS, MINUTES_PER_DAY  # type: ignore
+
+
+class CircadianBaseline:
+    """Per-slot ``(day, value, previous-day value)`` for each circadian signal.
+
+    With ``resolution=1`` and minute-level samples :meth:`lookup` returns
+    exactly the value 1440 minutes earlier, matching the offline shift;
+    coarser resolutions return the last value seen in the same slot
+    yesterday. Pushing the same sample twice is harmless, so replays of the
+    retained window do not disturb the baseline. Values default to float32
+    like ``UserEventBuffer``; pass ``dtype=np.float64`` for exact parity with
+    the offline builder.
+    """
+
+    __slots__ = ("resolution", "columns", "_days", "_current", "_previous")
+
+    def __init__(
+        self,
+        columns: Sequence[str] = CIRCADIAN_COLUMNS,
+        resolution: int = 1,
+        dtype: Any = np.float32,
+    ) -> None:
+        if resolution < 1 or MINUTES_PER_DAY % resolution:
+            raise ValueError(f"resolution must divide {MINUTES_PER_DAY} minutes")
+        slots = MINUTES_PER_DAY // resolution
+        self.resolution = resolution
+        self.columns = tuple(columns)
+        self._days = np.full(slots, -2, dtype=np.int32)
+        self._current = np.full((slots, len(self.columns)), np.nan, dtype=dtype)
+        self._previous = np.full((slots, len(self.columns)), np.nan, dtype=dtype)
+
+    @property
+    def nbytes(self) -> int:
+        return self._days.nbytes + self._current.nbytes + self._previous.nbytes
+
+    def _locate(self, epoch_minute: int) -> tuple[int, int]:
+        return (epoch_minute % MINUTES_PER_DAY) // self.resolution, epoch_minute // MINUTES_PER_DAY
+
+    def lookup(self, epoch_minute: int) -> list[float]:
+        """Values from the same slot one day before ``epoch_minute`` (NaN if unknown)."""
+        slot, day = self._locate(epoch_minute)
+        stored = self._days[slot]
+        if stored == day:
+            return self._previous[slot].tolist()
+        if stored == day - 1:
+            return self._current[slot].tolist()
+        return [float("nan")] * len(self.columns)
+
+    def update(self, epoch_minute: int, values: Sequence[float]) -> None:
+        slot, day = self._locate(epoch_minute)
+        stored = self._days[slot]
+        if stored == day:
+            self._current[slot] = values
+        elif stored < day:
+            self._previous[slot] = self._current[slot] if stored == day - 1 else np.nan
+            self._current[slot] = values
+            self._days[slot] = day
+        elif stored == day + 1:
+            # Late sample from yesterday.
+            self._previous[slot] = values
+
+    def export(self) -> dict[str, Any]:
+        return {
+            "resolution": self.resolution,
+            "columns": self.columns,
+            "days": self._days.copy(),
+            "current": self._current.copy(),
+            "previous": self._previous.copy(),
+        }
+
+    def copy(self) -> "CircadianBaseline":
+        return CircadianBaseline.restore(self.export())
+
+    @classmethod
+    def restore(cls, state: Mapping[str, Any]) -> "CircadianBaseline":
+        baseline = cls(state["columns"], state["resolution"], state["current"].dtype)
+        baseline._days[:] = state["days"]
+        baseline._current[:] = state["current"]
+        baseline._previous[:] = state["previous"]
+        return baseline
+
+
+def seed_baselines(
+    path: Path, resolution: int = 1, columns: Sequence[str] = CIRCADIAN_COLUMNS
+) -> dict[str, CircadianBaseline]:
+    """Build baselines from the last two days of each user in a raw parquet/csv file."""
+    import pandas as pd
+
+    columns = tuple(columns)
+    read_columns = ["user_id", "timestamp", *columns]
+    if path.suffix.lower() == ".csv":
+        df = pd.read_csv(path, usecols=read_columns)
+    else:
+        df = pd.read_parquet(path, columns=read_columns)
+    df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True)
+    cutoff = df.groupby("user_id")["timestamp"].transform("max") - pd.Timedelta(days=2)
+    df = df.loc[df["timestamp"] > cutoff].sort_values(["user_id", "timestamp"])
+
+    minutes = df["timestamp"].astype("int64").to_numpy() // 60_000_000_000
+    values = df[list(columns)].to_numpy(dtype=float)
+    baselines: dict[str, CircadianBaseline] = {}
+    for user_id, idx in df.groupby("user_id", sort=False).indices.items():
+        baseline = baselines[user_id] = CircadianBaseline(columns, resolution)
+        for row in idx:
+            baseline.update(int(minutes[row]), values[row])
+    return baselines
@@ -0,0 +1,157 @@
+"""Bounded executor for CPU-bound work triggered from the event loop."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+T = TypeVar("T")
+
+EXECUTOR_MODES = ("thread", "process", "inline")
+
+
+class ExecutorSaturated(RuntimeError):
+    """Raised when more than ``max_pending`` jobs are already queued or running."""
+
+
+def _timed_call(fn: Callable[..., T], *args: Any) -> tuple[T, float]:
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+class _Timing:
+    __slots__ = ("count", "total", "max")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def as_dict(self) -> dict[str, float]:
+        return {
+            "avg_ms": 1000 * self.total / self.count if self.count else 0.0,
+            "max_ms": 1000 * self.max,
+        }
+
+
+class LoopLagMonitor:
+    """Measures how late ``asyncio.sleep`` wakes up, i.e. how long the loop is blocked.
+
+    Anything that runs on the loop without yielding (feature updates,
+    inline scoring, large JSON bodies) shows up here as lag.
+    """
+
+    def __init__(self, interval: float, window: int = 600) -> None:
+        self.interval = interval
+        self.lag = _Timing()
+        self.recent: deque[float] = deque(maxlen=window)
+
+    async def run(self) -> None:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - started - self.interval)
+            self.lag.observe(lag)
+            self.recent.append(lag)
+
+    def stats(self) -> dict[str, Any]:
+        recent = sorted(self.recent)
+        return {
+            "samples": self.lag.count,
+            **self.lag.as_dict(),
+            "recent_p99_ms": 1000 * recent[int(0.99 * (len(recent) - 1))] if recent else 0.0,
+        }
+
+
+class InferenceExecutor:
+    """Runs callables in a thread or process pool with bounded queue depth.
+
+    ``inline`` mode calls them directly on the loop, which is what the
+    service did before and is handy for debugging. Process mode needs
+    module-level callables and picklable arguments.
+    """
+
+    def __init__(self, mode: str, workers: int, max_pending: int) -> None:
+        if mode not in EXECUTOR_MODES:
+            raise ValueError(f"Unsupported executor mode {mode!r}; expected one of {EXECUTOR_MODES}")
+        self.mode = mode
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self._pool: Executor | None = None
+        self._initializer: Callable[..., Any] | None = None
+        self._initargs: tuple[Any, ...] = ()
+        self._pending = 0
+        self.rejected = 0
+        self.queue_wait = _Timing()
+        self.compute = _Timing()
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _executor(self) -> Executor | None:
+        if self._pool is None and self.mode == "thread":
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inference")
+        elif self._pool is None and self.mode == "process":
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=self._initializer, initargs=self._initargs
+            )
+        return self._pool
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        if self._pending >= self.max_pending:
+            self.rejected += 1
+            raise ExecutorSaturated(f"{self._pending} jobs already pending")
+        self._pending += 1
+        submitted = time.perf_counter()
+        try:
+            pool = self._executor()
+            if pool is None:
+                result, compute_seconds = _timed_call(fn, *args)
+            else:
+                loop = asyncio.get_running_loop()
+                result, compute_seconds = await loop.run_in_executor(pool, _timed_call, fn, *args)
+        finally:
+            self._pending -= 1
+        # Queue wait includes pool hand-off (and pickling in process mode).
+        self.queue_wait.observe(max(0.0, time.perf_counter() - submitted - compute_seconds))
+        self.compute.observe(compute_seconds)
+        return result
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "pending": self._pending,
+            "max_pending": self.max_pending,
+            "rejected": self.rejected,
+            "completed": self.compute.count,
+            "queue_wait": self.queue_wait.as_dict(),
+            "compute": self.compute.as_dict(),
+        }
+
+    def recycle(self, initializer: Callable[..., Any] | None = None, initargs: tuple[Any, ...] = ()) -> None:
+        """Send later ``run`` calls to a fresh pool; jobs already submitted finish on the old one.
+
+        ``initializer`` runs in each new worker process (process mode only),
+        e.g. to load state that changed since the old workers started.
+        """
+        self._initializer, self._initargs = initializer, initargs
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+    def shutdown(self) -> None:
+        """Stop the pool; a later ``run`` starts a fresh one."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,176 @@
+"""Minimal in-process metrics with Prometheus text exposition.
+
+Counters, gauges and fixed-bucket histograms cheap enough for the ingest
+hot path: an observation is a ``bisect`` and three additions, no locks.
+Call sites update metrics from the event-loop thread only (worker timings
+are returned with results and observed on the loop), so plain attribute
+updates are safe. A disabled registry hands out a shared no-op metric
+and renders nothing.
+"""
+
+from __future__ import annotations
+
+import time
+from bisect import bisect_left
+from typing import Callable
+
+# Seconds; spans lock waits and single-row scoring (tens of microseconds) up to slow sweeps.
+DEFAULT_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+
+def _format_labels(labels: dict[str, str], extra: str = "") -> str:
+    parts = [f'{key}="{value}"' for key, value in labels.items()]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class _Timer:
+    __slots__ = ("_histogram", "_started")
+
+    def __init__(self, histogram: "Histogram") -> None:
+        self._histogram = histogram
+
+    def __enter__(self) -> "_Timer":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self._histogram.observe(time.perf_counter() - self._started)
+
+
+class Counter:
+    __slots__ = ("labels", "value")
+    kind = "counter"
+
+    def __init__(self, labels: dict[str, str]) -> None:
+        self.labels = labels
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def samples(self, name: str) -> list[str]:
+        return [f"{name}{_format_labels(self.labels)} {_format_value(self.value)}"]
+
+
+class Gauge:
+    """A value that is ``set`` by the caller or read from ``fn`` at scrape time."""
+
+    __slots__ = ("labels", "value", "fn")
+    kind = "gauge"
+
+    def __init__(self, labels: dict[str, str], fn: Callable[[], float] | None = None) -> None:
+        self.labels = labels
+        self.value = 0.0
+        self.fn = fn
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def samples(self, name: str) -> list[str]:
+        value = self.fn() if self.fn is not None else self.value
+        return [f"{name}{_format_labels(self.labels)} {_format_value(value)}"]
+
+
+class Histogram:
+    __slots__ = ("labels", "buckets", "counts", "sum", "count")
+    kind = "histogram"
+
+    def __init__(self, labels: dict[str, str], buckets: tuple[float, ...]) -> None:
+        self.labels = labels
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def time(self) -> _Timer:
+        return _Timer(self)
+
+    def samples(self, name: str) -> list[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip((*self.buckets, float("inf")), self.counts):
+            cumulative += count
+            le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+            lines.append(f"{name}_bucket{_format_labels(self.labels, le)} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(self.labels)} {_format_value(self.sum)}")
+        lines.append(f"{name}_count{_format_labels(self.labels)} {self.count}")
+        return lines
+
+
+class _NullMetric:
+    """Stands in for every metric type when metrics are disabled."""
+
+    __slots__ = ()
+
+    def inc(self, amount: float = 1.0) -> None:
+        pass
+
+    def set(self, value: float) -> None:
+        pass
+
+    def observe(self, value: float) -> None:
+        pass
+
+    def time(self) -> "_NullMetric":
+        return self
+
+    def __enter__(self) -> "_NullMetric":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        pass
+
+
+NULL_METRIC = _NullMetric()
+
+
+class MetricsRegistry:
+    """Named metric families, each with one child per label set."""
+
+    def __init__(self, enabled: bool = True, prefix: str = "") -> None:
+        self.enabled = enabled
+        self.prefix = prefix
+        self._families: dict[str, tuple[str, str, list]] = {}
+
+    def _register(self, name: str, help_text: str, metric):
+        if not self.enabled:
+            return NULL_METRIC
+        kind, _, children = self._families.setdefault(self.prefix + name, (metric.kind, help_text, []))
+        if kind != metric.kind:
+            raise ValueError(f"Metric {name!r} already registered as a {kind}")
+        children.append(metric)
+        return metric
+
+    def counter(self, name: str, help_text: str, **labels: str) -> Counter:
+        return self._register(name, help_text, Counter(labels))
+
+    def gauge(self, name: str, help_text: str, fn: Callable[[], float] | None = None, **labels: str) -> Gauge:
+        return self._register(name, help_text, Gauge(labels, fn))
+
+    def histogram(
+        self, name: str, help_text: str, buckets: tuple[float, ...] = DEFAULT_BUCKETS, **labels: str
+    ) -> Histogram:
+        return self._register(name, help_text, Histogram(labels, buckets))
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for name, (kind, help_text, children) in self._families.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for child in children:
+                lines.extend(child.samples(name))
+        return "\n".join(lines) + "\n" if lines else ""
@@ -0,0 +1,285 @@
+"""Write-ahead log and snapshots for the in-memory event store.
+
+Layout of ``persistence_dir``:
+
+* ``wal-<n>.log``: append-only segments of CRC-framed binary samples. Each
+  sample carries its per-user sequence number (``UserEventBuffer.appended``).
+* ``snapshot-<n>.pkl``: per-user buffer copies, circadian baselines and
+  cached predictions, taken
+  right after rotating to segment ``n``. Recovery loads the newest snapshot
+  and replays segments ``>= n``, skipping samples whose sequence number the
+  snapshot already covers, so snapshots never have to stop ingest.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import pickle
+import struct
+import time
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, BinaryIO, Iterator, Mapping
+
+from backend.circadian import CircadianBaseline
+from backend.store import UserEventBuffer, encode_weather, to_epoch_minutes
+from backend.streaming import SIGNAL_COLUMNS
+
+FSYNC_POLICIES = ("always", "interval", "never")
+
+_FRAME = struct.Struct("<II")  # body length, crc32(body)
+_USER_LEN = struct.Struct("<H")
+_SAMPLE = struct.Struct(f"<qqB{len(SIGNAL_COLUMNS)}f")  # seq, epoch minute, weather code, signals
+_SNAPSHOT_CHUNK_USERS = 256
+
+
+def encode_sample(user_id: str, seq: int, record: Mapping[str, Any]) -> bytes:
+    user = user_id.encode("utf-8")
+    body = (
+        _USER_LEN.pack(len(user))
+        + user
+        + _SAMPLE.pack(
+            seq,
+            to_epoch_minutes(record["timestamp"]),
+            encode_weather(record.get("weather_condition", "clear")),
+            *(record[column] for column in SIGNAL_COLUMNS),
+        )
+    )
+    return _FRAME.pack(len(body), zlib.crc32(body)) + body
+
+
+def iter_segment(path: Path) -> Iterator[tuple[str, int, int, int, tuple[float, ...]]]:
+    """Decode ``(user_id, seq, epoch_minute, weather_code, signals)`` up to the first torn frame."""
+    data = path.read_bytes()
+    offset = 0
+    while offset + _FRAME.size <= len(data):
+        length, crc = _FRAME.unpack_from(data, offset)
+        body = data[offset + _FRAME.size : offset + _FRAME.size + length]
+        if len(body) != length or zlib.crc32(body) != crc:
+            return
+        (user_len,) = _USER_LEN.unpack_from(body, 0)
+        user_id = body[_USER_LEN.size : _USER_LEN.size + user_len].decode("utf-8")
+        seq, minute, weather, *signals = _SAMPLE.unpack_from(body, _USER_LEN.size + user_len)
+        yield user_id, seq, minute, weather, tuple(signals)
+        offset += _FRAME.size + length
+
+
+def _segment_number(path: Path) -> int:
+    return int(path.stem.split("-", 1)[1])
+
+
+def _fsync_directory(directory: Path) -> None:
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+@dataclass
+class RecoveredState:
+    buffers: dict[str, UserEventBuffer] = field(default_factory=dict)
+    cache: dict[str, dict[str, Any]] = field(default_factory=dict)
+    baselines: dict[str, CircadianBaseline] = field(default_factory=dict)
+    replayed_users: set[str] = field(default_factory=set)
+    wal_samples: int = 0
+    seconds: float = 0.0
+
+
+class EventPersistence:
+    """Durable log of ingested samples with group commit and periodic snapshots.
+
+    ``fsync`` controls when ``commit()`` returns: ``always`` waits until the
+    caller's samples are fsynced (one fsync per group of concurrent ingests);
+    ``interval`` and ``never`` return immediately and let the flusher write
+    each group, fsyncing every ``fsync_interval_seconds`` or leaving it to
+    the OS respectively.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        capacity: int,
+        fsync: str = "interval",
+        group_commit_ms: float = 2.0,
+        fsync_interval_seconds: float = 1.0,
+    ) -> None:
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unsupported fsync policy {fsync!r}; expected one of {FSYNC_POLICIES}")
+        self.directory = directory
+        self.capacity = capacity
+        self.fsync = fsync
+        self.group_commit_seconds = group_commit_ms / 1000
+        self.fsync_interval_seconds = fsync_interval_seconds
+        self._segment: BinaryIO | None = None
+        self._segment_number = 0
+        self._pending = bytearray()
+        self._waiters: list[asyncio.Future[None]] = []
+        self._wakeup = asyncio.Event()
+        self._io_lock = asyncio.Lock()
+        self._last_fsync = time.monotonic()
+        self._unsynced = False
+
+    # -- recovery ------------------------------------------------------------
+
+    def recover(self) -> RecoveredState:
+        """Load the newest snapshot, replay newer WAL segments and open a fresh segment."""
+        started = time.perf_counter()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        state = RecoveredState()
+
+        snapshots = sorted(self.directory.glob("snapshot-*.pkl"), key=_segment_number)
+        base = 0
+        if snapshots:
+            base = _segment_number(snapshots[-1])
+            with snapshots[-1].open("rb") as fh:
+                while True:
+                    try:
+                        chunk = pickle.load(fh)
+                    except EOFError:
+                        break
+                    for user_id, buffer_state, cached, baseline_state in chunk:
+                        state.buffers[user_id] = UserEventBuffer.restore(self.capacity, buffer_state)
+                        if cached is not None:
+                            state.cache[user_id] = cached
+                        if baseline_state is not None:
+                            state.baselines[user_id] = CircadianBaseline.restore(baseline_state)
+
+        segments = sorted(self.directory.glob("wal-*.log"), key=_segment_number)
+        for segment in segments:
+            if _segment_number(segment) < base:
+                continue
+            for user_id, seq, minute, weather, signals in iter_segment(segment):
+                buffer = state.buffers.get(user_id)
+                if buffer is None:
+                    buffer = state.buffers[user_id] = UserEventBuffer(self.capacity)
+                if seq <= buffer.appended:
+                    continue
+                buffer.append_row(minute, signals, weather)
+                buffer.appended = seq
+                state.replayed_users.add(user_id)
+                state.wal_samples += 1
+
+        last = _segment_number(segments[-1]) if segments else base - 1
+        self._open_segment(max(last + 1, base))
+        state.seconds = time.perf_counter() - started
+        return state
+
+    def _open_segment(self, number: int) -> None:
+        self._segment_number = number
+        self._segment = (self.directory / f"wal-{number:08d}.log").open("ab")
+        _fsync_directory(self.directory)
+
+    # -- logging -------------------------------------------------------------
+
+    def log(self, user_id: str, records: list[Mapping[str, Any]], first_seq: int) -> None:
+        for offset, record in enumerate(records):
+            self._pending += encode_sample(user_id, first_seq + offset, record)
+        self._wakeup.set()
+
+    async def commit(self) -> None:
+        """Return once samples logged so far are as durable as the policy promises."""
+        if self.fsync != "always":
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._wakeup.set()
+        await waiter
+
+    def _write(self, data: bytes, fsync: bool) -> None:
+        assert self._segment is not None
+        if data:
+            self._segment.write(data)
+            self._segment.flush()
+            self._unsynced = True
+        if fsync and self._unsynced:
+            os.fsync(self._segment.fileno())
+            self._unsynced = False
+            self._last_fsync = time.monotonic()
+
+    async def flush(self, fsync: bool) -> None:
+        async with self._io_lock:
+            data, self._pending = bytes(self._pending), bytearray()
+            waiters, self._waiters = self._waiters, []
+            try:
+                await asyncio.to_thread(self._write, data, fsync)
+            except Exception as exc:  # surface disk errors to the ingests waiting on them
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_exception(exc)
+                raise
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_result(None)
+
+    async def run_flusher(self) -> None:
+        while True:
+            with_timeout = self.fsync_interval_seconds if self.fsync == "interval" else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=with_timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self.group_commit_seconds > 0:
+                # Let concurrent ingests join this group before writing it.
+                await asyncio.sleep(self.group_commit_seconds)
+            due = time.monotonic() - self._last_fsync >= self.fsync_interval_seconds
+            await self.flush(fsync=self.fsync == "always" or (self.fsync == "interval" and due))
+
+    # -- snapshots -----------------------------------------------------------
+
+    async def snapshot(
+        self,
+        buffers: Mapping[str, UserEventBuffer],
+        cache: Mapping[str, dict[str, Any]],
+        baselines: Mapping[str, CircadianBaseline] | None = None,
+    ) -> Path:
+        async with self._io_lock:
+            data, self._pending = bytes(self._pending), bytearray()
+            await asyncio.to_thread(self._write, data, True)
+            waiters, self._waiters = self._waiters, []
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_result(None)
+            assert self._segment is not None
+            self._segment.close()
+            self._open_segment(self._segment_number + 1)
+            base = self._segment_number
+
+        path = self.directory / f"snapshot-{base:08d}.pkl"
+        tmp = path.with_suffix(".pkl.tmp")
+        user_ids = list(buffers)
+        baselines = baselines or {}
+        with tmp.open("wb") as fh:
+            for start in range(0, len(user_ids), _SNAPSHOT_CHUNK_USERS):
+                chunk = [
+                    (
+                        user_id,
+                        buffers[user_id].export(),
+                        cache.get(user_id),
+                        baselines[user_id].export() if user_id in baselines else None,
+                    )
+                    for user_id in user_ids[start : start + _SNAPSHOT_CHUNK_USERS]
+                    if user_id in buffers
+                ]
+                await asyncio.to_thread(pickle.dump, chunk, fh, pickle.HIGHEST_PROTOCOL)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, path)
+        _fsync_directory(self.directory)
+
+        for old in self.directory.glob("snapshot-*.pkl"):
+            if _segment_number(old) < base:
+                old.unlink()
+        for old in self.directory.glob("wal-*.log"):
+            if _segment_number(old) < base:
+                old.unlink()
+        return path
+
+    async def close(self) -> None:
+        await self.flush(fsync=True)
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
@@ -0,0 +1,112 @@
+"""Statistical stack sampler for profiling a live worker.
+
+Every ``interval`` seconds the sampler reads each thread's current frame
+with ``sys._current_frames()`` and counts identical stacks; the cost is one
+short GIL hold per tick, so it is safe to run against production traffic
+for short windows. Output is the collapsed-stack format read by
+``flamegraph.pl`` and speedscope: one ``root;...;leaf count`` line per stack,
+rooted at the thread name.
+
+Ticks come from a ``SIGALRM`` interval timer when the caller is the main
+thread (uvicorn runs its event loop there). The handler interrupts the loop
+wherever it is. A sampling thread only gets the GIL when the loop releases
+it, which is mostly inside ``select``, so busy loop code would never show
+up. Elsewhere ``run()`` falls back to sampling from the calling thread.
+Only this process is visible; with ``EXECUTOR_MODE=process`` the scoring
+workers are separate processes.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from types import FrameType
+from typing import Iterator
+
+
+def _frame_label(frame: FrameType) -> str:
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}:{frame.f_code.co_qualname}"
+
+
+def _collapse(frame: FrameType | None) -> list[str]:
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return labels
+
+
+class StackSampler:
+    """Sample all threads every ``interval`` seconds for ``duration`` seconds."""
+
+    def __init__(self, duration: float, interval: float = 0.01, thread_labels: dict[int, str] | None = None) -> None:
+        self.duration = duration
+        self.interval = interval
+        # Overrides for thread names, e.g. to mark the event-loop thread.
+        self.thread_labels = thread_labels or {}
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+
+    def _thread_name(self, ident: int) -> str:
+        # sample_once runs inside a SIGALRM handler, so it must not take locks:
+        # the handler runs on the main thread and may have interrupted it while
+        # it holds that lock (threading.enumerate() takes the non-reentrant
+        # _active_limbo_lock, which Thread.start() holds when asyncio.to_thread
+        # starts a worker), and the loop would deadlock. A plain dict lookup in
+        # threading._active takes no lock.
+        if ident in self.thread_labels:
+            return self.thread_labels[ident]
+        thread = threading._active.get(ident)  # type: ignore[attr-defined]
+        return thread.name if thread is not None else f"thread-{ident}"
+
+    def sample_once(self, frame: FrameType | None = None) -> None:
+        """Record one stack per thread.
+
+        ``frame`` is the calling thread's interrupted frame when called from
+        a signal handler; without it the calling thread is left out.
+        """
+        own = threading.get_ident()
+        frames = sys._current_frames()
+        if frame is None:
+            frames.pop(own, None)
+        else:
+            frames[own] = frame
+        for ident, current in frames.items():
+            thread = self._thread_name(ident).replace(";", "_").replace(" ", "_")
+            self.stacks[";".join([thread, *_collapse(current)])] += 1
+        self.samples += 1
+
+    @staticmethod
+    def signals_available() -> bool:
+        return hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread()
+
+    @contextlib.contextmanager
+    def timer_signal(self) -> Iterator["StackSampler"]:
+        """Sample on ``SIGALRM`` while the block runs; main thread only."""
+        previous = signal.signal(signal.SIGALRM, lambda signum, frame: self.sample_once(frame))
+        signal.setitimer(signal.ITIMER_REAL, self.interval, self.interval)
+        try:
+            yield self
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+
+    def run(self) -> "StackSampler":
+        """Block the calling thread while sampling from it; call it off the event loop."""
+        deadline = time.perf_counter() + self.duration
+        next_tick = time.perf_counter()
+        while next_tick < deadline:
+            self.sample_once()
+            next_tick += self.interval
+            time.sleep(max(0.0, next_tick - time.perf_counter()))
+        return self
+
+    def collapsed(self) -> str:
+        lines = [f"{stack} {count}" for stack, count in self.stacks.most_common()]
+        return "\n".join(lines) + "\n" if lines else ""
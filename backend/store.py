@@ -0,0 +1,156 @@
+"""Compact per-user event storage for the inference service.
+
+Each user's recent samples live in preallocated NumPy columns instead of a
+deque of payload dicts: float32 signals, int64 epoch-minute timestamps and a
+uint8 weather code.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any, Iterable, Iterator, Mapping
+
+import numpy as np
+
+from backend.streaming import SIGNAL_COLUMNS
+
+WEATHER_CONDITIONS: tuple[str, ...] = ("clear", "cloudy", "sunny", "storm", "other")
+WEATHER_CODES: dict[str, int] = {name: code for code, name in enumerate(WEATHER_CONDITIONS)}
+SIGNAL_INDEX: dict[str, int] = {name: idx for idx, name in enumerate(SIGNAL_COLUMNS)}
+
+
+def encode_weather(condition: str) -> int:
+    return WEATHER_CODES.get(condition, WEATHER_CODES["other"])
+
+
+def to_epoch_minutes(timestamp: datetime) -> int:
+    return int(timestamp.timestamp()) // 60
+
+
+def from_epoch_minutes(minutes: int) -> datetime:
+    return datetime.fromtimestamp(int(minutes) * 60, tz=timezone.utc)
+
+
+class UserEventBuffer:
+    """Fixed-capacity columnar ring buffer of one user's samples.
+
+    Columns are allocated with some slack past ``capacity`` and written
+    linearly; when the slack runs out the newest ``capacity - 1`` rows are
+    moved back to the front. The retained window is therefore always one
+    contiguous slice, so the accessors below return views, not copies.
+    """
+
+    __slots__ = ("capacity", "appended", "_start", "_end", "_timestamps", "_signals", "_weather")
+
+    def __init__(self, capacity: int) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        # Total samples ever appended; doubles as a per-user sequence number.
+        self.appended = 0
+        size = capacity + max(1, capacity // 4)
+        self._start = 0
+        self._end = 0
+        self._timestamps = np.zeros(size, dtype=np.int64)
+        self._signals = np.zeros((len(SIGNAL_COLUMNS), size), dtype=np.float32)
+        self._weather = np.zeros(size, dtype=np.uint8)
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    @property
+    def nbytes(self) -> int:
+        return self._timestamps.nbytes + self._signals.nbytes + self._weather.nbytes
+
+    def append(self, record: Mapping[str, Any]) -> None:
+        self.append_row(
+            to_epoch_minutes(record["timestamp"]),
+            [record[column] for column in SIGNAL_COLUMNS],
+            encode_weather(record.get("weather_condition", "clear")),
+        )
+
+    def append_row(self, epoch_minute: int, signals: Any, weather_code: int) -> None:
+        """Append already-encoded values (signals in ``SIGNAL_COLUMNS`` order)."""
+        if self._end == len(self._timestamps):
+            self._compact()
+        end = self._end
+        self._timestamps[end] = epoch_minute
+        self._signals[:, end] = signals
+        self._weather[end] = weather_code
+        self._end = end + 1
+        self.appended += 1
+        if self._end - self._start > self.capacity:
+            self._start += 1
+
+    def _compact(self) -> None:
+        keep = self.capacity - 1
+        src = slice(self._end - keep, self._end)
+        self._timestamps[:keep] = self._timestamps[src]
+        self._signals[:, :keep] = self._signals[:, src]
+        self._weather[:keep] = self._weather[src]
+        self._start, self._end = 0, keep
+
+    def export(self) -> dict[str, Any]:
+        """Copy of the retained window, for snapshots."""
+        return {
+            "appended": self.appended,
+            "timestamps": self.timestamps().copy(),
+            "signals": self.signals().copy(),
+            "weather": self.weather_codes().copy(),
+        }
+
+    def copy(self) -> "UserEventBuffer":
+        return UserEventBuffer.restore(self.capacity, self.export())
+
+    @classmethod
+    def restore(cls, capacity: int, state: Mapping[str, Any]) -> "UserEventBuffer":
+        buffer = cls(capacity)
+        total = len(state["timestamps"])
+        keep = min(capacity, total)
+        buffer._timestamps[:keep] = state["timestamps"][total - keep :]
+        buffer._signals[:, :keep] = state["signals"][:, total - keep :]
+        buffer._weather[:keep] = state["weather"][total - keep :]
+        buffer._end = keep
+        buffer.appended = int(state["appended"])
+        return buffer
+
+    # -- zero-copy views, oldest sample first --------------------------------
+
+    def timestamps(self) -> np.ndarray:
+        return self._timestamps[self._start : self._end]
+
+    def signal(self, column: str) -> np.ndarray:
+        return self._signals[SIGNAL_INDEX[column], self._start : self._end]
+
+    def signals(self) -> np.ndarray:
+        """``(len(SIGNAL_COLUMNS), len(self))`` view in ``SIGNAL_COLUMNS`` order."""
+        return self._signals[:, self._start : self._end]
+
+    def weather_codes(self) -> np.ndarray:
+        return self._weather[self._start : self._end]
+
+    # -- record access for replays -------------------------------------------
+
+    def records(self) -> Iterator[dict[str, Any]]:
+        """Decoded samples in timestamp order (arrival order among ties)."""
+        return self._decode(np.argsort(self.timestamps(), kind="stable"))
+
+    def records_since(self, appended: int) -> list[dict[str, Any]] | None:
+        """Samples appended after the buffer had seen ``appended``, in arrival order.
+
+        ``None`` if some of them have already been evicted.
+        """
+        count = self.appended - appended
+        if count > len(self):
+            return None
+        return list(self._decode(range(len(self) - count, len(self))))
+
+    def _decode(self, order: Iterable[int]) -> Iterator[dict[str, Any]]:
+        timestamps = self.timestamps()
+        signals = self.signals()
+        weather = self.weather_codes()
+        for idx in order:
+            record: dict[str, Any] = dict(zip(SIGNAL_COLUMNS, signals[:, idx].tolist()))
+            record["timestamp"] = from_epoch_minutes(timestamps[idx])
+            record["weather_condition"] = WEATHER_CONDITIONS[weather[idx]]
+            yield record
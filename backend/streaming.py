@@ -0,0 +1,274 @@
+"""Online feature engine for the inference service.
+
+Mirrors ``scripts.build_features.build_feature_table`` one sample at a time so
+``/ingest`` can refresh the latest feature vector without rebuilding a pandas
+frame over the user's whole window. Both run from a
+``scripts.feature_spec.FeaturePlan``, so only the features a model uses (and
+their dependencies) are maintained.
+"""
+
+from __future__ import annotations
+
+import math
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Callable, Iterable, Mapping
+
+from backend.circadian import CircadianBaseline
+from scripts.feature_spec import (  # type: ignore
+    COMPARISONS,
+    MINUTES_PER_DAY,
+    SIGNAL_COLUMNS,
+    FeaturePlan,
+    compile_plan,
+    rolling_min_periods,
+)
+
+NAN = float("nan")
+
+
+# ---------------------------------------------------------------------------
+# Rolling aggregators
+# ---------------------------------------------------------------------------
+
+
+class _RollingSum:
+    """Kahan-compensated running sum, matching pandas' add/remove updates."""
+
+    __slots__ = ("window", "min_periods", "average", "nobs", "total", "comp_add", "comp_remove")
+
+    def __init__(self, window: int, average: bool) -> None:
+        self.window = window
+        self.min_periods = rolling_min_periods(window)
+        self.average = average
+        self.nobs = 0
+        self.total = 0.0
+        self.comp_add = 0.0
+        self.comp_remove = 0.0
+
+    def push(self, value: float, evicted: float | None) -> None:
+        self.nobs += 1
+        y = value - self.comp_add
+        t = self.total + y
+        self.comp_add = t - self.total - y
+        self.total = t
+        if evicted is not None:
+            self.nobs -= 1
+            y = -evicted - self.comp_remove
+            t = self.total + y
+            self.comp_remove = t - self.total - y
+            self.total = t
+
+    def value(self) -> float:
+        if self.nobs < self.min_periods:
+            return NAN
+        return self.total / self.nobs if self.average else self.total
+
+
+class _RollingStd:
+    """Welford running variance with removal of the evicted observation."""
+
+    __slots__ = ("window", "min_periods", "nobs", "mean", "m2")
+
+    def __init__(self, window: int) -> None:
+        self.window = window
+        self.min_periods = rolling_min_periods(window)
+        self.nobs = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def push(self, value: float, evicted: float | None) -> None:
+        self.nobs += 1
+        delta = value - self.mean
+        self.mean += delta / self.nobs
+        self.m2 += delta * (value - self.mean)
+        if evicted is not None:
+            self.nobs -= 1
+            delta = evicted - self.mean
+            self.mean -= delta / self.nobs
+            self.m2 -= delta * (evicted - self.mean)
+
+    def value(self) -> float:
+        if self.nobs < self.min_periods or self.nobs < 2:
+            return NAN
+        return math.sqrt(max(self.m2, 0.0) / (self.nobs - 1))
+
+
+class _RollingMax:
+    """Monotonic deque holding the window maximum at its head."""
+
+    __slots__ = ("window", "min_periods", "nobs", "seen", "candidates")
+
+    def __init__(self, window: int) -> None:
+        self.window = window
+        self.min_periods = rolling_min_periods(window)
+        self.nobs = 0
+        self.seen = 0
+        self.candidates: deque[tuple[int, float]] = deque()
+
+    def push(self, value: float, evicted: float | None) -> None:
+        candidates = self.candidates
+        while candidates and candidates[-1][1] <= value:
+            candidates.pop()
+        candidates.append((self.seen, value))
+        self.seen += 1
+        if candidates[0][0] <= self.seen - 1 - self.window:
+            candidates.popleft()
+        self.nobs = min(self.seen, self.window)
+
+    def value(self) -> float:
+        if self.nobs < self.min_periods:
+            return NAN
+        return self.candidates[0][1]
+
+
+def _make_aggregator(agg: str, window: int) -> _RollingSum | _RollingStd | _RollingMax:
+    if agg == "mean":
+        return _RollingSum(window, average=True)
+    if agg == "sum":
+        return _RollingSum(window, average=False)
+    if agg == "std":
+        return _RollingStd(window)
+    if agg == "max":
+        return _RollingMax(window)
+    raise ValueError(f"Unsupported agg {agg}")
+
+
+class _SignalHistory:
+    """Fixed-size ring of the most recent values of one signal."""
+
+    __slots__ = ("values", "count")
+
+    def __init__(self, capacity: int) -> None:
+        self.values = [0.0] * capacity
+        self.count = 0
+
+    def lagged(self, lag: int) -> float | None:
+        """Value ``lag`` samples before the next push, if it exists."""
+        if self.count < lag:
+            return None
+        return self.values[(self.count - lag) % len(self.values)]
+
+    def push(self, value: float) -> None:
+        self.values[self.count % len(self.values)] = value
+        self.count += 1
+
+
+# ---------------------------------------------------------------------------
+# Engine
+# ---------------------------------------------------------------------------
+
+
+_TIME_FEATURES: dict[str, Callable[[datetime, Mapping[str, float]], float]] = {
+    "minute_of_day": lambda ts, latest: float(ts.hour * 60 + ts.minute),
+    "sin_circadian": lambda ts, latest: math.sin(2 * math.pi * latest["minute_of_day"] / MINUTES_PER_DAY),
+    "cos_circadian": lambda ts, latest: math.cos(2 * math.pi * latest["minute_of_day"] / MINUTES_PER_DAY),
+    "is_weekend": lambda ts, latest: float(ts.weekday() >= 5),
+    "is_work_hours": lambda ts, latest: float(9 <= ts.hour <= 18),
+}
+
+
+def _as_utc(timestamp: datetime) -> datetime:
+    if timestamp.tzinfo is None:
+        return timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.astimezone(timezone.utc)
+
+
+class StreamingFeatureEngine:
+    """Per-user running state that yields the latest feature row in O(1).
+
+    Samples must be pushed in timestamp order; callers replay the retained
+    window with :meth:`from_records` when a late sample arrives.
+    """
+
+    __slots__ = (
+        "_time",
+        "_flags",
+        "_counts",
+        "_rolling",
+        "_histories",
+        "_circadian_steps",
+        "circadian",
+        "_count",
+        "_latest",
+        "last_timestamp",
+    )
+
+    def __init__(self, plan: FeaturePlan | None = None, circadian: CircadianBaseline | None = None) -> None:
+        plan = plan or compile_plan()
+        self._time = tuple((step.name, _TIME_FEATURES[step.name]) for step in plan.of_kind("time"))
+        self._flags = tuple(
+            (step.name, step.source, COMPARISONS[step.comparison], step.threshold) for step in plan.of_kind("flag")
+        )
+        self._counts = tuple((step.name, step.depends) for step in plan.of_kind("count"))
+
+        self._rolling: list[tuple[str, str, _RollingSum | _RollingStd | _RollingMax]] = []
+        capacities: dict[str, int] = {}
+        for step in plan.of_kind("rolling"):
+            self._rolling.append((step.name, step.source, _make_aggregator(step.agg, step.window)))
+            capacities[step.source] = max(capacities.get(step.source, 0), step.window)
+        self._histories = {column: _SignalHistory(capacity) for column, capacity in capacities.items()}
+
+        # The baseline outlives the engine: rebuilding from the retained window
+        # must not forget the previous day, which is longer than that window.
+        circadian_steps = plan.of_kind("circadian")
+        if circadian is None and circadian_steps:
+            circadian = CircadianBaseline(plan.circadian_signals)
+        self.circadian = circadian
+        columns = circadian.columns if circadian is not None else ()
+        missing = [step.source for step in circadian_steps if step.source not in columns]
+        if missing:
+            raise ValueError(f"Circadian baseline does not track {missing}")
+        self._circadian_steps = tuple((step.name, step.source, columns.index(step.source)) for step in circadian_steps)
+
+        self._count = 0
+        self._latest: dict[str, float] = {}
+        self.last_timestamp: datetime | None = None
+
+    @classmethod
+    def from_records(
+        cls,
+        records: Iterable[Mapping[str, Any]],
+        circadian: CircadianBaseline | None = None,
+        plan: FeaturePlan | None = None,
+    ) -> "StreamingFeatureEngine":
+        engine = cls(plan, circadian)
+        for record in records:
+            engine.push(record)
+        return engine
+
+    def push(self, record: Mapping[str, Any]) -> None:
+        timestamp = _as_utc(record["timestamp"])
+        latest = {column: float(record[column]) for column in SIGNAL_COLUMNS}
+
+        for name, compute in self._time:
+            latest[name] = compute(timestamp, latest)
+        for name, source, compare, threshold in self._flags:
+            value = latest[source] if source in latest else record.get(source)
+            latest[name] = float(compare(value, threshold))
+        for name, flags in self._counts:
+            latest[name] = sum(latest[flag] for flag in flags)
+
+        for name, column, aggregator in self._rolling:
+            aggregator.push(latest[column], self._histories[column].lagged(aggregator.window))
+            latest[name] = aggregator.value()
+        for column, history in self._histories.items():
+            history.push(latest[column])
+
+        if self.circadian is not None:
+            epoch_minute = int(timestamp.timestamp()) // 60
+            previous = self.circadian.lookup(epoch_minute)
+            for name, column, index in self._circadian_steps:
+                latest[name] = latest[column] - previous[index]
+            self.circadian.update(epoch_minute, [latest[column] for column in self.circadian.columns])
+
+        self._count += 1
+        self._latest = latest
+        self.last_timestamp = timestamp
+
+    def features(self) -> dict[str, float]:
+        """Feature values for the most recent sample; NaN where history is short."""
+        return dict(self._latest)
+
+    def __len__(self) -> int:
+        return self._count
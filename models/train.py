@@ -1,20 +1,90 @@
-"""Baseline gradient boosting trainer for Head Start MVP."""
+"""Baseline gradient boosting trainer for Head Start MVP.
+
+The default path fits ``StandardScaler`` + ``LGBMClassifier`` on pandas frames
+and pickles both. ``--lean`` trains the same model straight from a float32
+matrix with ``lightgbm.train`` and only writes the booster text the service
+loads, which keeps peak memory close to the size of the feature columns.
+``--cv-folds``/``--search`` score parameter candidates on user-grouped folds
+in a process pool and write a ranked ``cv_results.csv`` next to the metrics.
+``--incremental`` continues boosting the current model on new partitions only
+and reports the evaluation delta against it. Every path benchmarks the
+booster the service will load (size, load time, single-row and batched
+latency) and ``--max-latency-us`` trims trees until single-row p99 fits.
+"""
 
 from __future__ import annotations
 
 import argparse
+import hashlib
+import itertools
 import json
+import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
 
 import joblib
+import lightgbm as lgb
 import numpy as np
 import pandas as pd
-from lightgbm import LGBMClassifier
+import pyarrow as pa
+import pyarrow.dataset as ds
+from lightgbm import Booster, LGBMClassifier
 from sklearn.metrics import f1_score, precision_score, recall_score, roc_auc_score
+from sklearn.model_selection import GroupKFold
 from sklearn.preprocessing import StandardScaler
 
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from backend.booster import RawBooster  # noqa: E402
+
 LABEL_COL = "target_migraine_next6h"
+EXPORT_TOLERANCE = 1e-9
+NON_FEATURE_COLS = {
+    LABEL_COL,
+    "timestamp",
+    "user_id",
+    "migraine_label",
+    "weather_condition",
+    "minutes_until_migraine",
+}
+# LightGBM parameters equivalent to the LGBMClassifier in ``train_model``.
+LGBM_PARAMS = {
+    "objective": "binary",
+    "learning_rate": 0.05,
+    "num_leaves": 31,
+    "max_depth": -1,
+    "bagging_fraction": 0.8,
+    "feature_fraction": 0.8,
+    "lambda_l1": 0.1,
+    "lambda_l2": 0.2,
+    "verbosity": -1,
+}
+NUM_BOOST_ROUND = 400
+LATENCY_SAMPLE_ROWS = 2000
+LATENCY_BATCH_SIZE = 64
+LATENCY_PASSES = 3
+# Default space for --search; override with --search-space FILE (JSON of name -> values).
+SEARCH_SPACE: dict[str, list] = {
+    "num_leaves": [15, 31, 63],
+    "learning_rate": [0.03, 0.05, 0.1],
+    "min_data_in_leaf": [20, 50],
+    "feature_fraction": [0.6, 0.8, 1.0],
+    "lambda_l2": [0.0, 0.2, 1.0],
+}
+
+
+def utc_timestamp(value: str | pd.Timestamp) -> pd.Timestamp:
+    """Timestamp in UTC, as feature timestamps are stored; naive values are taken to be UTC."""
+    stamp = pd.Timestamp(value)
+    return stamp.tz_localize("UTC") if stamp.tzinfo is None else stamp.tz_convert("UTC")
 
 
 def parse_args() -> argparse.Namespace:
@@ -22,12 +92,34 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--features", type=Path, default=Path("data/features.parquet"), help="Feature parquet path")
     parser.add_argument("--model", type=Path, default=Path("models/model.pkl"), help="Destination for trained model")
     parser.add_argument("--scaler", type=Path, default=Path("models/scaler.pkl"), help="Destination for fitted scaler")
+    parser.add_argument("--booster", type=Path, default=Path("models/model.txt"), help="Destination for the scaler-free LightGBM booster")
     parser.add_argument("--feature-metadata", type=Path, default=Path("models/feature_metadata.json"), help="Where to write feature list and metadata")
     parser.add_argument("--metrics", type=Path, default=Path("models/metrics.json"), help="Where to log evaluation metrics")
     parser.add_argument("--test-ratio", type=float, default=0.2, help="Fraction of users held out for evaluation")
     parser.add_argument("--seed", type=int, default=42, help="Random seed for reproducibility")
     parser.add_argument("--threshold", type=float, default=0.5, help="Classification threshold for metrics")
-    return parser.parse_args()
+    parser.add_argument("--export-only", action="store_true", help="Only export the booster from existing model/scaler pickles")
+    parser.add_argument("--lean", action="store_true", help="Train from a float32 matrix with lightgbm.train; writes only the booster, metadata and metrics")
+    parser.add_argument("--dataset-cache", type=Path, default=None, help="With --lean, save/reuse the binned LightGBM dataset at this path")
+    parser.add_argument("--cv-folds", type=int, default=0, help="Cross-validate with GroupKFold by user_id instead of one split")
+    parser.add_argument("--search", choices=["grid", "random"], default=None, help="Search the parameter space with --cv-folds (default 5 folds)")
+    parser.add_argument("--search-space", type=Path, default=None, help="JSON mapping LightGBM parameter -> candidate values")
+    parser.add_argument("--search-trials", type=int, default=20, help="Candidates sampled by --search random")
+    parser.add_argument("--max-rounds", type=int, default=1000, help="Boosting round cap for CV; early stopping picks the count")
+    parser.add_argument("--early-stopping-rounds", type=int, default=50, help="Stop a fold when validation logloss stalls this long")
+    parser.add_argument("--workers", type=int, default=1, help="Processes training folds in parallel; LightGBM threads are split between them")
+    parser.add_argument("--refit", action="store_true", help="After CV, train the lean model with the best parameters and write it")
+    parser.add_argument("--init-model", type=Path, default=None, help="Warm-start from this model (.txt booster, or .pkl with --scaler) on --features")
+    parser.add_argument("--incremental", action="store_true", help="Warm-start from the current --booster; same as --init-model <booster>")
+    parser.add_argument("--since", type=utc_timestamp, default=None, help="With --init-model, only train on feature rows at or after this timestamp (UTC unless it has an offset)")
+    parser.add_argument("--incremental-rounds", type=int, default=100, help="Boosting rounds added on top of the initial model")
+    parser.add_argument("--max-latency-us", type=float, default=None, help="Single-row p99 budget for the booster; trees are trimmed to fit, or training fails")
+    args = parser.parse_args()
+    if args.search and not args.cv_folds:
+        args.cv_folds = 5
+    if args.incremental and args.init_model is None:
+        args.init_model = args.booster
+    return args
 
 
 def load_features(path: Path) -> pd.DataFrame:
@@ -43,16 +135,8 @@ def prepare_data(df: pd.DataFrame) -> tuple[pd.DataFrame, pd.Series, pd.Series,
     if len(bool_cols) > 0:
         work[bool_cols] = work[bool_cols].astype(int)
 
-    exclude = {
-        LABEL_COL,
-        "timestamp",
-        "user_id",
-        "migraine_label",
-        "weather_condition",
-        "minutes_until_migraine",
-    }
     numeric_cols = work.select_dtypes(include=[np.number]).columns
-    feature_cols = [col for col in numeric_cols if col not in exclude]
+    feature_cols = [col for col in numeric_cols if col not in NON_FEATURE_COLS]
 
     data = work[feature_cols].replace([np.inf, -np.inf], np.nan).dropna()
     valid_idx = data.index
@@ -62,13 +146,17 @@ def prepare_data(df: pd.DataFrame) -> tuple[pd.DataFrame, pd.Series, pd.Series,
     return data, targets, user_series, feature_cols
 
 
-def split_by_user(data: pd.DataFrame, targets: pd.Series, user_series: pd.Series, test_ratio: float, seed: int):
-    unique_users = user_series.drop_duplicates().to_numpy()
+def choose_user_split(unique_users: np.ndarray, test_ratio: float, seed: int) -> tuple[set, set]:
+    """Shuffle users (in first-appearance order) and hold out the last ``test_ratio`` of them."""
+    unique_users = unique_users.copy()
     rng = np.random.default_rng(seed)
     rng.shuffle(unique_users)
     split_idx = max(1, int(len(unique_users) * (1 - test_ratio)))
-    train_users = set(unique_users[:split_idx])
-    test_users = set(unique_users[split_idx:])
+    return set(unique_users[:split_idx]), set(unique_users[split_idx:])
+
+
+def split_by_user(data: pd.DataFrame, targets: pd.Series, user_series: pd.Series, test_ratio: float, seed: int):
+    train_users, test_users = choose_user_split(user_series.drop_duplicates().to_numpy(), test_ratio, seed)
 
     train_mask = user_series.isin(train_users)
     test_mask = user_series.isin(test_users)
@@ -105,8 +193,12 @@ def train_model(X_train: pd.DataFrame, y_train: pd.Series, seed: int) -> tuple[L
 def evaluate_model(clf: LGBMClassifier, scaler: StandardScaler, X_test: pd.DataFrame, y_test: pd.Series, threshold: float) -> tuple[dict, np.ndarray, np.ndarray]:
     X_test_scaled = scaler.transform(X_test)
     probas = clf.predict_proba(X_test_scaled)[:, 1]
-    preds = (probas >= threshold).astype(int)
+    metrics, preds = score_predictions(y_test, probas, threshold)
+    return metrics, probas, preds
+
 
+def score_predictions(y_test, probas: np.ndarray, threshold: float) -> tuple[dict, np.ndarray]:
+    preds = (probas >= threshold).astype(int)
     metrics = {
         "precision": float(precision_score(y_test, preds, zero_division=0)),
         "recall": float(recall_score(y_test, preds, zero_division=0)),
@@ -114,8 +206,7 @@ def evaluate_model(clf: LGBMClassifier, scaler: StandardScaler, X_test: pd.DataF
         "roc_auc": float(roc_auc_score(y_test, probas)) if len(np.unique(y_test)) > 1 else None,
         "threshold": threshold,
     }
-
-    return metrics, probas, preds
+    return metrics, preds
 
 
 def compute_lead_time(df_subset: pd.DataFrame, preds: np.ndarray) -> float | None:
@@ -125,24 +216,668 @@ def compute_lead_time(df_subset: pd.DataFrame, preds: np.ndarray) -> float | Non
     return None
 
 
+def fold_scaler_into_booster(clf: LGBMClassifier, scaler: StandardScaler, feature_cols: list[str]) -> Booster:
+    """Rewrite split thresholds into raw feature units so no scaler is needed.
+
+    A split ``(x - mean) / scale <= t`` is the same as ``x <= t * scale + mean``
+    because ``scale`` is positive, so the trees are unchanged otherwise.
+    """
+    mean, scale = scaler.mean_, scaler.scale_
+    lines: list[str] = []
+    split_feature: list[int] = []
+    for line in clf.booster_.model_to_string().splitlines():
+        key, _, value = line.partition("=")
+        if key == "tree_sizes":
+            # Byte offsets of the original trees; LightGBM re-parses without them.
+            continue
+        if key == "feature_names":
+            line = "feature_names=" + " ".join(feature_cols)
+        elif key == "feature_infos":
+            infos = []
+            for idx, info in enumerate(value.split()):
+                if info.startswith("["):
+                    low, high = (float(v) for v in info[1:-1].split(":"))
+                    info = f"[{low * scale[idx] + mean[idx]!r}:{high * scale[idx] + mean[idx]!r}]"
+                infos.append(info)
+            line = "feature_infos=" + " ".join(infos)
+        elif key == "split_feature":
+            split_feature = [int(v) for v in value.split()]
+        elif key == "threshold":
+            thresholds = [float(v) for v in value.split()]
+            line = "threshold=" + " ".join(
+                repr(t * scale[f] + mean[f]) for t, f in zip(thresholds, split_feature)
+            )
+        lines.append(line)
+    return Booster(model_str="\n".join(lines) + "\n")
+
+
+def export_booster(
+    clf: LGBMClassifier, scaler: StandardScaler, feature_cols: list[str], X_check: pd.DataFrame, path: Path
+) -> float:
+    """Write the scaler-free booster after checking it against the scaler+model pair."""
+    booster = fold_scaler_into_booster(clf, scaler, feature_cols)
+    raw = X_check[feature_cols].to_numpy(dtype=float)
+    expected = clf.predict_proba(scaler.transform(raw))[:, 1]
+    max_diff = float(np.max(np.abs(booster.predict(raw) - expected))) if len(raw) else 0.0
+    if max_diff > EXPORT_TOLERANCE:
+        raise ValueError(f"Exported booster deviates from scaler+model by {max_diff:.3g}")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    booster.save_model(str(path))
+    return max_diff
+
+
 def save_artifacts(args: argparse.Namespace, clf: LGBMClassifier, scaler: StandardScaler, feature_cols: list[str], metrics: dict) -> None:
     for path in [args.model, args.scaler, args.feature_metadata, args.metrics]:
         path.parent.mkdir(parents=True, exist_ok=True)
     joblib.dump(clf, args.model)
     joblib.dump(scaler, args.scaler)
+    write_metadata(args.feature_metadata, feature_cols)
+    args.metrics.write_text(json.dumps(metrics, indent=2))
+
+
+def resource_usage(started: float) -> dict:
+    return {
+        "train_wall_seconds": round(time.perf_counter() - started, 3),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
 
+
+# ---------------------------------------------------------------------------
+# Serving cost
+# ---------------------------------------------------------------------------
+
+
+def _percentiles_us(passes: list[list[float]]) -> dict:
+    """p50/p99 in microseconds, the best over passes so scheduler noise does not decide a trim."""
+    values = [np.percentile(np.asarray(timings) * 1e6, [50, 99]) for timings in passes]
+    p50, p99 = np.min(values, axis=0)
+    return {"p50": round(float(p50), 2), "p99": round(float(p99), 2)}
+
+
+def serving_cost(booster: Booster, rows: np.ndarray, num_iteration: int | None = None) -> dict:
+    """What ``booster`` costs the service: file size, load time and predict latency.
+
+    Scores through ``RawBooster``, the same single-row C API path and batched
+    path ``ModelBundle`` uses, on up to ``LATENCY_SAMPLE_ROWS`` real rows.
+    """
+    text = booster.model_to_string(num_iteration=num_iteration)
+    features = booster.feature_name()
+    rows = np.ascontiguousarray(rows[:LATENCY_SAMPLE_ROWS], dtype=np.float64)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "model.txt"
+        path.write_text(text)
+        loads = []
+        for _ in range(3):
+            started = time.perf_counter()
+            scorer = RawBooster(path, features)
+            loads.append(time.perf_counter() - started)
+
+    scorer.predict_row(rows[0])  # build the thread's fast-predict handle outside the timings
+    single: list[list[float]] = []
+    batched: list[list[float]] = []
+    for _ in range(LATENCY_PASSES):
+        single.append([])
+        for row in rows:
+            started = time.perf_counter()
+            scorer.predict_row(row)
+            single[-1].append(time.perf_counter() - started)
+        batched.append([])
+        for start in range(0, max(1, len(rows) - LATENCY_BATCH_SIZE + 1), LATENCY_BATCH_SIZE):
+            batch = rows[start : start + LATENCY_BATCH_SIZE]
+            started = time.perf_counter()
+            scorer.predict_matrix(batch)
+            batched[-1].append((time.perf_counter() - started) / len(batch))
+    return {
+        "trees": scorer.booster.num_trees(),
+        "model_bytes": len(text.encode()),
+        "load_ms": round(min(loads) * 1e3, 2),
+        "single_row_us": _percentiles_us(single),
+        "batch_size": LATENCY_BATCH_SIZE,
+        "batch_per_row_us": _percentiles_us(batched),
+    }
+
+
+def apply_latency_budget(booster: Booster, rows: np.ndarray, max_latency_us: float | None) -> tuple[Booster, dict]:
+    """Measure ``booster`` and, over budget, keep the most leading trees whose p99 fits.
+
+    Single-row latency grows with the number of trees walked, so the cut is
+    found by bisection on the iteration count. Raises when even one
+    iteration is over budget.
+    """
+    cost = serving_cost(booster, rows)
+    cost["max_latency_us"] = max_latency_us
+    if max_latency_us is None or cost["single_row_us"]["p99"] <= max_latency_us:
+        return booster, cost
+
+    total = booster.current_iteration()
+    low, high = 0, total  # ``low`` iterations fit (0 = none found yet), ``high`` do not
+    fitted = None
+    while high - low > 1:
+        mid = (low + high) // 2
+        trial = serving_cost(booster, rows, num_iteration=mid)
+        if trial["single_row_us"]["p99"] <= max_latency_us:
+            low, fitted = mid, trial
+        else:
+            high = mid
+    if fitted is None and low == 0:
+        trial = serving_cost(booster, rows, num_iteration=1)
+        if trial["single_row_us"]["p99"] > max_latency_us:
+            raise ValueError(
+                f"Model exceeds the {max_latency_us} us budget even with one tree "
+                f"(p99 {trial['single_row_us']['p99']} us); reduce depth or features and retrain"
+            )
+        low, fitted = 1, trial
+    trimmed = Booster(model_str=booster.model_to_string(num_iteration=low))
+    fitted.update({"max_latency_us": max_latency_us, "trimmed_from_trees": cost["trees"], "untrimmed": cost})
+    return trimmed, fitted
+
+
+# ---------------------------------------------------------------------------
+# Lean path
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class LeanData:
+    """Valid rows of the feature table as compact NumPy arrays."""
+
+    matrix: np.ndarray  # (rows, features) float32, C order
+    labels: np.ndarray  # float32 0/1
+    users: np.ndarray
+    minutes_until: np.ndarray
+    feature_cols: list[str]
+
+
+def feature_columns_from_schema(schema: pa.Schema) -> list[str]:
+    """Same selection as ``prepare_data`` (numeric and bool columns), without loading rows."""
+    return [
+        field.name
+        for field in schema
+        if field.name not in NON_FEATURE_COLS
+        and (pa.types.is_integer(field.type) or pa.types.is_floating(field.type) or pa.types.is_boolean(field.type))
+    ]
+
+
+def load_lean(path: Path, feature_cols: list[str] | None = None, since: pd.Timestamp | None = None) -> LeanData:
+    """Read only the needed columns and build the float32 matrix once.
+
+    Columns are converted one at a time, so the only full-size allocation is
+    the matrix itself. Rows with a missing or infinite feature are dropped,
+    as in ``prepare_data``. ``path`` may be a file or a directory of
+    partitions; ``since`` keeps rows with ``timestamp >= since`` (naive
+    values are UTC).
+    """
+    dataset = ds.dataset(path, format="parquet")
+    if LABEL_COL not in dataset.schema.names:
+        raise ValueError(f"Missing required label column '{LABEL_COL}'. Run scripts/build_features.py first.")
+    feature_cols = feature_cols or feature_columns_from_schema(dataset.schema)
+    row_filter = ds.field("timestamp") >= utc_timestamp(since) if since is not None else None
+    table = dataset.to_table(columns=[*feature_cols, LABEL_COL, "user_id", "minutes_until_migraine"], filter=row_filter)
+
+    def column(name: str) -> np.ndarray:
+        return table.column(name).to_numpy(zero_copy_only=False)
+
+    valid = np.ones(table.num_rows, dtype=bool)
+    for name in feature_cols:
+        valid &= np.isfinite(column(name).astype(np.float32))
+    matrix = np.empty((int(valid.sum()), len(feature_cols)), dtype=np.float32)
+    for idx, name in enumerate(feature_cols):
+        matrix[:, idx] = column(name)[valid]
+    return LeanData(
+        matrix=matrix,
+        labels=column(LABEL_COL)[valid].astype(np.float32),
+        users=column("user_id")[valid],
+        minutes_until=column("minutes_until_migraine")[valid].astype(np.float32),
+        feature_cols=feature_cols,
+    )
+
+
+def balanced_weights(labels: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """``class_weight="balanced"`` computed on ``rows``, as sklearn does for the training set."""
+    weights = np.ones(len(labels), dtype=np.float32)
+    train_labels = labels[rows]
+    for value in (0.0, 1.0):
+        count = int((train_labels == value).sum())
+        if count:
+            weights[labels == value] = len(train_labels) / (2 * count)
+    return weights
+
+
+class _RowSubset(lgb.Sequence):
+    """``matrix[rows]`` read in batches, so neither binning nor warm-start scoring copies the whole subset."""
+
+    batch_size = 65_536
+
+    def __init__(self, matrix: np.ndarray, rows: np.ndarray) -> None:
+        self.matrix = matrix
+        self.rows = rows
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __getitem__(self, idx):
+        # LightGBM samples sequences for bin boundaries as float64.
+        return self.matrix[self.rows[idx]].astype(np.float64)
+
+
+def raw_scores(booster: Booster, matrix: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """``booster``'s raw (log-odds) scores for ``matrix[rows]``, one :class:`_RowSubset` batch at a time."""
+    subset = _RowSubset(matrix, rows)
+    scores = np.empty(len(rows), dtype=np.float64)
+    for start in range(0, len(rows), subset.batch_size):
+        batch = subset[start : start + subset.batch_size]
+        scores[start : start + len(batch)] = booster.predict(batch, raw_score=True)
+    return scores
+
+
+def append_trees(base: Booster, update: Booster) -> Booster:
+    """``base``'s trees followed by ``update``'s, as ``lgb.train(init_model=base)`` merges them.
+
+    ``update`` must have been trained with ``base``'s raw scores as
+    ``init_score``, so the summed trees give the continued model. Header and
+    parameters come from ``update``; ``tree_sizes`` is dropped because the
+    byte offsets no longer match, and LightGBM re-parses without it.
+    """
+
+    def sections(booster: Booster) -> tuple[list[str], list[str], list[str]]:
+        lines = booster.model_to_string().splitlines()
+        end = lines.index("end of trees")
+        first = next((idx for idx, line in enumerate(lines) if line.startswith("Tree=")), end)
+        return lines[:first], lines[first:end], lines[end:]
+
+    _, base_trees, _ = sections(base)
+    header, trees, tail = sections(update)
+    offset = base.num_trees()
+    trees = [f"Tree={int(line[5:]) + offset}" if line.startswith("Tree=") else line for line in trees]
+    header = [line for line in header if not line.startswith("tree_sizes=")]
+    return Booster(model_str="\n".join([*header, *base_trees, *trees, *tail]) + "\n")
+
+
+def lean_source(args: argparse.Namespace, since: pd.Timestamp | None = None) -> dict:
+    """Identity of the feature input and split options, for the ``--dataset-cache`` signature."""
+    path = Path(args.features)
+    files = sorted(path.rglob("*.parquet")) if path.is_dir() else [path]
+    return {
+        "features": str(path.resolve()),
+        "files": [[str(file), file.stat().st_size, file.stat().st_mtime_ns] for file in files],
+        "since": since.isoformat() if since is not None else None,
+        "seed": args.seed,
+        "test_ratio": args.test_ratio,
+    }
+
+
+def build_lean_dataset(
+    data: LeanData,
+    train_rows: np.ndarray,
+    cache: Path | None,
+    source: dict | None = None,
+    init_score: np.ndarray | None = None,
+) -> lgb.Dataset:
+    """Binned training set; reuses ``cache`` when it was built from the same input and rows.
+
+    The signature covers ``source`` (see :func:`lean_source`) plus hashes of
+    the labels and of ``train_rows``, so a rebuilt feature file or another
+    split never reuses a stale binary. The training rows are passed as a
+    view when contiguous and as a batched :class:`_RowSubset` otherwise.
+    ``init_score`` (a warm start's raw scores) is set after the cache is
+    written, so the cached binary never carries another model's scores.
+    """
+    signature = {
+        "source": source,
+        "rows": int(len(data.labels)),
+        "train_rows": int(len(train_rows)),
+        "train_rows_sha256": hashlib.sha256(np.ascontiguousarray(train_rows).tobytes()).hexdigest(),
+        "labels_sha256": hashlib.sha256(data.labels.tobytes()).hexdigest(),
+        "features": data.feature_cols,
+    }
+    signature_path = cache.with_name(cache.name + ".json") if cache is not None else None
+    if cache is not None and cache.exists() and signature_path.exists():
+        if json.loads(signature_path.read_text()) == signature:
+            return lgb.Dataset(str(cache), params={"verbosity": -1}).set_init_score(init_score)
+
+    if len(train_rows) and train_rows[-1] - train_rows[0] + 1 == len(train_rows):
+        matrix = data.matrix[train_rows[0] : train_rows[-1] + 1]
+    else:
+        matrix = _RowSubset(data.matrix, train_rows)
+    train = lgb.Dataset(
+        matrix,
+        label=data.labels[train_rows],
+        weight=balanced_weights(data.labels, train_rows)[train_rows],
+        feature_name=data.feature_cols,
+        params={"verbosity": -1},
+        free_raw_data=True,
+    )
+    if cache is not None:
+        cache.parent.mkdir(parents=True, exist_ok=True)
+        train.construct().save_binary(str(cache))
+        signature_path.write_text(json.dumps(signature))
+    return train.set_init_score(init_score)
+
+
+def train_lean(args: argparse.Namespace, params: dict | None = None, num_boost_round: int = NUM_BOOST_ROUND) -> dict:
+    started = time.perf_counter()
+    data = load_lean(args.features)
+    train_users, test_users = choose_user_split(pd.unique(data.users), args.test_ratio, args.seed)
+    train_rows = np.flatnonzero(np.isin(data.users, list(train_users)))
+    test_rows = np.flatnonzero(np.isin(data.users, list(test_users)))
+    if len(test_rows) == 0:
+        raise ValueError("No samples in test split. Reduce test_ratio or ensure sufficient users.")
+
+    train_set = build_lean_dataset(data, train_rows, args.dataset_cache, lean_source(args))
+    booster = lgb.train({**LGBM_PARAMS, **(params or {}), "seed": args.seed}, train_set, num_boost_round=num_boost_round)
+    booster, serving = apply_latency_budget(booster, data.matrix[test_rows], args.max_latency_us)
+
+    probas = booster.predict(data.matrix[test_rows])
+    metrics, preds = score_predictions(data.labels[test_rows].astype(int), probas, args.threshold)
+    lead = data.minutes_until[test_rows][(preds == 1) & ~np.isnan(data.minutes_until[test_rows])]
+    metrics.update(
+        {
+            "avg_lead_time_minutes": float(lead.mean()) if len(lead) else None,
+            "train_users": len(train_users),
+            "test_users": len(test_users),
+            "train_samples": int(len(train_rows)),
+            "test_samples": int(len(test_rows)),
+            "trainer": "lean",
+            "serving": serving,
+        }
+    )
+
+    args.booster.parent.mkdir(parents=True, exist_ok=True)
+    booster.save_model(str(args.booster))
+    write_metadata(args.feature_metadata, data.feature_cols)
+    metrics.update(resource_usage(started))
+    args.metrics.parent.mkdir(parents=True, exist_ok=True)
+    args.metrics.write_text(json.dumps(metrics, indent=2))
+    return metrics
+
+
+# ---------------------------------------------------------------------------
+# Cross-validation and parameter search
+# ---------------------------------------------------------------------------
+
+_CV_DATA: LeanData | None = None
+
+
+def _init_cv_worker(path: Path) -> None:
+    """Load the feature matrix once per worker process instead of once per fold."""
+    global _CV_DATA
+    _CV_DATA = load_lean(path)
+
+
+def candidate_params(search: str | None, space: dict[str, list], trials: int, seed: int) -> list[dict]:
+    if search is None:
+        return [{}]
+    grid = [dict(zip(space, values)) for values in itertools.product(*space.values())]
+    if search == "grid" or trials >= len(grid):
+        return grid
+    rng = np.random.default_rng(seed)
+    return [grid[idx] for idx in sorted(rng.choice(len(grid), size=trials, replace=False))]
+
+
+def run_fold(
+    candidate: int,
+    fold: int,
+    params: dict,
+    train_rows: np.ndarray,
+    valid_rows: np.ndarray,
+    max_rounds: int,
+    early_stopping_rounds: int,
+) -> dict:
+    """Train one (candidate, fold) with early stopping on the held-out users."""
+    data = _CV_DATA
+    assert data is not None, "call _init_cv_worker first"
+    weights = balanced_weights(data.labels, train_rows)
+    train_set = lgb.Dataset(
+        data.matrix[train_rows], label=data.labels[train_rows], weight=weights[train_rows],
+        feature_name=data.feature_cols, params={"verbosity": -1},
+    )
+    valid_set = lgb.Dataset(
+        data.matrix[valid_rows], label=data.labels[valid_rows], weight=weights[valid_rows], reference=train_set
+    )
+    booster = lgb.train(
+        {**params, "metric": "binary_logloss"},
+        train_set,
+        num_boost_round=max_rounds,
+        valid_sets=[valid_set],
+        callbacks=[lgb.early_stopping(early_stopping_rounds, verbose=False)],
+    )
+    y_valid = data.labels[valid_rows]
+    probas = booster.predict(data.matrix[valid_rows], num_iteration=booster.best_iteration)
+    cost = serving_cost(booster, data.matrix[valid_rows], num_iteration=booster.best_iteration)
+    return {
+        "candidate": candidate,
+        "fold": fold,
+        "best_iteration": int(booster.best_iteration),
+        "logloss": float(booster.best_score["valid_0"]["binary_logloss"]),
+        "roc_auc": float(roc_auc_score(y_valid, probas)) if len(np.unique(y_valid)) > 1 else None,
+        "single_row_p99_us": cost["single_row_us"]["p99"],
+        "model_bytes": cost["model_bytes"],
+    }
+
+
+def cross_validate(args: argparse.Namespace) -> pd.DataFrame:
+    """Score every candidate on GroupKFold-by-user folds, scheduled across a process pool.
+
+    Returns one row per candidate, best (lowest mean validation logloss)
+    first. Logloss ranks candidates because user folds often hold too few
+    negatives for a defined ROC AUC. Each fold model's serving latency is
+    measured too (in-pool timings are noisier than the final check), and
+    with ``--max-latency-us`` candidates over budget rank last.
+    """
+    global _CV_DATA
+    space = json.loads(args.search_space.read_text()) if args.search_space else SEARCH_SPACE
+    candidates = candidate_params(args.search, space, args.search_trials, args.seed)
+    # Fold on the rows load_lean keeps (it drops rows with missing features),
+    # so every worker's copy of the matrix lines up with these indices.
+    _CV_DATA = load_lean(args.features)
+    users = _CV_DATA.users
+    folds = list(GroupKFold(n_splits=args.cv_folds).split(np.zeros(len(users)), groups=users))
+
+    workers = max(1, args.workers)
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    jobs = [
+        (idx, fold, {**LGBM_PARAMS, **params, "seed": args.seed, "num_threads": threads}, train_rows, valid_rows)
+        for idx, params in enumerate(candidates)
+        for fold, (train_rows, valid_rows) in enumerate(folds)
+    ]
+    if workers > 1:
+        _CV_DATA = None  # workers load their own copy; free the parent's before forking
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_cv_worker, initargs=(args.features,)) as pool:
+            futures = [pool.submit(run_fold, *job, args.max_rounds, args.early_stopping_rounds) for job in jobs]
+            results = [future.result() for future in futures]
+    else:
+        results = [run_fold(*job, args.max_rounds, args.early_stopping_rounds) for job in jobs]
+
+    per_fold = pd.DataFrame(results)
+    summary = per_fold.groupby("candidate").agg(
+        logloss_mean=("logloss", "mean"),
+        logloss_std=("logloss", "std"),
+        roc_auc_mean=("roc_auc", "mean"),
+        roc_auc_folds=("roc_auc", "count"),
+        best_iteration_mean=("best_iteration", "mean"),
+        single_row_p99_us=("single_row_p99_us", "median"),
+        model_bytes=("model_bytes", "mean"),
+    )
+    summary["params"] = [json.dumps(candidates[idx], sort_keys=True) for idx in summary.index]
+    # Over-budget candidates rank after every candidate that fits, whatever their logloss.
+    budget = args.max_latency_us
+    summary["within_budget"] = True if budget is None else summary["single_row_p99_us"] <= budget
+    summary = summary.sort_values(["within_budget", "logloss_mean"], ascending=[False, True]).reset_index()
+    summary.insert(0, "rank", np.arange(1, len(summary) + 1))
+    return summary
+
+
+def run_cv(args: argparse.Namespace) -> dict:
+    started = time.perf_counter()
+    summary = cross_validate(args)
+    results_path = args.metrics.with_name("cv_results.csv")
+    results_path.parent.mkdir(parents=True, exist_ok=True)
+    summary.to_csv(results_path, index=False)
+
+    best = summary.iloc[0]
+    report = {
+        "cv_folds": args.cv_folds,
+        "search": args.search,
+        "candidates": int(len(summary)),
+        "best_params": json.loads(best["params"]),
+        "best_logloss_mean": float(best["logloss_mean"]),
+        "best_roc_auc_mean": None if pd.isna(best["roc_auc_mean"]) else float(best["roc_auc_mean"]),
+        "best_num_boost_round": int(round(best["best_iteration_mean"])),
+        "best_single_row_p99_us": float(best["single_row_p99_us"]),
+        "best_within_budget": bool(best["within_budget"]),
+        "results": str(results_path),
+        **resource_usage(started),
+    }
+    if args.refit:
+        metrics = train_lean(args, report["best_params"], report["best_num_boost_round"])
+        metrics["cv"] = report
+        args.metrics.write_text(json.dumps(metrics, indent=2))
+        return metrics
+    return report
+
+
+# ---------------------------------------------------------------------------
+# Incremental (warm-start) retraining
+# ---------------------------------------------------------------------------
+
+
+def load_init_booster(path: Path, scaler_path: Path, feature_cols: list[str]) -> Booster:
+    """The model to continue from, as a booster over raw (unscaled) features.
+
+    A ``.pkl`` classifier was trained on scaled inputs, so its scaler is
+    folded into the thresholds first, as when exporting ``model.txt``.
+    """
+    if path.suffix == ".pkl":
+        return fold_scaler_into_booster(joblib.load(path), joblib.load(scaler_path), feature_cols)
+    return Booster(model_file=str(path))
+
+
+def check_feature_list(expected: list[str], booster: Booster, path: Path) -> None:
+    """Refuse to warm-start when the features changed; a full retrain is needed then."""
+    available = feature_columns_from_schema(ds.dataset(path, format="parquet").schema)
+    problems = []
+    if booster.feature_name() != expected:
+        problems.append("initial model features differ from feature metadata")
+    missing = [name for name in expected if name not in available]
+    added = [name for name in available if name not in expected]
+    if missing:
+        problems.append(f"missing from new data: {missing}")
+    if added:
+        problems.append(f"not in feature metadata: {added}")
+    if problems:
+        raise ValueError("Feature list changed; run a full retrain (" + "; ".join(problems) + ")")
+
+
+def train_incremental(args: argparse.Namespace) -> dict:
+    """Continue boosting ``args.init_model`` on the new rows in ``args.features``.
+
+    The new rows are split by user as in a full run; the previous and the
+    updated model are both scored on the held-out users so the metrics carry
+    a like-for-like delta.
+    """
+    started = time.perf_counter()
+    feature_cols = json.loads(args.feature_metadata.read_text())["features"]
+    previous = load_init_booster(args.init_model, args.scaler, feature_cols)
+    check_feature_list(feature_cols, previous, args.features)
+
+    since = utc_timestamp(args.since) if args.since is not None else None
+    data = load_lean(args.features, feature_cols, since=since)
+    if len(data.labels) == 0:
+        raise ValueError("No new feature rows to train on.")
+    train_users, test_users = choose_user_split(pd.unique(data.users), args.test_ratio, args.seed)
+    train_rows = np.flatnonzero(np.isin(data.users, list(train_users)))
+    test_rows = np.flatnonzero(np.isin(data.users, list(test_users)))
+    if len(test_rows) == 0:
+        raise ValueError("No samples in test split. Reduce test_ratio or ensure sufficient users.")
+
+    prior_trees = previous.num_trees()
+    # Boost from the previous model's scores and append the new trees ourselves:
+    # init_model would make LightGBM re-predict the raw training data, which a
+    # cached binary or a freed _RowSubset no longer has.
+    init_score = raw_scores(previous, data.matrix, train_rows)
+    train_set = build_lean_dataset(data, train_rows, args.dataset_cache, lean_source(args, since), init_score)
+    update = lgb.train({**LGBM_PARAMS, "seed": args.seed}, train_set, num_boost_round=args.incremental_rounds)
+    booster = append_trees(previous, update)
+    booster, serving = apply_latency_budget(booster, data.matrix[test_rows], args.max_latency_us)
+
+    y_test = data.labels[test_rows].astype(int)
+    before, _ = score_predictions(y_test, previous.predict(data.matrix[test_rows]), args.threshold)
+    metrics, preds = score_predictions(y_test, booster.predict(data.matrix[test_rows]), args.threshold)
+    lead = data.minutes_until[test_rows][(preds == 1) & ~np.isnan(data.minutes_until[test_rows])]
+    metrics.update(
+        {
+            "avg_lead_time_minutes": float(lead.mean()) if len(lead) else None,
+            "train_users": len(train_users),
+            "test_users": len(test_users),
+            "train_samples": int(len(train_rows)),
+            "test_samples": int(len(test_rows)),
+            "trainer": "incremental",
+            "init_model": str(args.init_model),
+            "since": since.isoformat() if since is not None else None,
+            "trees_before": prior_trees,
+            "trees_added": booster.num_trees() - prior_trees,
+            "serving": serving,
+            "previous": before,
+            "delta": {
+                key: metrics[key] - before[key]
+                for key in ("precision", "recall", "f1", "roc_auc")
+                if metrics[key] is not None and before[key] is not None
+            },
+        }
+    )
+
+    args.booster.parent.mkdir(parents=True, exist_ok=True)
+    booster.save_model(str(args.booster))
+    write_metadata(args.feature_metadata, feature_cols)
+    metrics.update(resource_usage(started))
+    args.metrics.parent.mkdir(parents=True, exist_ok=True)
+    args.metrics.write_text(json.dumps(metrics, indent=2))
+    return metrics
+
+
+def write_metadata(path: Path, feature_cols: list[str]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
     meta = {
         "generated_at": datetime.now(timezone.utc).isoformat(),
         "feature_count": len(feature_cols),
         "features": feature_cols,
         "label": LABEL_COL,
     }
-    args.feature_metadata.write_text(json.dumps(meta, indent=2))
-    args.metrics.write_text(json.dumps(metrics, indent=2))
+    path.write_text(json.dumps(meta, indent=2))
+
+
+def export_existing(args: argparse.Namespace) -> None:
+    clf = joblib.load(args.model)
+    scaler = joblib.load(args.scaler)
+    meta = json.loads(args.feature_metadata.read_text())
+    feature_cols = meta["features"]
+    data, _, _, _ = prepare_data(load_features(args.features))
+    max_diff = export_booster(clf, scaler, feature_cols, data, args.booster)
+    print(f"✅ Exported booster to {args.booster} (max |Δp| = {max_diff:.3g} over {len(data):,} rows)")
 
 
 def main() -> None:
     args = parse_args()
+    if args.export_only:
+        export_existing(args)
+        return
+    if args.cv_folds:
+        report = run_cv(args)
+        print(f"✅ Cross-validation complete; ranked results in {args.metrics.with_name('cv_results.csv')}")
+        print(json.dumps(report, indent=2))
+        return
+    if args.init_model is not None:
+        metrics = train_incremental(args)
+        print(f"✅ Incremental training complete (+{metrics['trees_added']} trees)")
+        print(json.dumps(metrics, indent=2))
+        return
+    if args.lean:
+        metrics = train_lean(args)
+        print("✅ Training complete")
+        print(json.dumps(metrics, indent=2))
+        return
+
+    started = time.perf_counter()
     df = load_features(args.features)
     data, targets, user_series, feature_cols = prepare_data(df)
 
@@ -169,6 +904,16 @@ def main() -> None:
     )
 
     save_artifacts(args, clf, scaler, feature_cols, metrics)
+    metrics["booster_export_max_diff"] = export_booster(clf, scaler, feature_cols, X_test, args.booster)
+    raw_test = X_test[feature_cols].to_numpy(dtype=np.float64)
+    booster, metrics["serving"] = apply_latency_budget(Booster(model_file=str(args.booster)), raw_test, args.max_latency_us)
+    if "trimmed_from_trees" in metrics["serving"]:
+        # The service loads model.txt, so score what it will serve; model.pkl stays untrimmed.
+        booster.save_model(str(args.booster))
+        trimmed, _ = score_predictions(y_test, booster.predict(raw_test), args.threshold)
+        metrics.update(trimmed)
+    metrics.update(resource_usage(started))
+    args.metrics.write_text(json.dumps(metrics, indent=2))
 
     print("✅ Training complete")
     print(json.dumps(metrics, indent=2))
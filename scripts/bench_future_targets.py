@@ -0,0 +1,73 @@
+"""Benchmark the vectorized compute_future_targets against the original per-row loop."""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from scripts.build_features import compute_future_targets, load_dataset
+
+
+def legacy_minutes_until(df: pd.DataFrame) -> np.ndarray:
+    """The pre-vectorization loop, kept as the reference implementation."""
+    minutes_until = np.full(len(df), np.nan, dtype=float)
+    for user, idx in df.groupby("user_id").indices.items():
+        labels = df.loc[idx, "migraine_label"].to_numpy()
+        future = np.full_like(labels, np.nan, dtype=float)
+        minutes = None
+        for i in range(len(labels) - 1, -1, -1):
+            if labels[i] == 1:
+                minutes = 0.0
+                future[i] = 0.0
+            elif minutes is not None:
+                minutes += 1.0
+                future[i] = minutes
+        minutes_until[idx] = future
+    return minutes_until
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark future-target computation")
+    parser.add_argument("--input", type=Path, default=ROOT / "data/synthetic_timeseries.parquet")
+    parser.add_argument("--repeats", type=int, default=5)
+    return parser.parse_args()
+
+
+def best_of(fn, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main() -> None:
+    args = parse_args()
+    df = load_dataset(args.input)
+
+    expected = legacy_minutes_until(df)
+    actual = compute_future_targets(df)["minutes_until_migraine"].to_numpy()
+    identical = np.array_equal(actual, expected, equal_nan=True)
+
+    legacy = best_of(lambda: legacy_minutes_until(df), args.repeats)
+    vectorized = best_of(lambda: compute_future_targets(df, copy=False), args.repeats)
+    by_timestamp = best_of(lambda: compute_future_targets(df, copy=False, use_timestamps=True), args.repeats)
+
+    print(f"{len(df):,} rows, identical to legacy loop: {identical}")
+    print(f"{'legacy loop':<22}{legacy * 1e3:>10.2f} ms")
+    print(f"{'vectorized (rows)':<22}{vectorized * 1e3:>10.2f} ms  ({legacy / vectorized:.1f}x)")
+    print(f"{'vectorized (minutes)':<22}{by_timestamp * 1e3:>10.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
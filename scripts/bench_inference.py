@@ -0,0 +1,82 @@
+"""Microbenchmark for model scoring: scaler + LGBMClassifier vs the exported booster."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Callable
+
+import joblib
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from backend.booster import RawBooster
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark single-row and batched model scoring")
+    parser.add_argument("--features", type=Path, default=ROOT / "data/features.parquet")
+    parser.add_argument("--model", type=Path, default=ROOT / "models/model.pkl")
+    parser.add_argument("--scaler", type=Path, default=ROOT / "models/scaler.pkl")
+    parser.add_argument("--booster", type=Path, default=ROOT / "models/model.txt")
+    parser.add_argument("--feature-metadata", type=Path, default=ROOT / "models/feature_metadata.json")
+    parser.add_argument("--repeats", type=int, default=2000, help="Single-row calls per variant")
+    parser.add_argument("--batch-rows", type=int, default=1000)
+    return parser.parse_args()
+
+
+def time_call(fn: Callable[[], object], repeats: int) -> float:
+    fn()
+    started = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - started) / repeats
+
+
+def main() -> None:
+    args = parse_args()
+    features = json.loads(args.feature_metadata.read_text())["features"]
+    df = pd.read_parquet(args.features, columns=features)
+    matrix = np.ascontiguousarray(df.astype(float).dropna().to_numpy())
+    batch = matrix[: args.batch_rows]
+    row = matrix[0]
+
+    clf = joblib.load(args.model)
+    scaler = joblib.load(args.scaler)
+    booster = RawBooster(args.booster, features)
+
+    def legacy(rows: np.ndarray) -> np.ndarray:
+        return clf.predict_proba(scaler.transform(rows))[:, 1]
+
+    max_diff = float(np.max(np.abs(booster.predict_matrix(matrix) - legacy(matrix))))
+    row_diff = abs(booster.predict_row(row) - float(legacy(row.reshape(1, -1))[0]))
+
+    batch_repeats = max(1, args.repeats // 100)
+    results = {
+        "scaler+LGBMClassifier": (
+            time_call(lambda: legacy(row.reshape(1, -1)), args.repeats),
+            time_call(lambda: legacy(batch), batch_repeats),
+        ),
+        "Booster.predict": (
+            time_call(lambda: booster.booster.predict(row.reshape(1, -1)), args.repeats),
+            time_call(lambda: booster.predict_matrix(batch), batch_repeats),
+        ),
+        "RawBooster.predict_row": (time_call(lambda: booster.predict_row(row), args.repeats), None),
+    }
+
+    print(f"max |Δp| over {len(matrix):,} rows: {max_diff:.3g} (single-row path: {row_diff:.3g})")
+    print(f"{'variant':<26}{'1 row (µs)':>12}{f'{len(batch)} rows (ms)':>16}")
+    for name, (single, batched) in results.items():
+        batched_ms = f"{batched * 1e3:.2f}" if batched is not None else "-"
+        print(f"{name:<26}{single * 1e6:>12.1f}{batched_ms:>16}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""Replay-based load benchmark for the API.
+
+Replays ``--input`` (the generator's parquet output) for ``--users``
+concurrent users against a locally launched uvicorn, or ``--url``. Each
+user posts its samples in timestamp order, compressed ``--speedup`` times
+(0 replays as fast as the server answers), and mixes in ``/predict``,
+``/insights`` and ``/coach`` reads. Reports throughput, per-endpoint
+latency percentiles and the server's event-loop lag and RSS per tracked
+user as JSON; ``--compare`` prints the change against an earlier report.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import httpx
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from scripts.bench_startup import free_port, spawn_server
+
+READ_ENDPOINTS = ("predict", "insights", "coach")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Replay synthetic users against the API and measure latency")
+    parser.add_argument("--input", type=Path, default=ROOT / "data/synthetic_timeseries.parquet")
+    parser.add_argument("--users", type=int, default=50, help="Concurrent replayed users (source users are reused)")
+    parser.add_argument("--events-per-user", type=int, default=120)
+    parser.add_argument("--speedup", type=float, default=600.0, help="Replay speed vs. the 1-minute sampling; 0 = no pacing")
+    parser.add_argument(
+        "--mix",
+        default="predict=0.2,insights=0.05,coach=0.02",
+        help="Probability of each read call after an ingest",
+    )
+    parser.add_argument("--url", default=None, help="Target a running server instead of launching uvicorn")
+    parser.add_argument("--env", action="append", default=[], help="KEY=VALUE for the launched server (repeatable)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=None, help="Write the JSON report here")
+    parser.add_argument("--compare", type=Path, default=None, help="Earlier report to diff throughput and latency against")
+    return parser.parse_args()
+
+
+def parse_mix(text: str) -> dict[str, float]:
+    mix = {}
+    for item in filter(None, text.split(",")):
+        name, _, value = item.partition("=")
+        if name not in READ_ENDPOINTS:
+            raise ValueError(f"Unknown endpoint {name!r} in --mix; expected {READ_ENDPOINTS}")
+        mix[name] = float(value)
+    return mix
+
+
+def load_streams(path: Path, users: int, events: int) -> list[list[dict]]:
+    """One timestamp-ordered payload list per replayed user, cycling over the source users."""
+    df = pd.read_parquet(path).sort_values(["user_id", "timestamp"])
+    df["timestamp"] = df["timestamp"].map(lambda ts: pd.Timestamp(ts).isoformat())
+    sources = [group.head(events).to_dict(orient="records") for _, group in df.groupby("user_id", sort=True)]
+    return [
+        [{**record, "user_id": f"load_{idx:04d}"} for record in sources[idx % len(sources)]] for idx in range(users)
+    ]
+
+
+async def wait_until_ready(client: httpx.AsyncClient, server: subprocess.Popen | None, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server is not None and server.poll() is not None:
+            raise RuntimeError("Server exited during startup")
+        try:
+            if (await client.get("/ready")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.05)
+    raise RuntimeError("Server did not become ready")
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+
+    async def call(self, endpoint: str, request) -> None:
+        started = time.perf_counter()
+        try:
+            response = await request
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        self.latencies[endpoint].append(time.perf_counter() - started)
+        if not ok:
+            self.errors[endpoint] += 1
+
+    def summary(self) -> dict:
+        report = {}
+        for endpoint, values in sorted(self.latencies.items()):
+            ms = np.asarray(values) * 1000
+            report[endpoint] = {
+                "count": len(values),
+                "errors": self.errors[endpoint],
+                **{f"p{q}_ms": round(float(np.percentile(ms, q)), 2) for q in (50, 95, 99)},
+                "max_ms": round(float(ms.max()), 2),
+            }
+        return report
+
+
+async def replay_user(
+    client: httpx.AsyncClient,
+    stream: list[dict],
+    recorder: Recorder,
+    mix: dict[str, float],
+    speedup: float,
+    started: float,
+    rng: random.Random,
+    headers: dict[str, str],
+) -> None:
+    user_id = stream[0]["user_id"]
+    first = pd.Timestamp(stream[0]["timestamp"])
+    for record in stream:
+        if speedup > 0:
+            due = started + (pd.Timestamp(record["timestamp"]) - first).total_seconds() / speedup
+            await asyncio.sleep(max(0.0, due - time.perf_counter()))
+        await recorder.call("ingest", client.post("/ingest", json=record, headers=headers))
+        for endpoint, probability in mix.items():
+            if rng.random() < probability:
+                if endpoint == "coach":
+                    request = client.post(f"/coach/{user_id}", json={}, headers=headers)
+                else:
+                    request = client.get(f"/{endpoint}/{user_id}", headers=headers)
+                await recorder.call(endpoint, request)
+
+
+def git_commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+    except OSError:
+        return None
+    return out.stdout.strip() or None
+
+
+async def run(args: argparse.Namespace) -> dict:
+    streams = load_streams(args.input, args.users, args.events_per_user)
+    mix = parse_mix(args.mix)
+    server = None
+    url = args.url
+    if url is None:
+        port = free_port()
+        server = spawn_server(port, dict(item.split("=", 1) for item in args.env))
+        url = f"http://127.0.0.1:{port}"
+    headers = {"X-API-Key": os.environ.get("API_TOKEN", "dev-token")}
+    limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+    try:
+        async with httpx.AsyncClient(base_url=url, timeout=30.0, limits=limits) as client:
+            await wait_until_ready(client, server)
+            recorder = Recorder()
+            started = time.perf_counter()
+            await asyncio.gather(
+                *(
+                    replay_user(
+                        client, stream, recorder, mix, args.speedup, started, random.Random(args.seed + idx), headers
+                    )
+                    for idx, stream in enumerate(streams)
+                )
+            )
+            elapsed = time.perf_counter() - started
+            health = (await client.get("/health")).json()
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+
+    endpoints = recorder.summary()
+    requests = sum(stats["count"] for stats in endpoints.values())
+    return {
+        "commit": git_commit(),
+        "config": {
+            "input": str(args.input),
+            "users": args.users,
+            "events_per_user": args.events_per_user,
+            "speedup": args.speedup,
+            "mix": mix,
+            "server_env": args.env,
+        },
+        "elapsed_seconds": round(elapsed, 3),
+        "requests": requests,
+        "throughput_rps": round(requests / elapsed, 1),
+        "ingest_rps": round(endpoints.get("ingest", {}).get("count", 0) / elapsed, 1),
+        "endpoints": endpoints,
+        "server": {
+            "users_tracked": health["users_tracked"],
+            "event_loop_lag": health["event_loop_lag"],
+            "rss_bytes": health["rss_bytes"],
+            "rss_bytes_per_user": health["rss_bytes_per_user"],
+            "event_store_bytes_per_user": health["event_store_bytes_per_user"],
+            "state_bytes_per_user": health["state_bytes_per_user"],
+            "executor": health["executor"],
+        },
+    }
+
+
+def print_comparison(report: dict, baseline: dict) -> None:
+    def change(new: float, old: float) -> str:
+        return f"{new:>10.2f} ({(new - old) / old * 100:+.1f}%)" if old else f"{new:>10.2f}"
+
+    print(f"\nvs {baseline.get('commit') or 'baseline'}:")
+    print(f"{'throughput rps':<24}{change(report['throughput_rps'], baseline['throughput_rps'])}")
+    for endpoint, stats in report["endpoints"].items():
+        old = baseline["endpoints"].get(endpoint)
+        if old:
+            for key in ("p50_ms", "p99_ms"):
+                print(f"{endpoint + ' ' + key:<24}{change(stats[key], old[key])}")
+    lag, old_lag = report["server"]["event_loop_lag"], baseline["server"]["event_loop_lag"]
+    print(f"{'loop lag p99 ms':<24}{change(lag['recent_p99_ms'], old_lag['recent_p99_ms'])}")
+
+
+def main() -> None:
+    args = parse_args()
+    report = asyncio.run(run(args))
+    print(json.dumps(report, indent=2))
+    if args.output is not None:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2))
+    if args.compare is not None:
+        print_comparison(report, json.loads(args.compare.read_text()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Measure /ingest latency while a refresh sweep is running.
+
+Runs the app in-process (httpx ASGI transport), seeds ``--users`` users from
+the synthetic dataset, then streams ``--probes`` ingests for one extra user
+while ``_refresh_all`` sweeps everyone else, back to back (every user is
+marked dirty again before each sweep), so every probe overlaps a sweep.
+``--mode legacy`` reproduces the old behaviour (one global lock held for the
+whole, non-yielding sweep) so the two can be compared on the same machine.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import Awaitable, Callable
+
+import httpx
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+import backend.app as api
+
+DATA_PATH = ROOT / "data/synthetic_timeseries.parquet"
+ORIGINAL_USER_LOCK = api._user_lock
+# Fewer samples than this make the p99 column meaningless.
+MIN_PROBES = 100
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark ingest latency during a refresh sweep")
+    parser.add_argument("--users", type=int, default=500, help="Users covered by the refresh sweep")
+    parser.add_argument("--history", type=int, default=240, help="Events seeded per user")
+    parser.add_argument("--probes", type=int, default=200, help=f"Ingests timed per mode (at least {MIN_PROBES})")
+    parser.add_argument("--mode", choices=["striped", "legacy", "both"], default="both")
+    args = parser.parse_args()
+    if args.probes < MIN_PROBES:
+        parser.error(f"--probes must be at least {MIN_PROBES} for a p99")
+    return args
+
+
+def seed_users(users: int, history: int, probes: int) -> list[dict]:
+    df = pd.read_parquet(DATA_PATH)
+    template = df[df["user_id"] == df["user_id"].iloc[0]].sort_values("timestamp")
+    records = template.head(history + probes).to_dict(orient="records")
+    for record in records:
+        record["timestamp"] = pd.Timestamp(record["timestamp"]).to_pydatetime()
+    for idx in range(users):
+        api._append_events(f"bench_{idx:05d}", records[:history])
+    return records[history:]
+
+
+async def legacy_refresh(lock: asyncio.Lock) -> None:
+    async with lock:
+        for user_id in list(api.EVENT_STORE.keys()):
+            await api._update_prediction(user_id)
+
+
+async def sweep_until(stop: asyncio.Event, sweep: Callable[[], Awaitable[None]], durations: list[float]) -> None:
+    """Run sweeps back to back, re-dirtying every user first, until ``stop`` is set."""
+    while not stop.is_set():
+        api.DIRTY_USERS.update(api.FEATURE_ENGINES)
+        started = time.perf_counter()
+        await sweep()
+        durations.append(time.perf_counter() - started)
+
+
+async def measure(mode: str, probe_records: list[dict]) -> tuple[np.ndarray, list[float]]:
+    if mode == "legacy":
+        global_lock = asyncio.Lock()
+        api._user_lock = lambda user_id: global_lock  # type: ignore[assignment]
+        sweep = lambda: legacy_refresh(global_lock)  # noqa: E731
+    else:
+        api._user_lock = ORIGINAL_USER_LOCK  # type: ignore[assignment]
+        sweep = api._refresh_all
+
+    headers = {"X-API-Key": api.settings.api_token}
+    transport = httpx.ASGITransport(app=api.app)
+    latencies: list[float] = []
+    durations: list[float] = []
+    stop = asyncio.Event()
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        sweeps = asyncio.create_task(sweep_until(stop, sweep, durations))
+        for record in probe_records:
+            payload = {**record, "user_id": f"probe_{mode}", "timestamp": record["timestamp"].isoformat()}
+            t0 = time.perf_counter()
+            resp = await client.post("/ingest", json=payload, headers=headers)
+            resp.raise_for_status()
+            latencies.append(time.perf_counter() - t0)
+        stop.set()
+        await sweeps
+    return np.asarray(latencies) * 1000, durations
+
+
+def main() -> None:
+    args = parse_args()
+    api.load_model()
+    probe_records = seed_users(args.users, args.history, args.probes)
+    if len(probe_records) < args.probes:
+        raise SystemExit(f"Only {len(probe_records)} probe events left after --history {args.history}")
+    modes = ["legacy", "striped"] if args.mode == "both" else [args.mode]
+
+    print(f"Sweeps over {args.users} users with {args.history} events each")
+    print(f"{'mode':<10}{'ingests':>9}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}{'sweeps':>8}{'sweep s':>10}")
+    for mode in modes:
+        latencies, durations = asyncio.run(measure(mode, probe_records))
+        if len(latencies) < MIN_PROBES:
+            raise SystemExit(f"{mode}: only {len(latencies)} ingests timed, need {MIN_PROBES} for a p99")
+        print(
+            f"{mode:<10}{len(latencies):>9}{np.percentile(latencies, 50):>10.2f}"
+            f"{np.percentile(latencies, 99):>10.2f}{latencies.max():>10.2f}"
+            f"{len(durations):>8}{np.mean(durations):>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
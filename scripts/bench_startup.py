@@ -0,0 +1,151 @@
+"""Benchmark API cold start: import time, time to listen, time to ready and to the first prediction.
+
+Each measurement runs in a fresh interpreter so module caches from earlier
+runs do not hide regressions. ``--max-*`` budgets turn the benchmark into a
+check that exits non-zero when startup gets slower.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+DATA_PATH = ROOT / "data/synthetic_timeseries.parquet"
+HEAVY_MODULES = ("pandas", "sklearn", "lightgbm", "joblib", "scipy")
+
+IMPORT_PROBE = f"""
+import json, sys, time
+started = time.perf_counter()
+import backend.app
+print(json.dumps({{"seconds": time.perf_counter() - started, "heavy": [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark API cold start")
+    parser.add_argument("--repeats", type=int, default=3, help="Fresh-interpreter runs per measurement")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Give up on a server that is not ready by then")
+    parser.add_argument("--output", type=Path, default=None, help="Also write the JSON report here")
+    parser.add_argument("--max-import-seconds", type=float, default=None)
+    parser.add_argument("--max-ready-seconds", type=float, default=None)
+    parser.add_argument("--max-first-prediction-seconds", type=float, default=None)
+    return parser.parse_args()
+
+
+def measure_import() -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", IMPORT_PROBE], cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def sample_payload() -> dict:
+    record = pd.read_parquet(DATA_PATH).iloc[0].to_dict()
+    return {**record, "user_id": "bench_startup", "timestamp": pd.Timestamp(record["timestamp"]).isoformat()}
+
+
+def spawn_server(port: int, env: dict[str, str] | None = None) -> subprocess.Popen:
+    """Launch uvicorn on ``port`` without WAL restore or the file watch, unless ``env`` asks for them."""
+    server_env = {**os.environ, "MODEL_WATCH_INTERVAL_SECONDS": "0"}
+    server_env.pop("PERSISTENCE_DIR", None)
+    server_env.update(env or {})
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.app:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT,
+        env=server_env,
+    )
+
+
+def measure_serve(payload: dict, timeout: float) -> dict:
+    """Seconds from spawning uvicorn until it answers, is ready, and returns a prediction."""
+    port = free_port()
+    started = time.perf_counter()
+    server = spawn_server(port)
+    timings: dict[str, float] = {}
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=5.0) as client:
+            while "ready" not in timings:
+                if time.perf_counter() - started > timeout or server.poll() is not None:
+                    raise RuntimeError(f"Server not ready after {time.perf_counter() - started:.1f}s")
+                try:
+                    health = client.get("/health").json()
+                except httpx.TransportError:
+                    time.sleep(0.01)
+                    continue
+                timings.setdefault("listen", time.perf_counter() - started)
+                if health["startup"]["status"] == "failed":
+                    raise RuntimeError(f"Startup failed: {health['startup']['error']}")
+                if health["ready"]:
+                    timings["ready"] = time.perf_counter() - started
+                    timings["model_load"] = health["startup"]["model_load_seconds"]
+                else:
+                    time.sleep(0.01)
+            headers = {"X-API-Key": os.environ.get("API_TOKEN", "dev-token")}
+            response = client.post("/ingest", json=payload, headers=headers)
+            response.raise_for_status()
+            if response.json()["last_prediction"] is None:
+                raise RuntimeError("First ingest returned no prediction; is SCORE_ON_INGEST disabled?")
+            timings["first_prediction"] = time.perf_counter() - started
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+    return timings
+
+
+def summarize(values: list[float]) -> dict:
+    return {"min": round(min(values), 3), "median": round(statistics.median(values), 3), "max": round(max(values), 3)}
+
+
+def main() -> None:
+    args = parse_args()
+    payload = sample_payload()
+    imports = [measure_import() for _ in range(args.repeats)]
+    serves = [measure_serve(payload, args.timeout) for _ in range(args.repeats)]
+
+    report = {
+        "repeats": args.repeats,
+        "import_seconds": summarize([run["seconds"] for run in imports]),
+        "heavy_modules_at_import": sorted({name for run in imports for name in run["heavy"]}),
+        **{
+            f"{key}_seconds": summarize([run[key] for run in serves])
+            for key in ("listen", "model_load", "ready", "first_prediction")
+        },
+    }
+    print(json.dumps(report, indent=2))
+    if args.output is not None:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2))
+
+    budgets = {
+        "import_seconds": args.max_import_seconds,
+        "ready_seconds": args.max_ready_seconds,
+        "first_prediction_seconds": args.max_first_prediction_seconds,
+    }
+    over = [
+        f"{key} median {report[key]['median']}s > {limit}s"
+        for key, limit in budgets.items()
+        if limit is not None and report[key]["median"] > limit
+    ]
+    if over:
+        sys.exit("Startup regression: " + "; ".join(over))
+
+
+if __name__ == "__main__":
+    main()
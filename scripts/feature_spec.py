@@ -0,0 +1,159 @@
+"""Declarative feature spec shared by the offline builder and the online engine.
+
+Every engineered column is a :class:`FeatureDef`. :func:`compile_plan` prunes
+the spec to the columns a model needs (plus whatever they depend on), so
+``scripts.build_features`` and ``backend.streaming`` only compute those.
+Kept free of pandas so the service can import it cheaply.
+"""
+
+from __future__ import annotations
+
+import operator
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable
+
+MINUTES_PER_DAY = 24 * 60
+
+SIGNAL_COLUMNS: tuple[str, ...] = (
+    "heart_rate",
+    "hrv",
+    "sleep_debt_hours",
+    "screen_time_minutes",
+    "calendar_load",
+    "temperature_c",
+    "barometric_pressure_hpa",
+    "solar_pressure_index",
+    "uv_index",
+    "ambient_noise_db",
+    "trigger_score",
+    "migraine_probability",
+)
+
+TIME_FEATURES: tuple[str, ...] = ("minute_of_day", "sin_circadian", "cos_circadian", "is_weekend", "is_work_hours")
+
+# name -> (input column, comparison, threshold)
+CONTEXT_FLAGS: dict[str, tuple[str, str, Any]] = {
+    "high_screen_load": ("screen_time_minutes", ">", 2.0),
+    "heavy_calendar": ("calendar_load", ">=", 3),
+    "low_pressure": ("barometric_pressure_hpa", "<", 1005),
+    "high_noise": ("ambient_noise_db", ">", 70),
+    "uv_alert": ("uv_index", ">", 8),
+    "storm_conditions": ("weather_condition", "==", "storm"),
+}
+
+# name -> flags it counts
+FLAG_COUNTS: dict[str, tuple[str, ...]] = {
+    "combined_environment_stress": ("low_pressure", "high_noise", "uv_alert", "storm_conditions"),
+}
+
+# (signal, windows, aggregation) triples.
+ROLLING_FEATURES: tuple[tuple[str, tuple[int, ...], str], ...] = (
+    ("heart_rate", (15, 60, 180), "mean"),
+    ("heart_rate", (60, 240), "std"),
+    ("hrv", (15, 60, 180), "mean"),
+    ("hrv", (60, 240), "std"),
+    ("sleep_debt_hours", (60, 360), "max"),
+    ("screen_time_minutes", (30, 120), "sum"),
+    ("ambient_noise_db", (30, 120), "mean"),
+    ("barometric_pressure_hpa", (180, 360), "mean"),
+)
+
+CIRCADIAN_COLUMNS: tuple[str, ...] = (
+    "heart_rate",
+    "hrv",
+    "screen_time_minutes",
+    "barometric_pressure_hpa",
+    "ambient_noise_db",
+    "temperature_c",
+)
+
+COMPARISONS: dict[str, Callable[[Any, Any], Any]] = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "==": operator.eq,
+}
+
+FEATURE_KINDS = ("signal", "time", "flag", "count", "rolling", "circadian")
+
+
+def rolling_min_periods(window: int) -> int:
+    return max(10, window // 4)
+
+
+@dataclass(frozen=True)
+class FeatureDef:
+    """One engineered column; which fields are set depends on ``kind``."""
+
+    name: str
+    kind: str
+    source: str | None = None
+    agg: str | None = None
+    window: int | None = None
+    comparison: str | None = None
+    threshold: Any = None
+    depends: tuple[str, ...] = ()
+
+
+def _build_specs() -> tuple[FeatureDef, ...]:
+    specs = [FeatureDef(column, "signal", source=column) for column in SIGNAL_COLUMNS]
+    for name in TIME_FEATURES:
+        depends = ("minute_of_day",) if name in ("sin_circadian", "cos_circadian") else ()
+        specs.append(FeatureDef(name, "time", depends=depends))
+    for name, (source, comparison, threshold) in CONTEXT_FLAGS.items():
+        specs.append(FeatureDef(name, "flag", source=source, comparison=comparison, threshold=threshold))
+    for name, flags in FLAG_COUNTS.items():
+        specs.append(FeatureDef(name, "count", depends=flags))
+    for column, windows, agg in ROLLING_FEATURES:
+        for window in windows:
+            specs.append(FeatureDef(f"{column}_{agg}_{window}m", "rolling", source=column, agg=agg, window=window))
+    for column in CIRCADIAN_COLUMNS:
+        specs.append(FeatureDef(f"{column}_circadian_delta", "circadian", source=column))
+    return tuple(specs)
+
+
+FEATURE_SPECS: tuple[FeatureDef, ...] = _build_specs()
+SPECS_BY_NAME: dict[str, FeatureDef] = {spec.name: spec for spec in FEATURE_SPECS}
+
+
+@dataclass(frozen=True)
+class FeaturePlan:
+    """Pruned, dependency-ordered subset of ``FEATURE_SPECS``."""
+
+    features: tuple[str, ...]
+    steps: tuple[FeatureDef, ...]
+
+    def of_kind(self, kind: str) -> tuple[FeatureDef, ...]:
+        return tuple(step for step in self.steps if step.kind == kind)
+
+    @property
+    def rolling_groups(self) -> tuple[tuple[str, tuple[int, ...], str], ...]:
+        """Rolling steps regrouped as ``(signal, windows, agg)`` in spec order."""
+        groups: dict[tuple[str, str], list[int]] = {}
+        for step in self.of_kind("rolling"):
+            groups.setdefault((step.source, step.agg), []).append(step.window)
+        return tuple((source, tuple(windows), agg) for (source, agg), windows in groups.items())
+
+    @property
+    def circadian_signals(self) -> tuple[str, ...]:
+        return tuple(step.source for step in self.of_kind("circadian"))
+
+
+def compile_plan(features: Iterable[str] | None = None) -> FeaturePlan:
+    """Plan computing ``features`` (every spec when ``None``) and their dependencies."""
+    requested = tuple(features) if features is not None else tuple(spec.name for spec in FEATURE_SPECS)
+    unknown = [name for name in requested if name not in SPECS_BY_NAME]
+    if unknown:
+        raise ValueError(f"No feature spec for {unknown}")
+
+    needed: set[str] = set()
+    stack = list(requested)
+    while stack:
+        name = stack.pop()
+        if name not in needed:
+            needed.add(name)
+            stack.extend(SPECS_BY_NAME[name].depends)
+    # FEATURE_SPECS lists dependencies before their dependents, and this
+    # order is also the column order of the offline table.
+    steps = tuple(spec for spec in FEATURE_SPECS if spec.name in needed)
+    return FeaturePlan(features=requested, steps=steps)
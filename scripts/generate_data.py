@@ -2,23 +2,50 @@
 
 Creates minute-level biometric, contextual, and environmental signals for a
 configurable number of users and days, and injects migraine events using
-probabilistic triggers. The output includes both CSV and Parquet datasets plus a
-metadata JSON payload.
+probabilistic triggers. The output includes Parquet and (optionally) CSV
+datasets plus a metadata JSON payload.
+
+Each user gets its own RNG stream spawned from ``--seed``, so users can be
+simulated in a process pool and the output does not depend on ``--workers``.
+``--legacy`` reproduces datasets from the original shared-stream generator.
 """
 
 from __future__ import annotations
 
 import argparse
 import json
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Tuple
+from typing import Iterator, Tuple
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 
 MINUTES_PER_DAY = 24 * 60
+SLEEP_RECOVERY = (0.02, 0.05)  # hours of debt repaid per sleeping minute
+WAKE_ACCRUAL = (0.005, 0.02)  # hours accrued per waking minute, before screen time
+MAX_SLEEP_DEBT = 6.0
+OUTPUT_FORMATS = ("parquet", "csv")
+SIGNALS = [
+    "heart_rate",
+    "hrv",
+    "sleep_debt_hours",
+    "screen_time_minutes",
+    "calendar_load",
+    "temperature_c",
+    "barometric_pressure_hpa",
+    "solar_pressure_index",
+    "uv_index",
+    "ambient_noise_db",
+    "weather_condition",
+    "trigger_score",
+    "migraine_probability",
+]
 
 
 @dataclass
@@ -42,7 +69,23 @@ def parse_args() -> argparse.Namespace:
         default=Path("data"),
         help="Directory where outputs will be written",
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--legacy",
+        action="store_true",
+        help="Use the original shared RNG stream and per-minute sleep-debt loop (slow; reproduces old datasets)",
+    )
+    parser.add_argument("--workers", type=int, default=1, help="Processes simulating users in parallel")
+    parser.add_argument(
+        "--formats",
+        default="parquet,csv",
+        help=f"Comma-separated outputs to write, from {', '.join(OUTPUT_FORMATS)}",
+    )
+    args = parser.parse_args()
+    args.formats = [fmt.strip() for fmt in args.formats.split(",") if fmt.strip()]
+    unknown = sorted(set(args.formats) - set(OUTPUT_FORMATS))
+    if unknown or not args.formats:
+        parser.error(f"--formats must list some of {OUTPUT_FORMATS}, got {args.formats}")
+    return args
 
 
 def build_user_profile(user_idx: int, rng: np.random.Generator) -> UserProfile:
@@ -56,10 +99,63 @@ def build_user_profile(user_idx: int, rng: np.random.Generator) -> UserProfile:
     )
 
 
-def simulate_user_timeseries(profile: UserProfile, days: int, rng: np.random.Generator) -> pd.DataFrame:
+def simulate_sleep_debt_legacy(
+    initial_debt: float, sleeping: np.ndarray, screen_time: np.ndarray, rng: np.random.Generator
+) -> np.ndarray:
+    """Original per-minute recurrence with one scalar RNG call per minute."""
+    sleep_debt = np.zeros(len(sleeping))
+    current_debt = initial_debt
+    for i in range(len(sleeping)):
+        if sleeping[i]:
+            current_debt = max(0, current_debt - rng.uniform(*SLEEP_RECOVERY))
+        else:
+            current_debt += rng.uniform(*WAKE_ACCRUAL) * (1 + screen_time[i] / 2)
+            current_debt = min(current_debt, MAX_SLEEP_DEBT)
+        sleep_debt[i] = current_debt
+    return sleep_debt
+
+
+def simulate_sleep_debt(
+    initial_debt: float, sleeping: np.ndarray, screen_time: np.ndarray, rng: np.random.Generator
+) -> np.ndarray:
+    """Vectorized :func:`simulate_sleep_debt_legacy`.
+
+    Draws every minute's uniform in one call (the same doubles, in the same
+    order, as the scalar calls) and runs each sleeping/waking segment as a
+    single accumulate. Debt only falls while asleep and only rises while
+    awake, so once a segment hits its clamp it stays there; clamping the
+    unclamped running total afterwards gives the same values bit for bit.
+    """
+    periods = len(sleeping)
+    draws = rng.random(periods)
+    recovery = SLEEP_RECOVERY[0] + (SLEEP_RECOVERY[1] - SLEEP_RECOVERY[0]) * draws
+    accrual = (WAKE_ACCRUAL[0] + (WAKE_ACCRUAL[1] - WAKE_ACCRUAL[0]) * draws) * (1 + screen_time / 2)
+
+    sleep_debt = np.empty(periods)
+    bounds = np.flatnonzero(np.diff(sleeping.astype(np.int8))) + 1
+    current_debt = initial_debt
+    for start, stop in zip(np.append(0, bounds), np.append(bounds, periods)):
+        if sleeping[start]:
+            running = np.subtract.accumulate(np.append(current_debt, recovery[start:stop]))[1:]
+            segment = np.maximum(running, 0.0)
+        else:
+            running = np.add.accumulate(np.append(current_debt, accrual[start:stop]))[1:]
+            segment = np.minimum(running, MAX_SLEEP_DEBT)
+        sleep_debt[start:stop] = segment
+        current_debt = segment[-1]
+    return sleep_debt
+
+
+def simulate_user_timeseries(
+    profile: UserProfile,
+    days: int,
+    rng: np.random.Generator,
+    legacy: bool = False,
+    end: pd.Timestamp | None = None,
+) -> pd.DataFrame:
     periods = days * MINUTES_PER_DAY
     index = pd.date_range(
-        end=pd.Timestamp.utcnow().ceil(freq="min"),
+        end=end if end is not None else pd.Timestamp.utcnow().ceil(freq="min"),
         periods=periods,
         freq="min",
         tz="UTC",
@@ -95,15 +191,9 @@ def simulate_user_timeseries(profile: UserProfile, days: int, rng: np.random.Gen
         generate_environmental_signals(days, periods, day_fraction, day_index, rng)
     )
 
-    sleep_debt = np.zeros(periods)
-    current_debt = rng.uniform(0, 1)
-    for i in range(periods):
-        if 0.0 <= day_fraction[i] < 0.25:  # sleeping window
-            current_debt = max(0, current_debt - rng.uniform(0.02, 0.05))
-        else:
-            current_debt += rng.uniform(0.005, 0.02) * (1 + screen_time[i] / 2)
-            current_debt = min(current_debt, 6)
-        sleep_debt[i] = current_debt
+    sleeping = (0.0 <= day_fraction) & (day_fraction < 0.25)
+    simulate = simulate_sleep_debt_legacy if legacy else simulate_sleep_debt
+    sleep_debt = simulate(rng.uniform(0, 1), sleeping, screen_time, rng)
 
     environment_pressure = np.clip((1015 - barometric_pressure_hpa) / 20.0, 0, 1)
     environment_noise = np.clip((ambient_noise_db - 60) / 25.0, 0, 1)
@@ -216,41 +306,110 @@ def expand_events(seed: np.ndarray) -> np.ndarray:
     return convolved > 0
 
 
-def generate_dataset(users: int, days: int, seed: int, outdir: Path) -> Tuple[pd.DataFrame, dict]:
+def generate_dataset(
+    users: int, days: int, seed: int, outdir: Path, legacy: bool = False
+) -> Tuple[pd.DataFrame, dict]:
     rng = np.random.default_rng(seed)
     frames = []
     profiles = []
     for uid in range(users):
         profile = build_user_profile(uid, rng)
         profiles.append(profile)
-        frames.append(simulate_user_timeseries(profile, days, rng))
+        frames.append(simulate_user_timeseries(profile, days, rng, legacy))
 
     dataset = pd.concat(frames, ignore_index=True)
-    metadata = {
+    metadata = build_metadata(users, days, seed, int(dataset.shape[0]), profiles)
+    return dataset, metadata
+
+
+def build_metadata(users: int, days: int, seed: int, rows: int, profiles: list[UserProfile]) -> dict:
+    return {
         "generated_at": datetime.now(timezone.utc).isoformat(),
         "users": users,
         "days": days,
-        "rows": int(dataset.shape[0]),
+        "rows": rows,
         "seed": seed,
-        "signals": [
-            "heart_rate",
-            "hrv",
-            "sleep_debt_hours",
-            "screen_time_minutes",
-            "calendar_load",
-            "temperature_c",
-            "barometric_pressure_hpa",
-            "solar_pressure_index",
-            "uv_index",
-            "ambient_noise_db",
-            "weather_condition",
-            "trigger_score",
-            "migraine_probability",
-        ],
+        "signals": SIGNALS,
         "label": "migraine_label",
         "user_profiles": [profile.__dict__ for profile in profiles],
     }
-    return dataset, metadata
+
+
+def simulate_spawned_user(
+    uid: int, days: int, seed_sequence: np.random.SeedSequence, end: pd.Timestamp
+) -> Tuple[UserProfile, pd.DataFrame]:
+    """Simulate one user from its own spawned stream; safe to run in any process."""
+    rng = np.random.default_rng(seed_sequence)
+    profile = build_user_profile(uid, rng)
+    return profile, simulate_user_timeseries(profile, days, rng, end=end)
+
+
+def iter_spawned_users(users: int, days: int, seed: int, workers: int) -> Iterator[Tuple[UserProfile, pd.DataFrame]]:
+    """Yield users in id order; each has its own ``SeedSequence(seed).spawn`` child.
+
+    Results depend only on ``seed`` and the user id, never on ``workers``.
+    At most ``2 * workers`` users are in flight so memory stays bounded.
+    """
+    children = np.random.SeedSequence(seed).spawn(users)
+    # One shared end timestamp, so every user covers the same minutes.
+    end = pd.Timestamp.utcnow().ceil(freq="min")
+    if workers <= 1:
+        for uid, child in enumerate(children):
+            yield simulate_spawned_user(uid, days, child, end)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight: list[Future] = []
+        next_uid = 0
+        while next_uid < users or in_flight:
+            while next_uid < users and len(in_flight) < 2 * workers:
+                in_flight.append(pool.submit(simulate_spawned_user, next_uid, days, children[next_uid], end))
+                next_uid += 1
+            yield in_flight.pop(0).result()
+
+
+def write_dataset(
+    users: int, days: int, seed: int, outdir: Path, workers: int = 1, formats: Tuple[str, ...] = OUTPUT_FORMATS
+) -> dict:
+    """Stream spawned users to disk and return the metadata.
+
+    Parquet gets one row group per user (``build_features`` can then read
+    single users cheaply through row-group statistics); CSV is appended per
+    user. Both are written to temporary names and renamed when complete.
+    """
+    parquet_path = outdir / "synthetic_timeseries.parquet"
+    csv_path = outdir / "synthetic_timeseries.csv"
+    parquet_tmp = parquet_path.with_name(parquet_path.name + ".tmp")
+    csv_tmp = csv_path.with_name(csv_path.name + ".tmp")
+
+    writer: pq.ParquetWriter | None = None
+    csv_file = csv_tmp.open("w", newline="") if "csv" in formats else None
+    profiles: list[UserProfile] = []
+    rows = 0
+    try:
+        for profile, frame in iter_spawned_users(users, days, seed, workers):
+            profiles.append(profile)
+            rows += len(frame)
+            if "parquet" in formats:
+                if writer is None:
+                    table = pa.Table.from_pandas(frame, preserve_index=False)
+                    writer = pq.ParquetWriter(parquet_tmp, table.schema)
+                else:
+                    table = pa.Table.from_pandas(frame, schema=writer.schema, preserve_index=False)
+                writer.write_table(table)
+            if csv_file is not None:
+                frame.to_csv(csv_file, header=len(profiles) == 1, index=False)
+    finally:
+        if writer is not None:
+            writer.close()
+        if csv_file is not None:
+            csv_file.close()
+
+    if writer is not None:
+        parquet_tmp.replace(parquet_path)
+    if csv_file is not None:
+        csv_tmp.replace(csv_path)
+    return build_metadata(users, days, seed, rows, profiles)
 
 
 def main() -> None:
@@ -258,19 +417,30 @@ def main() -> None:
     outdir = args.outdir.resolve()
     outdir.mkdir(parents=True, exist_ok=True)
 
-    dataset, metadata = generate_dataset(args.users, args.days, args.seed, outdir)
-
     parquet_path = outdir / "synthetic_timeseries.parquet"
     csv_path = outdir / "synthetic_timeseries.csv"
     meta_path = outdir / "metadata.json"
 
-    dataset.to_parquet(parquet_path, index=False)
-    dataset.to_csv(csv_path, index=False)
+    started = time.perf_counter()
+    if args.legacy:
+        dataset, metadata = generate_dataset(args.users, args.days, args.seed, outdir, legacy=True)
+        if "parquet" in args.formats:
+            dataset.to_parquet(parquet_path, index=False)
+        if "csv" in args.formats:
+            dataset.to_csv(csv_path, index=False)
+    else:
+        metadata = write_dataset(args.users, args.days, args.seed, outdir, args.workers, tuple(args.formats))
     meta_path.write_text(json.dumps(metadata, indent=2))
+    elapsed = time.perf_counter() - started
 
-    print(f"✅ Created {len(dataset):,} rows for {args.users} users over {args.days} days")
-    print(f"   • Parquet:  {parquet_path}")
-    print(f"   • CSV:      {csv_path}")
+    print(
+        f"✅ Created {metadata['rows']:,} rows for {args.users} users over {args.days} days "
+        f"in {elapsed:.2f}s ({metadata['rows'] / elapsed:,.0f} rows/s)"
+    )
+    if "parquet" in args.formats:
+        print(f"   • Parquet:  {parquet_path}")
+    if "csv" in args.formats:
+        print(f"   • CSV:      {csv_path}")
     print(f"   • Metadata: {meta_path}")
 
 
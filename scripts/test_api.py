@@ -4,6 +4,7 @@ from __future__ import annotations
 
 from pathlib import Path
 import sys
+import time
 
 import pandas as pd
 from fastapi.testclient import TestClient
@@ -29,19 +30,35 @@ def load_samples(user_id: str | None = None, limit: int = 60) -> list[dict]:
     return records
 
 
+def to_payload(record: dict) -> dict:
+    return {**record, "timestamp": pd.to_datetime(record["timestamp"]).isoformat()}
+
+
+def wait_until_ready(client: TestClient, timeout: float = 30.0) -> dict:
+    """Poll /health until the startup task has loaded the model."""
+    deadline = time.monotonic() + timeout
+    while True:
+        health = client.get("/health").json()
+        if health["ready"] or health["startup"]["status"] == "failed" or time.monotonic() > deadline:
+            return health
+        time.sleep(0.05)
+
+
 def main() -> None:
-    client = TestClient(app)
+    with TestClient(app) as client:
+        health = wait_until_ready(client)
+        print("Startup:", health["startup"])
+        run_smoke(client)
+
+
+def run_smoke(client: TestClient) -> None:
     records = load_samples(limit=90)
     headers = {"X-API-Key": settings.api_token}
 
     print(f"Sending {len(records)} events...")
     last_response = None
     for record in records:
-        payload = {
-            **record,
-            "timestamp": pd.to_datetime(record["timestamp"]).isoformat(),
-        }
-        resp = client.post("/ingest", json=payload, headers=headers)
+        resp = client.post("/ingest", json=to_payload(record), headers=headers)
         resp.raise_for_status()
         last_response = resp.json()
     print("Last ingest response:", last_response)
@@ -59,6 +76,11 @@ def main() -> None:
     coach.raise_for_status()
     print("Coach response:", coach.json())
 
+    batch = load_samples(user_id="user_001", limit=90)
+    resp = client.post("/ingest/batch", json=[to_payload(record) for record in batch], headers=headers)
+    resp.raise_for_status()
+    print("Batch ingest response:", resp.json())
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,196 @@
+"""Checks that the sharded feature builder matches the single-process one."""
+
+from __future__ import annotations
+
+from dataclasses import replace
+from pathlib import Path
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from scripts import build_features
+from scripts.bench_future_targets import legacy_minutes_until
+from scripts.build_features import (
+    add_context_flags,
+    add_time_features,
+    build_feature_table,
+    build_incremental,
+    build_sharded,
+    build_streaming,
+    compile_plan,
+    compute_future_targets,
+    iter_user_batches,
+    load_dataset,
+    load_shard,
+    pipeline_fingerprint,
+    shard_users,
+    split_input,
+)
+
+DATA_PATH = ROOT / "data/synthetic_timeseries.parquet"
+MIN_HISTORY = 360
+
+
+def test_sharded_build_matches_single_process(tmp_path: Path) -> None:
+    expected = build_feature_table(load_dataset(DATA_PATH), MIN_HISTORY)
+
+    _, gathered = build_sharded(DATA_PATH, 2, MIN_HISTORY, None, None)
+    pd.testing.assert_frame_equal(gathered, expected, check_exact=True)
+
+    rows, _ = build_sharded(DATA_PATH, 2, MIN_HISTORY, None, tmp_path / "features")
+    assert rows == len(load_dataset(DATA_PATH))
+    partitioned = pd.read_parquet(tmp_path / "features")
+    pd.testing.assert_frame_equal(partitioned, expected, check_exact=True)
+
+
+def test_split_input_hands_each_shard_only_its_rows(tmp_path: Path) -> None:
+    raw = load_dataset(DATA_PATH)
+    csv_path = tmp_path / "shuffled.csv"
+    # Users interleaved across 1000-row chunks, so every read feeds several shards.
+    shuffled = raw.sample(frac=1.0, random_state=0).reset_index(drop=True)
+    # A blank first chunk parses as float; shards must not fix that type for later rows.
+    shuffled.loc[:999, "weather_condition"] = np.nan
+    shuffled.to_csv(csv_path, index=False)
+    shards = shard_users(sorted(raw["user_id"].unique()), 3)
+
+    paths = split_input(csv_path, shards, tmp_path, chunk_rows=1000)
+    parts = [load_shard(path) for path in paths]
+    assert [sorted(part["user_id"].unique()) for part in parts] == shards
+    pd.testing.assert_frame_equal(pd.concat(parts, ignore_index=True), load_dataset(csv_path), check_exact=True)
+
+
+def test_streaming_build_matches_in_memory(tmp_path: Path) -> None:
+    expected = build_feature_table(load_dataset(DATA_PATH), MIN_HISTORY)
+
+    rows = build_streaming(DATA_PATH, tmp_path / "features.parquet", MIN_HISTORY, None, users_per_batch=2)
+    assert rows == len(load_dataset(DATA_PATH))
+    streamed = pd.read_parquet(tmp_path / "features.parquet")
+    pd.testing.assert_frame_equal(streamed, expected, check_exact=True)
+
+    # A first user too short for MIN_HISTORY yields an empty batch, which must not fix the schema.
+    raw = load_dataset(DATA_PATH)
+    short = raw[raw["user_id"] == "user_001"].head(MIN_HISTORY // 2).assign(user_id="user_", migraine_label=0)
+    short_path = tmp_path / "short_first.parquet"
+    pd.concat([short, raw], ignore_index=True).to_parquet(short_path, index=False)
+    for users_per_batch in (1, 2):
+        build_streaming(short_path, tmp_path / "short.parquet", MIN_HISTORY, None, users_per_batch)
+        pd.testing.assert_frame_equal(pd.read_parquet(tmp_path / "short.parquet"), expected, check_exact=True)
+
+
+def test_user_batches_read_the_file_once_in_chunks(tmp_path: Path) -> None:
+    expected = load_dataset(DATA_PATH)
+    csv_path = tmp_path / "raw.csv"
+    expected.to_csv(csv_path, index=False)
+    # 1000-row chunks end mid-user, so users are carried across reads.
+    for path in (DATA_PATH, csv_path):
+        batches = list(iter_user_batches(path, users_per_batch=2, chunk_rows=1000))
+        assert [batch["user_id"].nunique() for batch in batches] == [2, 2, 1]
+        pd.testing.assert_frame_equal(pd.concat(batches, ignore_index=True), load_dataset(path), check_exact=True)
+
+    shuffled = tmp_path / "shuffled.parquet"
+    expected.sample(frac=1.0, random_state=0).to_parquet(shuffled, index=False)
+    with pytest.raises(ValueError, match="not grouped by user_id"):
+        list(iter_user_batches(shuffled, users_per_batch=1, chunk_rows=1000))
+
+
+def test_feature_steps_default_to_every_spec() -> None:
+    raw = load_dataset(DATA_PATH).head(500)
+    plan = compile_plan()
+    flags = [step for step in plan.steps if step.kind in ("flag", "count")]
+    expected = add_context_flags(add_time_features(raw, plan.of_kind("time")), flags)
+    pd.testing.assert_frame_equal(add_context_flags(add_time_features(raw)), expected, check_exact=True)
+    assert {step.name for step in plan.of_kind("time")} <= set(expected.columns)
+    assert list(raw.columns) == list(load_dataset(DATA_PATH).columns)
+
+
+def test_future_targets_match_legacy_loop() -> None:
+    raw = load_dataset(DATA_PATH)
+    # Shuffle rows so users are interleaved, as the groupby-based loop allows.
+    shuffled = raw.sample(frac=1.0, random_state=0).reset_index(drop=True)
+    for df in (raw, shuffled):
+        expected = legacy_minutes_until(df)
+        actual = compute_future_targets(df)["minutes_until_migraine"].to_numpy()
+        np.testing.assert_array_equal(actual, expected)
+
+
+def test_future_targets_by_timestamp_skip_gaps() -> None:
+    timestamps = pd.to_datetime(
+        ["2025-01-01 00:00", "2025-01-01 00:01", "2025-01-01 00:10", "2025-01-01 00:00", "2025-01-01 00:30"],
+        utc=True,
+    )
+    df = pd.DataFrame(
+        {
+            "user_id": ["a", "a", "a", "b", "b"],
+            "timestamp": timestamps,
+            "migraine_label": [0, 0, 1, 0, 0],
+        }
+    )
+    by_rows = compute_future_targets(df)["minutes_until_migraine"].to_numpy()
+    by_time = compute_future_targets(df, use_timestamps=True)["minutes_until_migraine"].to_numpy()
+    np.testing.assert_array_equal(by_rows, [2.0, 1.0, 0.0, np.nan, np.nan])
+    np.testing.assert_array_equal(by_time, [10.0, 9.0, 0.0, np.nan, np.nan])
+
+
+def test_incremental_build_only_rebuilds_changed_users(tmp_path: Path) -> None:
+    raw_path = tmp_path / "raw.parquet"
+    output = tmp_path / "features"
+    raw = pd.read_parquet(DATA_PATH)
+    raw.to_parquet(raw_path, index=False)
+
+    assert build_incremental(raw_path, output, MIN_HISTORY, None)[1:] == (5, 5)
+    assert build_incremental(raw_path, output, MIN_HISTORY, None)[1:] == (5, 0)
+
+    # Edit one user, append a minute to another and drop a third.
+    changed = raw.copy()
+    changed.loc[changed["user_id"] == "user_000", "heart_rate"] += 1.0
+    extra = changed[changed["user_id"] == "user_001"].tail(1).copy()
+    extra["timestamp"] = extra["timestamp"] + pd.Timedelta(minutes=1)
+    changed = pd.concat([changed[changed["user_id"] != "user_004"], extra], ignore_index=True)
+    changed.to_parquet(raw_path, index=False)
+
+    assert build_incremental(raw_path, output, MIN_HISTORY, None)[1:] == (4, 2)
+    assert not (output / "part-user_004.parquet").exists()
+    expected = build_feature_table(load_dataset(raw_path), MIN_HISTORY)
+    pd.testing.assert_frame_equal(pd.read_parquet(output), expected, check_exact=True)
+
+
+def test_pipeline_fingerprint_tracks_the_plan_not_the_source(monkeypatch: pytest.MonkeyPatch) -> None:
+    plan = compile_plan()
+    fingerprint = pipeline_fingerprint(plan, MIN_HISTORY, False)
+    assert pipeline_fingerprint(None, MIN_HISTORY, False) == fingerprint
+    # Edits to comments, the CLI or logging leave the fingerprint alone; only the plan,
+    # the options and PIPELINE_VERSION change it.
+    flag = next(step for step in plan.steps if step.kind == "flag")
+    retuned = replace(plan, steps=tuple(replace(s, threshold=1) if s is flag else s for s in plan.steps))
+    assert pipeline_fingerprint(retuned, MIN_HISTORY, False) != fingerprint
+    assert pipeline_fingerprint(compile_plan(plan.features[:3]), MIN_HISTORY, False) != fingerprint
+    assert pipeline_fingerprint(plan, MIN_HISTORY, True) != fingerprint
+    monkeypatch.setattr(build_features, "PIPELINE_VERSION", build_features.PIPELINE_VERSION + 1)
+    assert pipeline_fingerprint(plan, MIN_HISTORY, False) != fingerprint
+
+
+def main() -> None:
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_sharded_build_matches_single_process(Path(tmp))
+        test_split_input_hands_each_shard_only_its_rows(Path(tmp))
+        test_streaming_build_matches_in_memory(Path(tmp))
+        test_user_batches_read_the_file_once_in_chunks(Path(tmp))
+        test_incremental_build_only_rebuilds_changed_users(Path(tmp))
+    test_feature_steps_default_to_every_spec()
+    test_future_targets_match_legacy_loop()
+    test_future_targets_by_timestamp_skip_gaps()
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_pipeline_fingerprint_tracks_the_plan_not_the_source(monkeypatch)
+    print("✅ Sharded and streaming feature builds match the single-process build")
+
+
+if __name__ == "__main__":
+    main()
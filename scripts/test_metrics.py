@@ -0,0 +1,119 @@
+"""Checks for the metrics registry and the /metrics endpoint."""
+
+from __future__ import annotations
+
+from pathlib import Path
+import sys
+import time
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+import backend.app as service
+from backend.metrics import NULL_METRIC, MetricsRegistry
+
+RAW = ROOT / "data/synthetic_timeseries.parquet"
+
+
+def sample_value(text: str, sample: str) -> float:
+    for line in text.splitlines():
+        if line.startswith(sample + " "):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{sample} not in metrics output")
+
+
+def test_registry_renders_prometheus_text() -> None:
+    registry = MetricsRegistry(prefix="t_")
+    hits = registry.counter("lookups_total", "Lookups", result="hit")
+    registry.counter("lookups_total", "Lookups", result="miss")
+    registry.gauge("size", "Size", fn=lambda: 3)
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    hits.inc(2)
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(5.0)
+
+    text = registry.render()
+    assert "# TYPE t_lookups_total counter" in text
+    assert sample_value(text, 't_lookups_total{result="hit"}') == 2
+    assert sample_value(text, 't_lookups_total{result="miss"}') == 0
+    assert sample_value(text, "t_size") == 3
+    assert sample_value(text, 't_latency_seconds_bucket{le="0.1"}') == 1
+    assert sample_value(text, 't_latency_seconds_bucket{le="1.0"}') == 2
+    assert sample_value(text, 't_latency_seconds_bucket{le="+Inf"}') == 3
+    assert sample_value(text, "t_latency_seconds_count") == 3
+    with pytest.raises(ValueError):
+        registry.gauge("lookups_total", "Lookups")
+
+    disabled = MetricsRegistry(enabled=False)
+    assert disabled.histogram("latency_seconds", "Latency") is NULL_METRIC
+    with disabled.histogram("latency_seconds", "Latency").time():
+        pass
+    assert disabled.render() == ""
+
+
+def test_metrics_endpoint_reports_hot_path_stages(monkeypatch: pytest.MonkeyPatch) -> None:
+    df = pd.read_parquet(RAW)
+    df = df[df["user_id"] == "user_002"].sort_values("timestamp").head(5)
+    records = [{**record, "timestamp": pd.Timestamp(record["timestamp"]).isoformat()} for record in df.to_dict("records")]
+    headers = {"X-API-Key": service.settings.api_token}
+    try:
+        _check_metrics_endpoint(records, headers, monkeypatch)
+    finally:
+        # Forget the user again so tests that count tracked users are unaffected.
+        for state in (service.EVENT_STORE, service.FEATURE_CACHE, service.FEATURE_ENGINES, service.CIRCADIAN_BASELINES):
+            state.pop("user_002", None)
+        service.DIRTY_USERS.discard("user_002")
+
+
+def _check_metrics_endpoint(records: list[dict], headers: dict, monkeypatch: pytest.MonkeyPatch) -> None:
+    with TestClient(service.app) as client:
+        deadline = time.monotonic() + 30
+        while not client.get("/health").json()["ready"] and time.monotonic() < deadline:
+            time.sleep(0.05)
+        before = client.get("/metrics").text
+        client.post("/ingest/batch", json=records[:4], headers=headers).raise_for_status()
+        client.post("/ingest", json=records[4], headers=headers).raise_for_status()
+        client.get("/predict/user_002", headers=headers).raise_for_status()
+        client.get("/predict/metrics_unknown_user", headers=headers)
+
+        response = client.get("/metrics")
+        assert response.status_code == 200 and response.headers["content-type"].startswith("text/plain")
+        text = response.text
+
+        def delta(sample: str) -> float:
+            return sample_value(text, sample) - sample_value(before, sample)
+
+        assert delta("headstart_ingest_requests_total") == 2
+        assert delta("headstart_ingested_events_total") == 5
+        assert delta('headstart_prediction_cache_lookups_total{result="hit"}') == 1
+        assert delta('headstart_prediction_cache_lookups_total{result="miss"}') == 1
+        for stage in ("lock_wait", "feature_update", "feature_vector", "predict", "insights", "executor_wait"):
+            assert delta(f'headstart_stage_seconds_count{{stage="{stage}"}}') >= 1, stage
+        assert sample_value(text, "headstart_users_tracked") >= 1
+        assert sample_value(text, "headstart_event_store_bytes") > 0
+        baseline_bytes = service.CIRCADIAN_BASELINES["user_002"].nbytes
+        assert 0 < baseline_bytes < 20_000  # 5-minute slots, not 1440 per day
+        assert sample_value(text, "headstart_circadian_baseline_bytes") >= baseline_bytes
+        health = client.get("/health").json()
+        assert health["circadian_baseline_bytes"] >= baseline_bytes
+        assert health["state_bytes_per_user"] > health["event_store_bytes_per_user"]
+
+        monkeypatch.setattr(service.METRICS, "enabled", False)
+        assert client.get("/metrics").status_code == 404
+
+
+def main() -> None:
+    test_registry_renders_prometheus_text()
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_metrics_endpoint_reports_hot_path_stages(monkeypatch)
+    print("✅ Metrics render as Prometheus text and cover the ingest hot path")
+
+
+if __name__ == "__main__":
+    main()
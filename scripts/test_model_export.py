@@ -0,0 +1,48 @@
+"""Check that the scaler-free booster export reproduces the scaler + model pair."""
+
+from __future__ import annotations
+
+from pathlib import Path
+import json
+import sys
+
+import joblib
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from backend.booster import RawBooster
+from models.train import EXPORT_TOLERANCE, export_booster, load_features, prepare_data
+
+MODELS = ROOT / "models"
+
+
+def test_exported_booster_matches_scaler_and_model(tmp_path: Path) -> None:
+    clf = joblib.load(MODELS / "model.pkl")
+    scaler = joblib.load(MODELS / "scaler.pkl")
+    features = json.loads((MODELS / "feature_metadata.json").read_text())["features"]
+    data, _, _, _ = prepare_data(load_features(ROOT / "data/features.parquet"))
+
+    path = tmp_path / "model.txt"
+    export_booster(clf, scaler, features, data, path)
+
+    raw = data[features].to_numpy(dtype=float)
+    expected = clf.predict_proba(scaler.transform(raw))[:, 1]
+    booster = RawBooster(path, features)
+    np.testing.assert_allclose(booster.predict_matrix(raw), expected, rtol=0, atol=EXPORT_TOLERANCE)
+    singles = np.array([booster.predict_row(row) for row in raw[:200]])
+    np.testing.assert_allclose(singles, expected[:200], rtol=0, atol=EXPORT_TOLERANCE)
+
+
+def main() -> None:
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_exported_booster_matches_scaler_and_model(Path(tmp))
+    print("✅ Exported booster matches scaler + model")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""Checks for hot model reload: validation, atomic swap, rescoring and version reporting."""
+
+from __future__ import annotations
+
+from argparse import Namespace
+from pathlib import Path
+import json
+import shutil
+import sys
+import threading
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+import backend.app as service
+from models.train import NUM_BOOST_ROUND, train_lean
+
+FEATURES = ROOT / "data/features.parquet"
+RAW = ROOT / "data/synthetic_timeseries.parquet"
+ADMIN = {"X-Admin-Token": "test-admin"}
+
+
+def payloads(user_id: str, limit: int) -> list[dict]:
+    df = pd.read_parquet(RAW)
+    df = df[df["user_id"] == user_id].sort_values("timestamp").head(limit)
+    return [{**record, "timestamp": pd.Timestamp(record["timestamp"]).isoformat()} for record in df.to_dict("records")]
+
+
+def train_candidate(directory: Path, features: Path = FEATURES) -> None:
+    directory.mkdir()
+    args = Namespace(
+        features=features,
+        booster=directory / "model.txt",
+        feature_metadata=directory / "feature_metadata.json",
+        metrics=directory / "metrics.json",
+        test_ratio=0.2,
+        seed=7,
+        threshold=0.5,
+        dataset_cache=None,
+        max_latency_us=None,
+    )
+    train_lean(args, {"num_leaves": 7}, NUM_BOOST_ROUND // 4)
+
+
+def test_reload_swaps_model_and_rescores_cached_users(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(service.settings, "admin_token", "test-admin")
+    client = TestClient(service.app)
+    headers = {"X-API-Key": service.settings.api_token}
+    original = (service.MODEL_BUNDLE or service.load_model()).version
+
+    for user_id in ("user_000", "user_001"):
+        client.post("/ingest/batch", json=payloads(user_id, 30), headers=headers).raise_for_status()
+    before = client.get("/predict/user_000", headers=headers).json()
+    assert before["model_version"] == original
+    assert client.get("/health").json()["model_version"] == original
+
+    assert client.post("/admin/model/reload", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    assert client.post("/admin/model/reload").status_code == 403
+    rejected = client.post("/admin/model/reload", json={"directory": str(tmp_path / "missing")}, headers=ADMIN)
+    assert rejected.status_code == 422 and original in rejected.json()["detail"]
+    assert service.MODEL_BUNDLE.version == original
+
+    # Unchanged artifacts are a no-op rather than a swap.
+    assert client.post("/admin/model/reload", headers=ADMIN).json()["status"] == "unchanged"
+
+    candidate = tmp_path / "v2"
+    train_candidate(candidate)
+    try:
+        result = client.post("/admin/model/reload", json={"directory": str(candidate)}, headers=ADMIN).json()
+        assert result["status"] == "reloaded" and result["previous_version"] == original
+        assert result["rescored_users"] == 2 and not service.DIRTY_USERS
+        new_version = result["model_version"]
+        assert client.get("/health").json()["model_version"] == new_version
+
+        after = client.get("/predict/user_000", headers=headers).json()
+        assert after["model_version"] == new_version
+        assert after["probability"] != before["probability"]
+        ingest = client.post("/ingest", json=payloads("user_000", 31)[-1], headers=headers).json()
+        assert ingest["model_version"] == new_version
+    finally:
+        client.post("/admin/model/reload", json={"directory": None}, headers=ADMIN).raise_for_status()
+    assert service.MODEL_BUNDLE.version == original
+
+
+def test_reload_rejects_features_the_engines_cannot_compute(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(service.settings, "admin_token", "test-admin")
+    candidate = tmp_path / "bad"
+    candidate.mkdir()
+    shutil.copy(service.settings.booster_path, candidate / "model.txt")
+    meta = json.loads(service.settings.feature_metadata_path.read_text())
+    meta["features"] = [*meta["features"][:-1], "not_a_feature"]
+    (candidate / "feature_metadata.json").write_text(json.dumps(meta))
+
+    response = TestClient(service.app).post("/admin/model/reload", json={"directory": str(candidate)}, headers=ADMIN)
+    assert response.status_code == 422 and "not_a_feature" in response.json()["detail"]
+
+
+def test_reload_with_new_features_prebuilds_engines_off_the_loop(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(service.settings, "admin_token", "test-admin")
+    dropped = [name for name in pd.read_parquet(FEATURES).columns if name.endswith("_circadian_delta")]
+    assert dropped
+    pd.read_parquet(FEATURES).drop(columns=dropped).to_parquet(tmp_path / "features.parquet")
+    candidate = tmp_path / "fewer"
+    train_candidate(candidate, tmp_path / "features.parquet")
+
+    client = TestClient(service.app)
+    headers = {"X-API-Key": service.settings.api_token}
+    if service.MODEL_BUNDLE is None:
+        service.load_model()
+    for user_id in ("user_003", "user_004"):
+        client.post("/ingest/batch", json=payloads(user_id, 40), headers=headers).raise_for_status()
+    old_engines = {user_id: service.FEATURE_ENGINES[user_id] for user_id in ("user_003", "user_004")}
+
+    replay_threads: list[str] = []
+    replay = service._replay_engine
+
+    def recording_replay(*args):
+        replay_threads.append(threading.current_thread().name)
+        return replay(*args)
+
+    monkeypatch.setattr(service, "_replay_engine", recording_replay)
+    try:
+        result = client.post("/admin/model/reload", json={"directory": str(candidate)}, headers=ADMIN).json()
+        assert result["status"] == "reloaded"
+        assert set(dropped).isdisjoint(service.MODEL_BUNDLE.features)
+        for user_id, old in old_engines.items():
+            # Swapped in with the model, already replayed for the new plan.
+            engine = service.FEATURE_ENGINES[user_id]
+            assert engine is not old and len(engine) == 40
+            assert set(engine.features()).isdisjoint(dropped)
+        assert len(replay_threads) >= 2 and all(name.startswith("asyncio_") for name in replay_threads)
+    finally:
+        client.post("/admin/model/reload", json={"directory": None}, headers=ADMIN).raise_for_status()
+        for state in (service.EVENT_STORE, service.FEATURE_CACHE, service.FEATURE_ENGINES, service.CIRCADIAN_BASELINES):
+            for user_id in old_engines:
+                state.pop(user_id, None)
+        service.DIRTY_USERS.difference_update(old_engines)
+
+
+def main() -> None:
+    import tempfile
+
+    with pytest.MonkeyPatch.context() as monkeypatch, tempfile.TemporaryDirectory() as tmp:
+        test_reload_swaps_model_and_rescores_cached_users(Path(tmp), monkeypatch)
+    with pytest.MonkeyPatch.context() as monkeypatch, tempfile.TemporaryDirectory() as tmp:
+        test_reload_rejects_features_the_engines_cannot_compute(Path(tmp), monkeypatch)
+    with pytest.MonkeyPatch.context() as monkeypatch, tempfile.TemporaryDirectory() as tmp:
+        test_reload_with_new_features_prebuilds_engines_off_the_loop(Path(tmp), monkeypatch)
+    print("✅ Model reload validates, swaps atomically and rescores cached users")
+
+
+if __name__ == "__main__":
+    main()
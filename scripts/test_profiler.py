@@ -0,0 +1,112 @@
+"""Checks for the on-demand stack sampler and the /admin/profile endpoint."""
+
+from __future__ import annotations
+
+from pathlib import Path
+import sys
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+import backend.app as service
+from backend.profiler import StackSampler
+
+ADMIN = {"X-Admin-Token": "test-admin"}
+
+
+def spin(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sampler_collapses_stacks_per_thread() -> None:
+    stop = threading.Event()
+    worker = threading.Thread(target=spin, args=(stop,), name="busy worker")
+    worker.start()
+    try:
+        sampler = StackSampler(0.2, 0.005, {threading.get_ident(): "main"}).run()
+    finally:
+        stop.set()
+        worker.join()
+
+    assert sampler.samples > 10
+    lines = sampler.collapsed().splitlines()
+    assert all(int(line.rsplit(" ", 1)[1]) > 0 for line in lines)
+    busy = [line for line in lines if line.startswith("busy_worker;")]
+    assert busy and any(f"{__name__}:spin" in line for line in busy)
+    # run() samples from the calling thread, which leaves itself out.
+    assert not any(line.startswith("main;") for line in lines)
+
+
+def test_timer_signal_samples_busy_main_thread_code() -> None:
+    if not StackSampler.signals_available():
+        pytest.skip("interval timers need the main thread on a POSIX platform")
+    sampler = StackSampler(0.3, 0.005, {threading.get_ident(): "main"})
+    stop = threading.Event()
+    with sampler.timer_signal():
+        threading.Timer(0.3, stop.set).start()
+        spin(stop)
+
+    assert sampler.samples > 10
+    lines = sampler.collapsed().splitlines()
+    spinning = sum(int(line.rsplit(" ", 1)[1]) for line in lines if line.startswith("main;") and ":spin" in line)
+    assert spinning > sampler.samples // 2
+
+
+def test_sampling_takes_no_thread_registry_lock() -> None:
+    # The SIGALRM handler can interrupt the main thread inside Thread.start(), which
+    # holds this non-reentrant lock; sampling must not wait for it.
+    sampler = StackSampler(0.1)
+    running, go, done = threading.Event(), threading.Event(), threading.Event()
+
+    def sample() -> None:
+        # Past its own bootstrap, which also takes the lock.
+        running.set()
+        go.wait()
+        sampler.sample_once(sys._getframe())
+        done.set()
+
+    worker = threading.Thread(target=sample, name="sampler")
+    worker.start()
+    assert running.wait(2)
+    with threading._active_limbo_lock:  # type: ignore[attr-defined]
+        go.set()
+        assert done.wait(2)
+    worker.join()
+    assert any(line.startswith("MainThread;") for line in sampler.collapsed().splitlines())
+
+
+def test_profile_endpoint_requires_admin_and_returns_collapsed_stacks(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(service.settings, "admin_token", "test-admin")
+    client = TestClient(service.app)
+    assert client.post("/admin/profile", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    assert client.post("/admin/profile").status_code == 403
+    assert client.post("/admin/profile?seconds=0", headers=ADMIN).status_code == 422
+
+    started = time.perf_counter()
+    response = client.post("/admin/profile?seconds=0.2&interval_ms=5", headers=ADMIN)
+    assert response.status_code == 200 and response.headers["content-type"].startswith("text/plain")
+    assert time.perf_counter() - started >= 0.2
+    assert int(response.headers["X-Profile-Samples"]) > 0
+    lines = response.text.splitlines()
+    assert lines and all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert any(line.startswith("event-loop;") for line in lines)
+
+
+def main() -> None:
+    test_sampler_collapses_stacks_per_thread()
+    test_timer_signal_samples_busy_main_thread_code()
+    test_sampling_takes_no_thread_registry_lock()
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_profile_endpoint_requires_admin_and_returns_collapsed_stacks(monkeypatch)
+    print("✅ Stack sampler profiles live threads and /admin/profile returns collapsed stacks")
+
+
+if __name__ == "__main__":
+    main()
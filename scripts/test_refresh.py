@@ -0,0 +1,82 @@
+"""Checks for the dirty-set refresh sweep racing with ingest."""
+
+from __future__ import annotations
+
+from pathlib import Path
+import asyncio
+import sys
+import threading
+
+import pandas as pd
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+import backend.app as service
+
+RAW = ROOT / "data/synthetic_timeseries.parquet"
+USERS = {"unscored": "sweep_unscored", "scored": "sweep_scored"}
+
+
+def records(source: str, user_id: str, limit: int) -> list[dict]:
+    df = pd.read_parquet(RAW)
+    df = df[df["user_id"] == source].sort_values("timestamp").head(limit)
+    return [{**record, "user_id": user_id} for record in df.to_dict("records")]
+
+
+def test_ingest_during_sweep_keeps_newer_prediction_and_dirty_user(monkeypatch: pytest.MonkeyPatch) -> None:
+    if service.MODEL_BUNDLE is None:
+        service.load_model()
+    streams = {user_id: records("user_005", user_id, 31) for user_id in USERS.values()}
+    sweep_started, release_sweep = threading.Event(), threading.Event()
+    score_matrix = service._score_feature_matrix
+
+    def blocking_score_matrix(*args):
+        sweep_started.set()
+        assert release_sweep.wait(10)
+        return score_matrix(*args)
+
+    async def scenario() -> dict[str, int]:
+        for user_id, stream in streams.items():
+            service._append_events(user_id, stream[:30])
+        swept = {user_id: service.EVENT_VERSIONS[user_id] for user_id in USERS.values()}
+        monkeypatch.setattr(service, "_score_feature_matrix", blocking_score_matrix)
+        sweep = asyncio.create_task(service._refresh_all())
+        while not sweep_started.is_set():
+            await asyncio.sleep(0.001)
+
+        # Both users get a newer sample while the sweep's batch is being scored; only one is scored now.
+        for user_id in USERS.values():
+            service._append_events(user_id, streams[user_id][30:])
+        await service._update_prediction(USERS["scored"])
+        release_sweep.set()
+        await sweep
+        return swept
+
+    try:
+        swept = asyncio.run(scenario())
+        unscored, scored = USERS["unscored"], USERS["scored"]
+        # The sweep's result is stored, but it predates the last sample, so the user stays dirty.
+        assert service.FEATURE_CACHE[unscored]["version"] == swept[unscored]
+        assert service.EVENT_VERSIONS[unscored] == swept[unscored] + 1
+        assert unscored in service.DIRTY_USERS
+        # The ingest-time prediction is newer than the sweep's, which arrives later and is dropped.
+        assert service.FEATURE_CACHE[scored]["version"] == service.EVENT_VERSIONS[scored] == swept[scored] + 1
+        assert scored not in service.DIRTY_USERS
+    finally:
+        for state in (service.EVENT_STORE, service.FEATURE_CACHE, service.FEATURE_ENGINES, service.CIRCADIAN_BASELINES):
+            for user_id in USERS.values():
+                state.pop(user_id, None)
+        service.DIRTY_USERS.difference_update(USERS.values())
+
+
+def main() -> None:
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_ingest_during_sweep_keeps_newer_prediction_and_dirty_user(monkeypatch)
+    print("✅ Refresh sweep keeps newer predictions and re-dirtied users")
+
+
+if __name__ == "__main__":
+    main()
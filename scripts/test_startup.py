@@ -0,0 +1,66 @@
+"""Checks for fast API cold start: a lean import graph, the readiness state and /health load stats."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import json
+import subprocess
+import sys
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+import backend.app as service
+from scripts.bench_startup import HEAVY_MODULES, IMPORT_PROBE
+
+
+def test_importing_the_app_skips_heavy_modules() -> None:
+    out = subprocess.run([sys.executable, "-c", IMPORT_PROBE], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert json.loads(out.stdout.strip().splitlines()[-1])["heavy"] == []
+    assert "pandas" in HEAVY_MODULES
+
+
+def test_ingest_is_unavailable_until_startup_is_ready(monkeypatch: pytest.MonkeyPatch) -> None:
+    with TestClient(service.app) as client:
+        deadline = time.monotonic() + 30
+        while not client.get("/health").json()["ready"] and time.monotonic() < deadline:
+            time.sleep(0.05)
+        health = client.get("/health").json()
+        assert health["ready"] and health["model_version"] == service.MODEL_BUNDLE.version
+        assert client.get("/ready").status_code == 200
+        assert health["rss_bytes"] > 0 and health["startup"]["rss_bytes_at_ready"] > 0
+        assert set(health["event_loop_lag"]) == {"samples", "avg_ms", "max_ms", "recent_p99_ms"}
+
+        monkeypatch.setitem(service.SERVICE_STATE, "status", "starting")
+        assert client.get("/health").json()["ready"] is False
+        assert client.get("/ready").status_code == 503
+        response = client.post("/ingest", json={}, headers={"X-API-Key": service.settings.api_token})
+        assert response.status_code == 503 and response.headers["Retry-After"] == "1"
+
+
+def test_timestamps_are_normalised_to_utc_without_pandas() -> None:
+    skip = ("user_id", "timestamp", "weather_condition")
+    fields = {name: 0.0 for name in service.IngestPayload.model_fields if name not in skip}
+    naive = service.IngestPayload(user_id="u", timestamp="2025-11-13T03:19:00", **fields)
+    offset = service.IngestPayload(user_id="u", timestamp="2025-11-13T05:19:00+02:00", **fields)
+    expected = datetime(2025, 11, 13, 3, 19, tzinfo=timezone.utc)
+    assert naive.timestamp == offset.timestamp == expected
+    assert offset.timestamp.utcoffset() == timedelta(0)
+
+
+def main() -> None:
+    test_importing_the_app_skips_heavy_modules()
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_ingest_is_unavailable_until_startup_is_ready(monkeypatch)
+    test_timestamps_are_normalised_to_utc_without_pandas()
+    print("✅ App imports without heavy modules and gates ingest on readiness")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Checks for the columnar per-user ring buffer against a list-based reference."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import random
+import sys
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from backend.store import WEATHER_CONDITIONS, UserEventBuffer, encode_weather, to_epoch_minutes
+from backend.streaming import SIGNAL_COLUMNS
+
+CAPACITY = 16
+ORIGIN = datetime(2025, 11, 12, tzinfo=timezone.utc)
+
+
+def make_record(minute: int, rng: random.Random) -> dict:
+    return {
+        "timestamp": ORIGIN + timedelta(minutes=minute),
+        "weather_condition": rng.choice([*WEATHER_CONDITIONS, "hail"]),
+        # Quarter steps are exact in float32, so values compare exactly.
+        **{column: rng.randrange(-400, 400) / 4 for column in SIGNAL_COLUMNS},
+    }
+
+
+def assert_matches(buffer: UserEventBuffer, reference: list[dict]) -> None:
+    assert len(buffer) == len(reference)
+    np.testing.assert_array_equal(buffer.timestamps(), [to_epoch_minutes(r["timestamp"]) for r in reference])
+    np.testing.assert_array_equal(buffer.signals(), [[r[c] for r in reference] for c in SIGNAL_COLUMNS])
+    np.testing.assert_array_equal(buffer.signal("hrv"), [r["hrv"] for r in reference])
+    np.testing.assert_array_equal(buffer.weather_codes(), [encode_weather(r["weather_condition"]) for r in reference])
+
+
+def test_appends_past_capacity_match_a_list_reference() -> None:
+    rng = random.Random(3)
+    buffer = UserEventBuffer(CAPACITY)
+    reference: list[dict] = []
+    # Enough appends for several compactions; a few samples arrive out of order.
+    for minute in range(CAPACITY * 7 + 3):
+        record = make_record(minute - 5 if minute % 11 == 0 else minute, rng)
+        buffer.append(record)
+        reference = [*reference, record][-CAPACITY:]
+        assert buffer.appended == minute + 1
+        assert_matches(buffer, reference)
+
+    decoded = list(buffer.records())
+    expected = sorted(reference, key=lambda r: r["timestamp"])
+    assert [r["timestamp"] for r in decoded] == [r["timestamp"] for r in expected]
+    assert [r["weather_condition"] for r in decoded] == [
+        r["weather_condition"] if r["weather_condition"] in WEATHER_CONDITIONS else "other" for r in expected
+    ]
+
+    tail = buffer.records_since(buffer.appended - 3)
+    assert [r["timestamp"] for r in tail] == [r["timestamp"] for r in reference[-3:]]
+    assert buffer.records_since(buffer.appended) == []
+    assert buffer.records_since(buffer.appended - CAPACITY - 1) is None
+
+
+def test_snapshot_round_trip() -> None:
+    rng = random.Random(5)
+    buffer = UserEventBuffer(CAPACITY)
+    records = [make_record(minute, rng) for minute in range(CAPACITY * 2 + 5)]
+    for record in records:
+        buffer.append(record)
+
+    state = buffer.export()
+    restored = UserEventBuffer.restore(CAPACITY, state)
+    assert restored.appended == buffer.appended
+    assert_matches(restored, records[-CAPACITY:])
+    # The snapshot is a copy, and the restored buffer keeps appending and compacting normally.
+    records.append(make_record(1000, rng))
+    buffer.append(records[-1])
+    assert_matches(restored, records[-CAPACITY - 1 : -1])
+    more = [make_record(minute, rng) for minute in range(100, 100 + CAPACITY * 3)]
+    for record in more:
+        restored.append(record)
+    assert_matches(restored, more[-CAPACITY:])
+
+    smaller = UserEventBuffer.restore(CAPACITY // 2, state)
+    assert_matches(smaller, records[-CAPACITY // 2 - 1 : -1])
+    copy = buffer.copy()
+    assert copy.appended == buffer.appended
+    assert_matches(copy, records[-CAPACITY:])
+
+
+def main() -> None:
+    test_appends_past_capacity_match_a_list_reference()
+    test_snapshot_round_trip()
+    print("✅ Ring buffer matches a list reference through compaction and snapshots")
+
+
+if __name__ == "__main__":
+    main()
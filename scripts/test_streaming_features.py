@@ -0,0 +1,173 @@
+"""Parity check between the online feature engine and the offline builder."""
+
+from __future__ import annotations
+
+from pathlib import Path
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+import backend.app as service
+from backend.circadian import CircadianBaseline, seed_baselines
+from backend.streaming import StreamingFeatureEngine
+from scripts.build_features import CIRCADIAN_COLUMNS, build_feature_table, load_dataset
+from scripts.feature_spec import compile_plan
+
+DATA_PATH = ROOT / "data/synthetic_timeseries.parquet"
+TOLERANCE = 1e-9
+
+
+def streaming_feature_table(raw: pd.DataFrame) -> pd.DataFrame:
+    rows = []
+    for _, group in raw.groupby("user_id", sort=False):
+        engine = StreamingFeatureEngine(circadian=CircadianBaseline(dtype=np.float64))
+        for record in group.to_dict(orient="records"):
+            engine.push(record)
+            rows.append(engine.features())
+    return pd.DataFrame(rows, index=raw.index)
+
+
+def test_streaming_matches_offline_features() -> None:
+    raw = load_dataset(DATA_PATH)
+    raw = raw[raw["user_id"].isin(raw["user_id"].unique()[:2])].reset_index(drop=True)
+
+    offline = build_feature_table(raw, min_history_minutes=0)
+    online = streaming_feature_table(raw)
+
+    for column in online.columns:
+        expected = offline[column].astype(float).to_numpy()
+        actual = online[column].to_numpy()
+        np.testing.assert_array_equal(np.isnan(actual), np.isnan(expected), err_msg=column)
+        np.testing.assert_allclose(actual, expected, rtol=0, atol=TOLERANCE, equal_nan=True, err_msg=column)
+
+
+def test_circadian_baseline_survives_short_window() -> None:
+    """The service rebuilds engines from 720 samples; deltas must still see yesterday."""
+    raw = load_dataset(DATA_PATH)
+    user = raw[raw["user_id"] == raw["user_id"].iloc[0]].reset_index(drop=True)
+    offline = build_feature_table(user, min_history_minutes=0)
+    delta_columns = [f"{column}_circadian_delta" for column in CIRCADIAN_COLUMNS]
+
+    records = user.to_dict(orient="records")
+    baseline = CircadianBaseline(dtype=np.float64)
+    StreamingFeatureEngine.from_records(records[:-720], circadian=baseline)
+    engine = StreamingFeatureEngine.from_records(records[-720:], circadian=baseline)
+    # A second rebuild over the same window replays samples the baseline has seen.
+    engine = StreamingFeatureEngine.from_records(records[-720:], circadian=baseline)
+
+    features = engine.features()
+    expected = offline[delta_columns].iloc[-1].to_numpy(dtype=float)
+    np.testing.assert_allclose([features[c] for c in delta_columns], expected, rtol=0, atol=TOLERANCE)
+
+
+def test_seeded_baseline_matches_offline(tmp_path: Path) -> None:
+    raw = load_dataset(DATA_PATH)
+    user = raw[raw["user_id"] == raw["user_id"].iloc[0]].reset_index(drop=True)
+    offline = build_feature_table(user, min_history_minutes=0)
+    history, live = user.iloc[:-60], user.iloc[-60:]
+    history.to_parquet(tmp_path / "history.parquet", index=False)
+
+    baseline = seed_baselines(tmp_path / "history.parquet")[user["user_id"].iloc[0]]
+    engine = StreamingFeatureEngine.from_records(live.to_dict(orient="records"), circadian=baseline)
+
+    features = engine.features()
+    for column in CIRCADIAN_COLUMNS:
+        name = f"{column}_circadian_delta"
+        # float32 baseline, so compare at single precision.
+        np.testing.assert_allclose(features[name], offline[name].iloc[-1], rtol=1e-6, atol=1e-4, err_msg=name)
+
+
+def test_pruned_plan_matches_offline() -> None:
+    requested = ["sin_circadian", "combined_environment_stress", "hrv_std_60m", "hrv_circadian_delta"]
+    plan = compile_plan(requested)
+    assert [step.name for step in plan.steps if step.kind != "signal"] == [
+        "minute_of_day",
+        "sin_circadian",
+        "low_pressure",
+        "high_noise",
+        "uv_alert",
+        "storm_conditions",
+        "combined_environment_stress",
+        "hrv_std_60m",
+        "hrv_circadian_delta",
+    ]
+
+    raw = load_dataset(DATA_PATH)
+    user = raw[raw["user_id"] == raw["user_id"].iloc[0]].reset_index(drop=True)
+    offline = build_feature_table(user, min_history_minutes=0, plan=plan)
+    assert "heart_rate_mean_15m" not in offline.columns
+
+    engine = StreamingFeatureEngine(plan, CircadianBaseline(plan.circadian_signals, dtype=np.float64))
+    for record in user.to_dict(orient="records"):
+        engine.push(record)
+    features = engine.features()
+    assert "heart_rate_mean_15m" not in features
+    for name in requested:
+        np.testing.assert_allclose(features[name], float(offline[name].iloc[-1]), rtol=0, atol=TOLERANCE, err_msg=name)
+
+
+def test_late_sample_rebuilds_the_engine_off_the_loop(monkeypatch: pytest.MonkeyPatch) -> None:
+    raw = load_dataset(DATA_PATH)
+    user = raw[raw["user_id"] == raw["user_id"].iloc[0]].head(60).assign(user_id="late_user")
+    payloads = [{**record, "timestamp": record["timestamp"].isoformat()} for record in user.to_dict("records")]
+    headers = {"X-API-Key": service.settings.api_token}
+    replay_threads: list[str] = []
+    replay = service._replay_engine
+
+    def recording_replay(*args):
+        replay_threads.append(threading.current_thread().name)
+        return replay(*args)
+
+    monkeypatch.setattr(service, "_replay_engine", recording_replay)
+    try:
+        with TestClient(service.app) as client:
+            deadline = time.monotonic() + 30
+            while not client.get("/health").json()["ready"] and time.monotonic() < deadline:
+                time.sleep(0.05)
+            client.post("/ingest/batch", json=payloads[:30] + payloads[31:], headers=headers).raise_for_status()
+            assert not replay_threads  # in-order samples are pushed, not replayed
+
+            client.post("/ingest", json=payloads[30], headers=headers).raise_for_status()
+            deadline = time.monotonic() + 10
+            while service.FEATURE_CACHE["late_user"]["version"] != service.EVENT_VERSIONS["late_user"]:
+                assert time.monotonic() < deadline, "late sample was never scored"
+                time.sleep(0.01)
+
+            # The same samples in order are pushed, not replayed, and must score identically.
+            ordered = [{**payload, "user_id": "ordered_user"} for payload in payloads]
+            client.post("/ingest/batch", json=ordered, headers=headers).raise_for_status()
+            late, in_order = service.FEATURE_CACHE["late_user"], service.FEATURE_CACHE["ordered_user"]
+            np.testing.assert_array_equal(late["features"], in_order["features"])
+            assert late["probability"] == in_order["probability"]
+    finally:
+        for user_id in ("late_user", "ordered_user"):
+            for state in (
+                service.EVENT_STORE, service.FEATURE_CACHE, service.FEATURE_ENGINES, service.CIRCADIAN_BASELINES
+            ):
+                state.pop(user_id, None)
+            service.DIRTY_USERS.discard(user_id)
+
+    # asyncio.to_thread workers, not the event-loop thread.
+    assert replay_threads and all(name.startswith("asyncio_") for name in replay_threads)
+
+
+def main() -> None:
+    test_streaming_matches_offline_features()
+    test_circadian_baseline_survives_short_window()
+    test_pruned_plan_matches_offline()
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_late_sample_rebuilds_the_engine_off_the_loop(monkeypatch)
+    print("✅ Streaming features match build_feature_table")
+
+
+if __name__ == "__main__":
+    main()
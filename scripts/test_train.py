@@ -0,0 +1,284 @@
+"""Checks for the lean, cross-validation, incremental and latency-budget paths in models/train.py."""
+
+from __future__ import annotations
+
+from argparse import Namespace
+from dataclasses import replace
+from pathlib import Path
+import json
+import sys
+import tracemalloc
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from backend.booster import RawBooster
+import models.train as train
+from models.train import (
+    apply_latency_budget,
+    build_lean_dataset,
+    candidate_params,
+    load_features,
+    lean_source,
+    load_lean,
+    prepare_data,
+    raw_scores,
+    run_cv,
+    train_incremental,
+    train_lean,
+    utc_timestamp,
+)
+
+FEATURES = ROOT / "data/features.parquet"
+
+
+def lean_args(tmp_path: Path, **overrides) -> Namespace:
+    args = Namespace(
+        features=FEATURES,
+        booster=tmp_path / "model.txt",
+        feature_metadata=tmp_path / "feature_metadata.json",
+        metrics=tmp_path / "metrics.json",
+        test_ratio=0.2,
+        seed=42,
+        threshold=0.5,
+        dataset_cache=None,
+        cv_folds=0,
+        search=None,
+        search_space=None,
+        search_trials=20,
+        max_rounds=1000,
+        early_stopping_rounds=50,
+        workers=1,
+        refit=False,
+        scaler=tmp_path / "scaler.pkl",
+        init_model=None,
+        since=None,
+        incremental_rounds=100,
+        max_latency_us=None,
+    )
+    for key, value in overrides.items():
+        setattr(args, key, value)
+    return args
+
+
+def test_lean_data_matches_prepare_data() -> None:
+    data, targets, users, feature_cols = prepare_data(load_features(FEATURES))
+    lean = load_lean(FEATURES)
+    assert lean.feature_cols == feature_cols
+    assert lean.matrix.dtype == np.float32 and lean.matrix.flags.c_contiguous
+    np.testing.assert_array_equal(lean.matrix, data.to_numpy(dtype=np.float32))
+    np.testing.assert_array_equal(lean.labels, targets.to_numpy())
+    np.testing.assert_array_equal(lean.users, users.to_numpy())
+
+
+def test_lean_training_writes_booster_and_resource_metrics(tmp_path: Path) -> None:
+    metrics = train_lean(lean_args(tmp_path, dataset_cache=tmp_path / "train.bin"))
+    assert json.loads((tmp_path / "metrics.json").read_text()) == metrics
+    assert metrics["peak_rss_mb"] > 0 and metrics["train_wall_seconds"] > 0
+    assert (tmp_path / "train.bin").exists()
+    serving = metrics["serving"]
+    assert serving["trees"] == 400 and serving["model_bytes"] == (tmp_path / "model.txt").stat().st_size
+    assert 0 < serving["single_row_us"]["p50"] <= serving["single_row_us"]["p99"]
+    assert serving["load_ms"] > 0 and "trimmed_from_trees" not in serving
+
+    features = json.loads((tmp_path / "feature_metadata.json").read_text())["features"]
+    booster = RawBooster(tmp_path / "model.txt", features)
+    rows = load_lean(FEATURES).matrix[:50].astype(float)
+    first = booster.predict_matrix(rows)
+
+    # A second run trains from the cached binned dataset and gets the same model.
+    cached = train_lean(lean_args(tmp_path, dataset_cache=tmp_path / "train.bin"))
+    assert cached["roc_auc"] == metrics["roc_auc"]
+    np.testing.assert_array_equal(RawBooster(tmp_path / "model.txt", features).predict_matrix(rows), first)
+
+
+def test_dataset_cache_is_keyed_on_source_split_and_labels(tmp_path: Path) -> None:
+    data = load_lean(FEATURES)
+    cache = tmp_path / "train.bin"
+    source = lean_source(lean_args(tmp_path))
+    # Every other row, so the training rows are not one contiguous slice.
+    rows = np.arange(0, len(data.labels), 2)
+
+    def reused(data, rows, source) -> bool:
+        return build_lean_dataset(data, rows, cache, source).data == str(cache)
+
+    built = build_lean_dataset(data, rows, cache, source).construct()
+    np.testing.assert_array_equal(built.get_label(), data.labels[rows])
+    assert reused(data, rows, source)
+
+    # Same shape and feature list, but different labels, split or options: rebuilt, not reused.
+    flipped = replace(data, labels=1 - data.labels)
+    rebuilt = build_lean_dataset(flipped, rows, cache, source).construct()
+    np.testing.assert_array_equal(rebuilt.get_label(), flipped.labels[rows])
+    assert not reused(data, rows + 1, source)
+    assert not reused(data, rows, {**source, "seed": 7})
+    assert reused(data, rows, {**source, "seed": 7})
+
+
+def test_random_search_samples_distinct_grid_points() -> None:
+    space = {"num_leaves": [15, 31, 63], "learning_rate": [0.05, 0.1]}
+    assert len(candidate_params("grid", space, 2, seed=0)) == 6
+    sampled = candidate_params("random", space, 3, seed=0)
+    assert len({json.dumps(params, sort_keys=True) for params in sampled}) == 3
+    assert sampled == candidate_params("random", space, 3, seed=0)
+    assert candidate_params(None, space, 3, seed=0) == [{}]
+
+
+def test_grouped_cv_ranks_candidates_and_refits(tmp_path: Path) -> None:
+    space = tmp_path / "space.json"
+    space.write_text(json.dumps({"num_leaves": [7, 15], "learning_rate": [0.1]}))
+    args = lean_args(
+        tmp_path, cv_folds=3, search="grid", search_space=space, max_rounds=60, early_stopping_rounds=10, refit=True
+    )
+    metrics = run_cv(args)
+
+    results = pd.read_csv(tmp_path / "cv_results.csv")
+    assert list(results["rank"]) == [1, 2]
+    assert results["logloss_mean"].is_monotonic_increasing and results["within_budget"].all()
+    assert (results["single_row_p99_us"] > 0).all()
+    assert metrics["cv"]["best_params"] == json.loads(results.loc[0, "params"])
+    assert 1 <= metrics["cv"]["best_num_boost_round"] <= 60
+    assert json.loads((tmp_path / "metrics.json").read_text()) == metrics
+    assert (tmp_path / "model.txt").exists()
+
+
+def test_incremental_training_extends_the_previous_model(tmp_path: Path) -> None:
+    train_lean(lean_args(tmp_path))
+    since = pd.read_parquet(FEATURES, columns=["timestamp"])["timestamp"].quantile(0.5)
+    args = lean_args(tmp_path, init_model=tmp_path / "model.txt", since=since, incremental_rounds=20)
+    metrics = train_incremental(args)
+
+    # LightGBM stops early once no split is worth making, so up to 20 trees are added.
+    assert metrics["trees_before"] == 400 and 0 < metrics["trees_added"] <= 20
+    assert metrics["train_samples"] + metrics["test_samples"] < len(load_lean(FEATURES).labels)
+    if metrics["roc_auc"] is not None and metrics["previous"]["roc_auc"] is not None:
+        assert metrics["delta"]["roc_auc"] == pytest.approx(metrics["roc_auc"] - metrics["previous"]["roc_auc"])
+    assert json.loads((tmp_path / "metrics.json").read_text()) == metrics
+
+
+def test_since_accepts_naive_and_offset_timestamps(tmp_path: Path) -> None:
+    aware = pd.read_parquet(FEATURES, columns=["timestamp"])["timestamp"].quantile(0.5)
+    naive = aware.tz_localize(None)
+    assert utc_timestamp(str(naive)) == utc_timestamp(aware.tz_convert("Europe/Berlin").isoformat()) == aware
+    assert str(utc_timestamp(str(naive)).tz) == "UTC"
+    expected = load_lean(FEATURES, since=aware)
+    np.testing.assert_array_equal(load_lean(FEATURES, since=naive).labels, expected.labels)
+
+    train_lean(lean_args(tmp_path))
+    args = lean_args(tmp_path, init_model=tmp_path / "model.txt", since=naive, incremental_rounds=5)
+    metrics = train_incremental(args)
+    assert metrics["since"] == aware.isoformat()
+    assert metrics["train_samples"] + metrics["test_samples"] == len(expected.labels)
+
+
+def test_incremental_training_reuses_a_dataset_cache(tmp_path: Path) -> None:
+    train_lean(lean_args(tmp_path, seed=0))
+    (tmp_path / "model.txt").rename(tmp_path / "base.txt")
+    features = json.loads((tmp_path / "feature_metadata.json").read_text())["features"]
+    rows = load_lean(FEATURES).matrix[:50].astype(float)
+
+    def warm_start(cache: Path | None) -> tuple[dict, np.ndarray]:
+        args = lean_args(tmp_path, seed=0, init_model=tmp_path / "base.txt", incremental_rounds=5, dataset_cache=cache)
+        metrics = train_incremental(args)
+        return metrics, RawBooster(tmp_path / "model.txt", features).predict_matrix(rows)
+
+    uncached, expected = warm_start(None)
+    # Cold run writes the binned binary, the second run loads it; both match the uncached warm start.
+    for _ in range(2):
+        metrics, predictions = warm_start(tmp_path / "incremental.bin")
+        assert metrics["trees_before"] == 400 and metrics["trees_added"] == uncached["trees_added"] > 0
+        np.testing.assert_array_equal(predictions, expected)
+    assert (tmp_path / "incremental.bin").exists()
+
+
+def test_incremental_training_reads_rows_in_batches(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    train_lean(lean_args(tmp_path, seed=0))
+    previous = lgb.Booster(model_file=str(tmp_path / "model.txt"))
+    data = load_lean(FEATURES)
+    rows = np.arange(0, len(data.labels), 2)
+    monkeypatch.setattr(train._RowSubset, "batch_size", 256)
+
+    # Init scores for the warm start never hold more than a batch of float64 rows besides the result.
+    tracemalloc.start()
+    try:
+        scores = raw_scores(previous, data.matrix, rows)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    np.testing.assert_allclose(scores, previous.predict(data.matrix[rows], raw_score=True))
+    full_copy = len(rows) * len(data.feature_cols) * 8
+    assert peak < full_copy / 4
+
+    # Nothing asks LightGBM to predict a Sequence, which it would densify into one sparse copy.
+    warnings: list[str] = []
+    monkeypatch.setattr(lgb.basic, "_log_warning", warnings.append)
+    train_incremental(lean_args(tmp_path, seed=0, init_model=tmp_path / "model.txt", incremental_rounds=5))
+    assert not any("scipy sparse" in message for message in warnings)
+
+
+def test_incremental_training_rejects_a_changed_feature_list(tmp_path: Path) -> None:
+    train_lean(lean_args(tmp_path))
+    meta_path = tmp_path / "feature_metadata.json"
+    meta = json.loads(meta_path.read_text())
+    meta["features"] = meta["features"][:-1]
+    meta_path.write_text(json.dumps(meta))
+    with pytest.raises(ValueError, match="full retrain"):
+        train_incremental(lean_args(tmp_path, init_model=tmp_path / "model.txt"))
+
+
+def test_latency_budget_keeps_the_most_trees_that_fit(monkeypatch: pytest.MonkeyPatch) -> None:
+    # Replace the timing with a deterministic 0.1 us per tree so the bisection is exact.
+    def fake_cost(booster, rows, num_iteration=None):
+        trees = num_iteration or booster.current_iteration()
+        return {"trees": trees, "single_row_us": {"p50": trees / 20, "p99": trees / 10}}
+
+    monkeypatch.setattr(train, "serving_cost", fake_cost)
+    booster = lgb.Booster(model_file=str(ROOT / "models/model.txt"))
+    rows = load_lean(FEATURES).matrix[:10]
+
+    untouched, cost = apply_latency_budget(booster, rows, None)
+    assert untouched is booster and cost["max_latency_us"] is None
+
+    trimmed, cost = apply_latency_budget(booster, rows, 12.5)
+    assert trimmed.current_iteration() == 125
+    assert cost["trimmed_from_trees"] == 400 and cost["single_row_us"]["p99"] <= 12.5
+    np.testing.assert_allclose(trimmed.predict(rows), booster.predict(rows, num_iteration=125))
+
+    with pytest.raises(ValueError, match="even with one tree"):
+        apply_latency_budget(booster, rows, 0.05)
+
+
+def main() -> None:
+    import tempfile
+
+    test_lean_data_matches_prepare_data()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_lean_training_writes_booster_and_resource_metrics(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_dataset_cache_is_keyed_on_source_split_and_labels(Path(tmp))
+    test_random_search_samples_distinct_grid_points()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_grouped_cv_ranks_candidates_and_refits(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_incremental_training_extends_the_previous_model(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_since_accepts_naive_and_offset_timestamps(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_incremental_training_reuses_a_dataset_cache(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp, pytest.MonkeyPatch.context() as monkeypatch:
+        test_incremental_training_reads_rows_in_batches(Path(tmp), monkeypatch)
+    with tempfile.TemporaryDirectory() as tmp:
+        test_incremental_training_rejects_a_changed_feature_list(Path(tmp))
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_latency_budget_keeps_the_most_trees_that_fit(monkeypatch)
+    print("✅ Lean, cross-validation, incremental and latency-budget training paths behave")
+
+
+if __name__ == "__main__":
+    main()